@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import os, sys, getopt
+import re
+import json
+from multiprocessing import Pool
+from scipy import sparse
+
+from matio    import map_mat, map_vec, file_hash
+from matstats import mat_summary, vec_summary
+
+#   version of the catalog entries, bump if the recorded fields change
+VERSION = 1
+
+#   file types and the case name pattern of the cavity matrices
+KINDS   = {'.mat': 'mat', '.rhs': 'rhs', '.sol': 'sol'}
+PATTERN = re.compile(r'(sym_)?cavity-pc-(\d+)x(\d+)-i(\d+)$')
+
+###########################################################
+#   get command line arguments                            #
+###########################################################
+def read_args(argv):
+    ddir  = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    cfile = ''
+    nproc = 0
+    query = ''
+    usage = 'catalog.py {-d <datadir>} {-c <catalog file>} {-n <nproc>} {-q <field=value,...>}'
+    try:
+       opts, args = getopt.getopt(argv,"hd:c:n:q:",["ddir=","cfile=","nproc=","query="])
+    except getopt.GetoptError:
+       print (usage)
+       sys.exit(2)
+    for opt, arg in opts:
+       if opt == '-h':
+          print (usage)
+          print ('\t-d data directory, searched recursively, default ../data')
+          print ('\t-c catalog file, default catalog.json in the current directory')
+          print ('\t-n number of worker processes, default number of cores')
+          print ('\t-q list entries matching all of the comma separated conditions, e.g.')
+          print ('\t   kind=mat,iter=10,symmetric=false,nrow>=1024')
+          sys.exit()
+       elif opt in ("-d", "--ddir"):
+          ddir = arg
+       elif opt in ("-c", "--cfile"):
+          cfile = arg
+       elif opt in ("-n", "--nproc"):
+          nproc = int(arg)
+       elif opt in ("-q", "--query"):
+          query = arg
+
+    if not cfile: cfile = 'catalog.json'
+    return ddir, cfile, nproc, query
+
+###########################################################
+#   catalog entry of one file                             #
+###########################################################
+def describe(task):
+
+    path, rel = task
+    root, ext = os.path.splitext(os.path.basename(path))
+    st = os.stat(path)
+    e  = {'version': VERSION, 'path': rel, 'kind': KINDS[ext], 'case': root,
+          'size': st.st_size, 'mtime': st.st_mtime, 'sha256': file_hash(path),
+          'set': os.path.basename(os.path.dirname(path))}
+
+    m = PATTERN.match(root)
+    if m is not None:
+       e['mesh'] = int(m.group(2))
+       e['iter'] = int(m.group(4))
+
+#   header and single pass statistics, without the per file name
+    if e['kind'] == 'mat':
+       real, nr, nc, nnz, rval, col, rowstt = map_mat(path)
+       stats = mat_summary(path)
+       e.update(real=bool(real), dtype='float64', nrow=nr, ncol=nc, nnz=nnz,
+                symmetric=bool(nr == nc and stats['symmetry']['defect'] == 0.0))
+    else:
+       nv, v = map_vec(path)
+       stats = vec_summary(path)
+       e.update(real=True, dtype='float64', nrow=nv, ncol=1, nnz=nv - stats['zeros'])
+    del stats['file']
+    e['stats'] = stats
+
+    return rel, e
+
+###########################################################
+#   build or update catalog, re-reading changed files     #
+###########################################################
+def build(ddir, cfile='', nproc=0):
+
+    if not cfile: cfile = 'catalog.json'
+    cat = {'version': VERSION, 'files': {}}
+    if os.path.isfile(cfile):
+       with open(cfile) as fp:
+          cat = json.load(fp)
+
+#   paths are stored relative to the catalog file so the tree can be moved
+    base  = os.path.dirname(os.path.abspath(cfile))
+    old   = cat['files']
+    files = {}
+    todo  = []
+    for dirpath, dirnames, filenames in os.walk(ddir):
+       dirnames.sort()
+       for f in sorted(filenames):
+          if os.path.splitext(f)[1] not in KINDS: continue
+          path = os.path.join(dirpath, f)
+          rel  = os.path.relpath(path, base)
+          st   = os.stat(path)
+          e    = old.get(rel)
+          if e and e.get('version') == VERSION and e['size'] == st.st_size and e['mtime'] == st.st_mtime:
+             files[rel] = e
+          else:
+             todo.append((path, rel))
+
+    removed = len(set(old) - set(files) - set(r for p, r in todo))
+    print('catalog', cfile + ':', len(files), 'unchanged,', len(todo), 'new or changed,', removed, 'removed')
+
+    if todo:
+       if nproc <= 0: nproc = os.cpu_count() or 1
+       nproc = min(nproc, len(todo))
+       if nproc > 1:
+          with Pool(nproc) as pool:
+             for rel, e in pool.imap_unordered(describe, todo):
+                files[rel] = e
+       else:
+          for t in todo:
+             rel, e = describe(t)
+             files[rel] = e
+
+    cat = {'version': VERSION, 'files': dict(sorted(files.items()))}
+    if todo or removed:
+       with open(cfile, 'w') as fp:
+          json.dump(cat, fp, indent=1)
+
+    cat['base'] = base
+    return cat
+
+###########################################################
+#   read catalog without updating it                      #
+###########################################################
+def load(cfile):
+
+    with open(cfile) as fp:
+       cat = json.load(fp)
+    cat['base'] = os.path.dirname(os.path.abspath(cfile))
+    return cat
+
+###########################################################
+#   entries matching all conditions                       #
+###########################################################
+def query(cat, *conds, **fields):
+
+#   fields are equality tests, e.g. kind='mat', iter=10, conds are strings such as 'nrow>=1024'
+    ops = (('>=', lambda a, b: a >= b), ('<=', lambda a, b: a <= b), ('!=', lambda a, b: a != b),
+           ('>',  lambda a, b: a > b),  ('<',  lambda a, b: a < b),  ('=',  lambda a, b: a == b))
+    tests = [(k, ops[-1][1], v) for k, v in fields.items()]
+    for c in conds:
+       for sym, fn in ops:
+          if sym in c:
+             k, v = c.split(sym, 1)
+             tests.append((k.strip(), fn, parse_value(v.strip())))
+             break
+       else:
+          raise ValueError('invalid condition ' + c)
+
+    found = []
+    for e in cat['files'].values():
+       if all(k in e and fn(e[k], v) for k, fn, v in tests):
+          found.append(e)
+    return found
+
+def parse_value(v):
+    if v.lower() in ('true', 'false'): return v.lower() == 'true'
+    for t in (int, float):
+       try:
+          return t(v)
+       except ValueError:
+          pass
+    return v
+
+###########################################################
+#   lazily open matching file through memory mapping      #
+###########################################################
+def open_entry(cat, e):
+
+#   matrices give a CSR matrix over the mapped values and indices, vectors the mapped array
+    path = os.path.join(cat['base'], e['path'])
+    if e['kind'] == 'mat':
+       real, nr, nc, nnz, rval, col, rowstt = map_mat(path)
+       a = sparse.csr_matrix((nr, nc))
+       a.data, a.indices, a.indptr = rval, col, rowstt
+       return a
+    return map_vec(path)[1]
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def main(argv):
+
+    ddir, cfile, nproc, cond = read_args(argv)
+    cat = build(ddir, cfile, nproc)
+
+    if cond:
+       found = query(cat, *cond.split(','))
+       print('\n%d matching files:' % len(found))
+       for e in found:
+          print('%-44s %-4s %8d x %-8d %10d  symmetric=%s' %
+                (e['path'], e['kind'], e['nrow'], e['ncol'], e['nnz'], e.get('symmetric', '-')))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
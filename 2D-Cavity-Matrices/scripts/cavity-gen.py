@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import os, sys, getopt
+import time
+import numpy as np
+from multiprocessing import Pool
+from scipy import sparse
+from scipy.sparse.linalg import splu, bicgstab, cg, LinearOperator
+
+from matio import save_mat, save_vec
+
+#   under-relaxation of velocity and pressure, lid velocity and density are 1
+ALPHA_U = 0.7
+ALPHA_P = 0.3
+
+#   inner iterations, the pressure correction is refactorised when CG needs more than PC_ITERS
+MOM_ITERS = 20
+PC_ITERS  = 10
+
+###########################################################
+#   get command line arguments                            #
+###########################################################
+def read_args(argv):
+    meshes = [4, 8, 16, 32, 64]
+    iters  = [10, 100]
+    reyn   = 100.0
+    odir   = '.'
+    symm   = False
+    nproc  = 0
+    usage  = 'cavity-gen.py {-n <n,n,...>} {-i <iter,iter,...>} {-r <Re>} {-o <outdir>} {-y} {-p <nproc>}'
+    try:
+       opts, args = getopt.getopt(argv,"hn:i:r:o:yp:",["mesh=","iter=","re=","odir=","symm","nproc="])
+    except getopt.GetoptError:
+       print (usage)
+       sys.exit(2)
+    for opt, arg in opts:
+       if opt == '-h':
+          print (usage)
+          print ('\t-n comma separated pressure correction mesh sizes, default 4,8,16,32,64')
+          print ('\t-i comma separated SIMPLE iterations to sample, default 10,100')
+          print ('\t-r Reynolds number based on the lid velocity and cavity size, default 100')
+          print ('\t-o output directory, default the current directory')
+          print ('\t-y also write the symmetrised sym_cavity files of eqn. (1)')
+          print ('\t-p number of worker processes, one mesh per process, default number of cores')
+          sys.exit()
+       elif opt in ("-n", "--mesh"):
+          meshes = [int(v) for v in arg.split(',')]
+       elif opt in ("-i", "--iter"):
+          iters = [int(v) for v in arg.split(',')]
+       elif opt in ("-r", "--re"):
+          reyn = float(arg)
+       elif opt in ("-o", "--odir"):
+          odir = arg
+       elif opt in ("-y", "--symm"):
+          symm = True
+       elif opt in ("-p", "--nproc"):
+          nproc = int(arg)
+
+    if min(meshes) < 2 or min(iters) < 1:
+       print('\nmesh sizes must be at least 2 and iterations at least 1\n')
+       sys.exit(2)
+    return meshes, sorted(set(iters)), reyn, odir, symm, nproc
+
+###########################################################
+#   5-point matrix, boundary coefficients already zero    #
+###########################################################
+def stencil(ap, aw, ae, as_, an):
+
+#   unknown (j, i) is row i + nx*j, the same ordering as the exported matrices
+    ny, nx = ap.shape
+    a = sparse.diags([ap.ravel(), -aw.ravel()[1:], -ae.ravel()[:-1], -as_.ravel()[nx:], -an.ravel()[:-nx]],
+                     [0, -1, 1, -nx, nx], format='csr')
+    a.eliminate_zeros()
+    a.sort_indices()
+    return a
+
+###########################################################
+#   hybrid differencing neighbour coefficients            #
+###########################################################
+def hybrid(fw, fe, fs, fn, d):
+    aw = np.maximum(np.maximum( fw, d + 0.5*fw), 0.0)
+    ae = np.maximum(np.maximum(-fe, d - 0.5*fe), 0.0)
+    as_ = np.maximum(np.maximum( fs, d + 0.5*fs), 0.0)
+    an = np.maximum(np.maximum(-fn, d - 0.5*fn), 0.0)
+    return aw, ae, as_, an
+
+###########################################################
+#   relax, assemble and partly solve momentum equation    #
+###########################################################
+def momentum(phi, ap, aw, ae, as_, an, src):
+
+#   boundary neighbours are fixed wall values, zero, so only appear in ap
+    ap = ap/ALPHA_U
+    b  = src + (1.0 - ALPHA_U)*ap*phi
+    a  = stencil(ap, aw, ae, as_, an)
+    x, info = bicgstab(a, b.ravel(), x0=phi.ravel(), rtol=1e-10, maxiter=MOM_ITERS)
+    return x.reshape(phi.shape), ap
+
+###########################################################
+#   SIMPLE iterations on an n x n cell staggered mesh     #
+###########################################################
+def simple(n, iters, reyn):
+
+#   u[j, i] at x = i h, y = (j+1/2) h, v[j, i] at x = (i+1/2) h, y = j h, p[j, i] at cell centres
+    h  = 1.0/n
+    mu = 1.0/reyn
+    u  = np.zeros((n, n+1))
+    v  = np.zeros((n+1, n))
+    p  = np.zeros((n, n))
+    du = np.zeros((n, n+1))
+    dv = np.zeros((n+1, n))
+    lu = None
+    nlu = 0
+
+    for it in range(1, iters[-1]+1):
+
+#      u momentum at the interior faces i = 1..n-1, diffusion conductance mu h/h
+       fe = 0.5*(u[:, 1:-1] + u[:, 2:])*h
+       fw = 0.5*(u[:, :-2] + u[:, 1:-1])*h
+       fn = 0.5*(v[1:, :-1] + v[1:, 1:])*h
+       fs = 0.5*(v[:-1, :-1] + v[:-1, 1:])*h
+       aw, ae, as_, an = hybrid(fw, fe, fs, fn, mu)
+
+#      bottom wall and lid are h/2 from the first row of u, the lid moves with u = 1
+       as_[0] = 2*mu
+       an[-1] = 2*mu
+       ap  = aw + ae + as_ + an + (fe - fw + fn - fs)
+       src = (p[:, :-1] - p[:, 1:])*h
+       src[-1] += an[-1]
+
+#      neighbours on the boundary have fixed values and leave the matrix
+       as_[0]    = 0.0
+       an[-1]    = 0.0
+       aw[:, 0]  = 0.0
+       ae[:, -1] = 0.0
+       u[:, 1:-1], apu = momentum(u[:, 1:-1], ap, aw, ae, as_, an, src)
+       du[:, 1:-1] = h/apu
+
+#      v momentum at the interior faces j = 1..n-1
+       fn = 0.5*(v[1:-1] + v[2:])*h
+       fs = 0.5*(v[:-2] + v[1:-1])*h
+       fe = 0.5*(u[:-1, 1:] + u[1:, 1:])*h
+       fw = 0.5*(u[:-1, :-1] + u[1:, :-1])*h
+       aw, ae, as_, an = hybrid(fw, fe, fs, fn, mu)
+       aw[:, 0]  = 2*mu
+       ae[:, -1] = 2*mu
+       ap  = aw + ae + as_ + an + (fe - fw + fn - fs)
+       src = (p[:-1] - p[1:])*h
+
+       as_[0]    = 0.0
+       an[-1]    = 0.0
+       aw[:, 0]  = 0.0
+       ae[:, -1] = 0.0
+       v[1:-1], apv = momentum(v[1:-1], ap, aw, ae, as_, an, src)
+       dv[1:-1] = h/apv
+
+#      pressure correction, b is the mass imbalance of each cell
+       aw = du[:, :-1]*h
+       ae = du[:, 1:]*h
+       as_ = dv[:-1]*h
+       an = dv[1:]*h
+       ap = aw + ae + as_ + an
+       b  = ((u[:, :-1] - u[:, 1:]) + (v[:-1] - v[1:]))*h
+       a  = stencil(ap, aw, ae, as_, an)
+
+#   A_00 x_0 = 0 removes the degeneracy of the pure Neumann problem, the exported
+#   matrices keep the zeroed entries of the first row
+       a.data[a.indptr[0]:a.indptr[1]][a.indices[a.indptr[0]:a.indptr[1]] != 0] *= 0.0
+       b = b.ravel()
+       b[0] = 0.0
+
+#   x_0 = 0 so column 0 can be dropped as well, giving an SPD system
+       s = a.copy()
+       s.data[(s.indices == 0) & (np.arange(s.nnz) >= s.indptr[1])] = 0.0
+
+#   the coefficients change slowly, so CG preconditioned with the factors of an earlier
+#   matrix converges in a few iterations, refactorise when it does not and when sampled
+       info = 1
+       if lu is not None and it not in iters:
+          m = LinearOperator(a.shape, matvec=lu.solve)
+          x, info = cg(s, b, rtol=1e-10, atol=0.0, maxiter=PC_ITERS, M=m)
+       if info != 0:
+          lu  = splu(s.tocsc())
+          nlu += 1
+          x   = lu.solve(b)
+
+       if it in iters:
+          yield it, a, b, x, nlu
+
+#      correct velocities and pressure
+       x = x.reshape(n, n)
+       u[:, 1:-1] += du[:, 1:-1]*(x[:, :-1] - x[:, 1:])
+       v[1:-1]    += dv[1:-1]*(x[:-1] - x[1:])
+       p += ALPHA_P*x
+
+###########################################################
+#   generate and write one mesh size                      #
+###########################################################
+def generate(task):
+
+    n, iters, reyn, odir, symm = task
+    t0 = time.perf_counter()
+    out = []
+    for it, a, b, x, nlu in simple(n, iters, reyn):
+       root = os.path.join(odir, 'cavity-pc-%dx%d-i%d' % (n, n, it))
+       save_mat(root + '.mat', a)
+       save_vec(root + '.rhs', b)
+       save_vec(root + '.sol', x)
+
+#      symmetrised system of eqn. (1)
+       if symm:
+          root = os.path.join(odir, 'sym_cavity-pc-%dx%d-i%d' % (n, n, it))
+          save_mat(root + '.mat', sparse.bmat([[None, a], [a.T, None]], format='csr'))
+          save_vec(root + '.rhs', np.concatenate((b, np.zeros(n*n))))
+          save_vec(root + '.sol', np.concatenate((np.zeros(n*n), x)))
+       out.append((it, a.nnz, np.linalg.norm(b), nlu))
+
+    return n, out, time.perf_counter() - t0
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def main(argv):
+
+    meshes, iters, reyn, odir, symm, nproc = read_args(argv)
+    os.makedirs(odir, exist_ok=True)
+
+#   largest meshes first so they do not finish last
+    tasks = [(n, iters, reyn, odir, symm) for n in sorted(set(meshes), reverse=True)]
+    with Pool(nproc or None) as pool:
+       for n, out, secs in pool.imap_unordered(generate, tasks):
+          for it, nnz, bnorm, nlu in out:
+             print('cavity-pc-%dx%d-i%d  nnz %9d  |b| %.3e  factorisations %d' % (n, n, it, nnz, bnorm, nlu))
+          print('%dx%d mesh generated in %.1f s' % (n, n, secs))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
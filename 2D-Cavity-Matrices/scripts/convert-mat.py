@@ -0,0 +1,365 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import os, sys, getopt
+import numpy as np
+from multiprocessing import Pool
+
+from matio import map_mat, map_vec, row_blocks
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+#   default number of non-zeros, or vector entries, written per block
+CHUNK = 1<<22
+
+#   PETSc binary file class ids
+MAT_CLASSID = 1211216
+VEC_CLASSID = 1211214
+
+#   extension of each target format, 'bin' converts back to the project binary format
+FORMATS = {'mtx': '.mtx', 'petsc': '.petsc', 'h5': '.h5', 'bin': ''}
+
+###########################################################
+#   get command line arguments                            #
+###########################################################
+def read_args(argv):
+    fmt   = 'mtx'
+    odir  = ''
+    nproc = 0
+    chunk = CHUNK
+    usage = 'convert-mat.py -f <mtx|petsc|h5|bin> {-o <output dir>} {-n <nproc>} {-c <chunk>} <files>'
+    try:
+       opts, args = getopt.getopt(argv,"hf:o:n:c:",["format=","odir=","nproc=","chunk="])
+    except getopt.GetoptError:
+       print (usage)
+       sys.exit(2)
+    for opt, arg in opts:
+       if opt == '-h':
+          print (usage)
+          print ('\t-f target format: mtx Matrix Market, petsc PETSc binary, h5 HDF5 (needs h5py),')
+          print ('\t   bin converts mtx, petsc or h5 files back to the project binary format')
+          print ('\t-o output directory, default next to each input file')
+          print ('\t-n number of worker processes, default number of cores')
+          print ('\t-c number of non-zeros or vector entries per block, default', CHUNK)
+          print ('\tfiles are .mat or _mat.bin matrices and .rhs, .sol or _rhs.bin, _sol.bin vectors')
+          sys.exit()
+       elif opt in ("-f", "--format"):
+          fmt = arg
+       elif opt in ("-o", "--odir"):
+          odir = arg
+       elif opt in ("-n", "--nproc"):
+          nproc = int(arg)
+       elif opt in ("-c", "--chunk"):
+          chunk = int(arg)
+
+    if fmt not in FORMATS:
+       print('\nunknown format', fmt, 'use', '|'.join(FORMATS), '\n')
+       sys.exit(2)
+    if fmt == 'h5' and h5py is None:
+       print('\nh5py is not installed, HDF5 output is not available\n')
+       sys.exit(2)
+    for f in args:
+       if not os.path.isfile(f):
+          print('\nfile', f, 'does not exist\n')
+          sys.exit(3)
+
+    return fmt, odir, nproc, chunk, args
+
+###########################################################
+#   matrix or vector from project binary file name        #
+###########################################################
+def is_matrix(filename):
+    return filename.endswith('.mat') or filename.endswith('_mat.bin')
+
+###########################################################
+#   output file name                                      #
+###########################################################
+def out_name(filename, fmt, odir):
+
+#   the target extension is appended, so converting back strips it again
+    if fmt == 'bin':
+       root, ext = os.path.splitext(filename)
+       name = root if os.path.splitext(root)[1] else root + '.bin'
+    else:
+       name = filename + FORMATS[fmt]
+    if odir: name = os.path.join(odir, os.path.basename(name))
+    return name
+
+###########################################################
+#   Matrix Market, streamed one row block at a time       #
+###########################################################
+def write_mtx(filename, ofile, chunk):
+
+    with open(ofile, 'w') as fp:
+       if is_matrix(filename):
+          real, nr, nc, nnz, rval, col, rowstt = map_mat(filename)
+          fp.write('%%MatrixMarket matrix coordinate real general\n')
+          fp.write('%d %d %d\n' % (nr, nc, nnz))
+          for ra, rb in row_blocks(rowstt, chunk):
+             s0, s1 = int(rowstt[ra]), int(rowstt[rb])
+             rows = np.repeat(np.arange(ra+1, rb+1), np.diff(rowstt[ra:rb+1]))
+             text = ['%d %d %.17g\n' % t for t in zip(rows, col[s0:s1] + 1, rval[s0:s1])]
+             fp.write(''.join(text))
+       else:
+          nv, v = map_vec(filename)
+          fp.write('%%MatrixMarket matrix array real general\n')
+          fp.write('%d 1\n' % nv)
+          for i in range(0, nv, chunk):
+             fp.write(''.join('%.17g\n' % t for t in v[i:i+chunk]))
+
+###########################################################
+#   PETSc binary: big-endian int32 header and indices     #
+###########################################################
+def write_petsc(filename, ofile, chunk):
+
+#   check the header fits in int32 before the output file is created
+    if is_matrix(filename):
+       real, nr, nc, nnz, rval, col, rowstt = map_mat(filename)
+       dims = (nr, nc, nnz)
+    else:
+       nv, v = map_vec(filename)
+       dims = (nv,)
+    if max(dims) >= 2**31:
+       raise ValueError('too many rows, columns or non-zeros for 32-bit PETSc indices')
+
+    with open(ofile, 'wb') as fp:
+       if is_matrix(filename):
+          np.array([MAT_CLASSID, nr, nc, nnz], dtype='>i4').tofile(fp)
+
+#         row lengths, then column indices, then values, each streamed in blocks
+          for ra, rb in row_blocks(rowstt, chunk):
+             np.diff(rowstt[ra:rb+1]).astype('>i4').tofile(fp)
+          for i in range(0, nnz, chunk):
+             col[i:i+chunk].astype('>i4').tofile(fp)
+          for i in range(0, nnz, chunk):
+             rval[i:i+chunk].astype('>f8').tofile(fp)
+       else:
+          np.array([VEC_CLASSID, nv], dtype='>i4').tofile(fp)
+          for i in range(0, nv, chunk):
+             v[i:i+chunk].astype('>f8').tofile(fp)
+
+###########################################################
+#   HDF5 CSR datasets written in blocks                   #
+###########################################################
+def write_h5(filename, ofile, chunk):
+
+    with h5py.File(ofile, 'w') as h5:
+       if is_matrix(filename):
+          real, nr, nc, nnz, rval, col, rowstt = map_mat(filename)
+          h5.attrs['kind']  = 'matrix'
+          h5.attrs['shape'] = (nr, nc)
+          data    = h5.create_dataset('data',    (nnz,),  dtype='f8', chunks=True)
+          indices = h5.create_dataset('indices', (nnz,),  dtype='i8', chunks=True)
+          indptr  = h5.create_dataset('indptr',  (nr+1,), dtype='i8', chunks=True)
+          for i in range(0, nnz, chunk):
+             data[i:i+chunk]    = rval[i:i+chunk]
+             indices[i:i+chunk] = col[i:i+chunk]
+          for i in range(0, nr+1, chunk):
+             indptr[i:i+chunk]  = rowstt[i:i+chunk]
+       else:
+          nv, v = map_vec(filename)
+          h5.attrs['kind'] = 'vector'
+          vec = h5.create_dataset('vector', (nv,), dtype='f8', chunks=True)
+          for i in range(0, nv, chunk):
+             vec[i:i+chunk] = v[i:i+chunk]
+
+###########################################################
+#   write project binary file from array blocks           #
+###########################################################
+def write_bin_mat(ofile, nr, nc, nnz, vals, cols, rowlens):
+
+#   bool real flag, int64 nrow, ncol, nnz then values, columns and row starts,
+#   vals and cols are iterators over blocks, rowlens over blocks of row lengths
+    with open(ofile, 'wb') as fp:
+       np.array([True], dtype=np.bool_).tofile(fp)
+       np.array([nr, nc, nnz], dtype=np.int64).tofile(fp)
+       for v in vals: np.asarray(v, dtype=np.double).tofile(fp)
+       for c in cols: np.asarray(c, dtype=np.int64).tofile(fp)
+       start = 0
+       np.array([0], dtype=np.int64).tofile(fp)
+       for r in rowlens:
+          rs = start + np.cumsum(r, dtype=np.int64)
+          rs.tofile(fp)
+          if len(rs): start = int(rs[-1])
+
+def write_bin_vec(ofile, nv, blocks):
+    with open(ofile, 'wb') as fp:
+       np.array([nv], dtype=np.int64).tofile(fp)
+       for v in blocks: np.asarray(v, dtype=np.double).tofile(fp)
+
+###########################################################
+#   convert Matrix Market, PETSc or HDF5 back to binary   #
+###########################################################
+def write_bin(filename, ofile, chunk):
+
+    blocks = lambda a, n: (a[i:i+chunk] for i in range(0, n, chunk))
+
+    if filename.endswith('.petsc'):
+       cid = int(np.fromfile(filename, dtype='>i4', count=1)[0])
+       if cid == MAT_CLASSID:
+          nr, nc, nnz = (int(n) for n in np.fromfile(filename, dtype='>i4', count=3, offset=4))
+          lens = np.memmap(filename, dtype='>i4', mode='r', offset=16, shape=(nr,))
+          cols = np.memmap(filename, dtype='>i4', mode='r', offset=16 + 4*nr, shape=(nnz,))
+          vals = np.memmap(filename, dtype='>f8', mode='r', offset=16 + 4*nr + 4*nnz, shape=(nnz,))
+          write_bin_mat(ofile, nr, nc, nnz, blocks(vals, nnz), blocks(cols, nnz), blocks(lens, nr))
+       elif cid == VEC_CLASSID:
+          nv = int(np.fromfile(filename, dtype='>i4', count=1, offset=4)[0])
+          v  = np.memmap(filename, dtype='>f8', mode='r', offset=8, shape=(nv,))
+          write_bin_vec(ofile, nv, blocks(v, nv))
+       else:
+          raise ValueError('not a PETSc matrix or vector file')
+
+    elif filename.endswith('.h5'):
+       with h5py.File(filename, 'r') as h5:
+          if h5.attrs['kind'] == 'matrix':
+             nr, nc = (int(n) for n in h5.attrs['shape'])
+             nnz = h5['data'].shape[0]
+             ptr = h5['indptr']
+             lens = (np.diff(ptr[i:min(i+chunk, nr)+1]) for i in range(0, nr, chunk))
+             write_bin_mat(ofile, nr, nc, nnz, blocks(h5['data'], nnz), blocks(h5['indices'], nnz), lens)
+          else:
+             nv = h5['vector'].shape[0]
+             write_bin_vec(ofile, nv, blocks(h5['vector'], nv))
+
+    elif filename.endswith('.mtx'):
+       read_mtx(filename, ofile, chunk)
+    else:
+       raise ValueError('unknown input format, use .mtx, .petsc or .h5')
+
+###########################################################
+#   Matrix Market to binary, read in blocks of lines      #
+###########################################################
+def read_mtx(filename, ofile, chunk):
+
+    with open(filename) as fp:
+       banner = fp.readline().lower().split()
+       line = fp.readline()
+       while line.startswith('%'): line = fp.readline()
+       dims  = [int(d) for d in line.split()]
+       start = fp.tell()
+
+       def lines():
+          while True:
+             block = [l for l in (fp.readline() for i in range(chunk)) if l.strip()]
+             if not block: return
+             yield np.loadtxt(block, ndmin=2)
+
+       if banner[2] == 'array':
+          write_bin_vec(ofile, dims[0], (b[:, 0] for b in lines()))
+          return
+
+#      general files written row by row, e.g. by this script, stream straight into the output
+       nr, nc, nnz = dims
+       if banner[4] == 'general' and stream_mtx(lines(), ofile, nr, nc, nnz):
+          return
+
+#      otherwise entries are sorted by row, symmetric files store one triangle
+       fp.seek(start)
+       ent  = np.concatenate(list(lines()))
+       rows = ent[:, 0].astype(np.int64) - 1
+       cols = ent[:, 1].astype(np.int64) - 1
+       vals = ent[:, 2] if ent.shape[1] > 2 else np.ones(len(ent))
+       if banner[4] in ('symmetric', 'skew-symmetric'):
+          off  = rows != cols
+          sign = -1.0 if banner[4] == 'skew-symmetric' else 1.0
+          rows, cols, vals = (np.concatenate((rows, cols[off])), np.concatenate((cols, rows[off])),
+                              np.concatenate((vals, sign*vals[off])))
+       order = np.lexsort((cols, rows))
+       lens  = np.bincount(rows, minlength=nr)
+       write_bin_mat(ofile, nr, nc, len(order), [vals[order]], [cols[order]], [lens])
+
+###########################################################
+#   stream row ordered entries into mapped binary file    #
+###########################################################
+def stream_mtx(blocks, ofile, nr, nc, nnz):
+
+#   the file size is known from the header so each section is filled in place
+    with open(ofile, 'wb') as fp:
+       np.array([True], dtype=np.bool_).tofile(fp)
+       np.array([nr, nc, nnz], dtype=np.int64).tofile(fp)
+       fp.truncate(25 + 16*nnz + 8*(nr+1))
+    vals   = np.memmap(ofile, dtype=np.double, mode='r+', offset=25, shape=(nnz,))
+    cols   = np.memmap(ofile, dtype=np.int64,  mode='r+', offset=25 + 8*nnz, shape=(nnz,))
+    rowstt = np.memmap(ofile, dtype=np.int64,  mode='r+', offset=25 + 16*nnz, shape=(nr+1,))
+
+    lens = np.zeros(nr, dtype=np.int64)
+    pos  = 0
+    last = 0
+    for b in blocks:
+       r = b[:, 0].astype(np.int64) - 1
+       if r[0] < last or np.any(np.diff(r) < 0) or pos + len(b) > nnz: return False
+       vals[pos:pos+len(b)] = b[:, 2] if b.shape[1] > 2 else 1.0
+       cols[pos:pos+len(b)] = b[:, 1].astype(np.int64) - 1
+       lens[r[0]:r[-1]+1] += np.bincount(r - r[0])
+       pos += len(b)
+       last = r[-1]
+    if pos != nnz: return False
+
+    rowstt[0] = 0
+    np.cumsum(lens, out=rowstt[1:])
+    for m in (vals, cols, rowstt): m.flush()
+    return True
+
+###########################################################
+#   convert one file                                      #
+###########################################################
+def convert(task):
+
+    filename, fmt, ofile, chunk = task
+    write = {'mtx': write_mtx, 'petsc': write_petsc, 'h5': write_h5, 'bin': write_bin}[fmt]
+    try:
+       write(filename, ofile, chunk)
+    except Exception as e:
+       return filename, ofile, str(e)
+    return filename, ofile, ''
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def main(argv):
+
+    fmt, odir, nproc, chunk, files = read_args(argv)
+    if not files:
+       print('\nno files to convert, use convert-mat.py -h for help\n')
+       sys.exit(3)
+    if odir: os.makedirs(odir, exist_ok=True)
+
+#   largest files first so the pool is not left waiting on one long conversion
+    files = sorted(files, key=lambda f: -os.path.getsize(f))
+    tasks = [(f, fmt, out_name(f, fmt, odir), chunk) for f in files]
+
+    if nproc <= 0: nproc = os.cpu_count() or 1
+    nproc = min(nproc, len(tasks))
+    if nproc > 1:
+       with Pool(nproc) as pool:
+          results = list(pool.imap_unordered(convert, tasks))
+    else:
+       results = [convert(t) for t in tasks]
+
+    failed = 0
+    for filename, ofile, err in results:
+       if err:
+          failed += 1
+          print('failed to convert', filename + ':', err)
+       else:
+          print('converted', filename, 'to', ofile)
+    if failed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
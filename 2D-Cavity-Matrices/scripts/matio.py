@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import numpy as np
+
+###########################################################
+#   memory map vector file                                #
+###########################################################
+def map_vec(filename):
+
+#   int64 length followed by double values
+    nv = int(np.fromfile(filename, dtype=np.int64, count=1)[0])
+    v  = np.memmap(filename, dtype=np.double, mode='r', offset=8, shape=(nv,))
+
+    return nv, v
+
+###########################################################
+#   memory map matrix file                                #
+###########################################################
+def map_mat(filename):
+
+#   bool real flag, int64 nrow, ncol, nnz then values, columns and row starts
+    real = np.fromfile(filename, dtype=np.bool_, count=1)[0]
+    dims = np.memmap(filename, dtype=np.int64, mode='r', offset=1, shape=(3,))
+    nr, nc, nnz = (int(d) for d in dims)
+
+    off  = 25
+    rval = np.memmap(filename, dtype=np.double, mode='r', offset=off, shape=(nnz,))
+    off += 8*nnz
+    col  = np.memmap(filename, dtype=np.int64, mode='r', offset=off, shape=(nnz,))
+    off += 8*nnz
+    rowstt = np.memmap(filename, dtype=np.int64, mode='r', offset=off, shape=(nr+1,))
+
+    return real, nr, nc, nnz, rval, col, rowstt
+
+###########################################################
+#   write vector file                                     #
+###########################################################
+def save_vec(filename, v):
+
+    with open(filename, "wb") as fp:
+       np.array([len(v)], dtype=np.int64).tofile(fp)
+       np.asarray(v, dtype=np.double).tofile(fp)
+
+###########################################################
+#   write CSR matrix file                                 #
+###########################################################
+def save_mat(filename, a):
+
+    with open(filename, "wb") as fp:
+       np.array([True], dtype=np.bool_).tofile(fp)
+       np.array([a.shape[0], a.shape[1], a.nnz], dtype=np.int64).tofile(fp)
+       np.asarray(a.data, dtype=np.double).tofile(fp)
+       np.asarray(a.indices, dtype=np.int64).tofile(fp)
+       np.asarray(a.indptr, dtype=np.int64).tofile(fp)
+
+###########################################################
+#   split rows into blocks of roughly chunk non-zeros     #
+###########################################################
+def row_blocks(rowstt, chunk):
+
+    nr = len(rowstt) - 1
+    ra = 0
+    while ra < nr:
+       rb = int(np.searchsorted(rowstt, rowstt[ra] + chunk, side='right')) - 1
+       rb = min(max(rb, ra+1), nr)
+       yield ra, rb
+       ra = rb
+
+###########################################################
+#   content hash of file                                  #
+###########################################################
+def file_hash(filename):
+    h = hashlib.sha256()
+    with open(filename, "rb") as fp:
+       for block in iter(lambda: fp.read(1<<24), b''):
+          h.update(block)
+    return h.hexdigest()
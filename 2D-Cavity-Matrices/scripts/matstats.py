@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import numpy as np
+
+from matio import map_mat, map_vec, row_blocks
+
+#   default number of non-zeros processed per block
+CHUNK = 1<<22
+
+###########################################################
+#   summary statistics of vector file                     #
+###########################################################
+def vec_summary(filename, chunk=CHUNK):
+
+    nv, v = map_vec(filename)
+
+    vmin  =  np.inf
+    vmax  = -np.inf
+    amax  = 0.0
+    s1    = 0.0
+    s2    = 0.0
+    nzero = 0
+    for i in range(0, nv, chunk):
+       c = np.asarray(v[i:i+chunk])
+       vmin   = min(vmin, c.min())
+       vmax   = max(vmax, c.max())
+       amax   = max(amax, np.abs(c).max())
+       s1    += c.sum()
+       s2    += np.dot(c, c)
+       nzero += int(np.count_nonzero(c == 0))
+
+    mean = s1/nv if nv else 0.0
+    return {'file': filename, 'n': nv,
+            'min': float(vmin), 'max': float(vmax), 'mean': float(mean),
+            'std': float(np.sqrt(max(s2/nv - mean*mean, 0.0))) if nv else 0.0,
+            'norm2': float(np.sqrt(s2)), 'normmax': float(amax), 'zeros': nzero}
+
+###########################################################
+#   summary statistics of matrix file in a single pass    #
+###########################################################
+def mat_summary(filename, chunk=CHUNK):
+
+    real, nr, nc, nnz, rval, col, rowstt = map_mat(filename)
+    square = nr == nc
+
+    hist   = {}
+    stored = 0
+    blow   = 0
+    bupp   = 0
+    dmin   =  np.inf
+    dmax   = -np.inf
+    dzero  = 0
+    weak   = 0
+    strict = 0
+    ratio  = np.inf
+    frob2  = 0.0
+    amax   = 0.0
+    ninf   = 0.0
+    csum   = np.zeros(nc)
+
+#   upper entries waiting for their transpose, keyed on the transposed position
+    sym2   = 0.0
+    pkey   = np.zeros(0, dtype=np.int64)
+    pval   = np.zeros(0)
+
+    for ra, rb in row_blocks(rowstt, chunk):
+       pa   = int(rowstt[ra])
+       pb   = int(rowstt[rb])
+       rnnz = np.diff(np.asarray(rowstt[ra:rb+1]))
+       rows = np.repeat(np.arange(ra, rb, dtype=np.int64), rnnz)
+       cols = np.asarray(col[pa:pb])
+       vals = np.asarray(rval[pa:pb])
+       avals = np.abs(vals)
+
+#      row counts and bandwidth
+       k, c = np.unique(rnnz, return_counts=True)
+       for kk, cc in zip(k.tolist(), c.tolist()): hist[kk] = hist.get(kk, 0) + cc
+       stored += int(np.count_nonzero(vals == 0))
+       if pb > pa:
+          blow = max(blow, int((rows - cols).max()))
+          bupp = max(bupp, int((cols - rows).max()))
+
+#      norms
+       frob2 += np.dot(vals, vals)
+       if pb > pa: amax = max(amax, avals.max())
+       rsum = np.bincount(rows - ra, weights=avals, minlength=rb-ra)
+       ninf = max(ninf, rsum.max())
+       csum += np.bincount(cols, weights=avals, minlength=nc)
+
+#      diagonal and diagonal dominance
+       isd  = rows == cols
+       diag = np.zeros(rb-ra)
+       diag[rows[isd] - ra] = vals[isd]
+       if square:
+          dmin   = min(dmin, diag.min())
+          dmax   = max(dmax, diag.max())
+          dzero += int(np.count_nonzero(diag == 0))
+          adiag  = np.abs(diag)
+          off    = rsum - adiag
+          weak  += int(np.count_nonzero(adiag >= off))
+          strict+= int(np.count_nonzero(adiag >  off))
+          with np.errstate(divide='ignore', invalid='ignore'):
+             r = np.where(off > 0, adiag/off, np.inf)
+          ratio  = min(ratio, r.min())
+
+#      symmetry defect ||A-A^T||_F, pairs are matched as the lower entry is reached
+       if square:
+          up = cols > rows
+          lo = cols < rows
+          nkey = cols[up]*nr + rows[up]
+          order = np.argsort(np.concatenate((pkey, nkey)), kind='stable')
+          pkey  = np.concatenate((pkey, nkey))[order]
+          pval  = np.concatenate((pval, vals[up]))[order]
+
+          lkey = rows[lo]*nr + cols[lo]
+          lval = vals[lo]
+          idx  = np.searchsorted(pkey, lkey)
+          idx  = np.minimum(idx, max(len(pkey)-1, 0))
+          hit  = (pkey[idx] == lkey) if len(pkey) else np.zeros(len(lkey), dtype=bool)
+          sym2 += 2*np.sum((lval[hit] - pval[idx[hit]])**2) + 2*np.sum(lval[~hit]**2)
+
+          keep = np.ones(len(pkey), dtype=bool)
+          keep[idx[hit]] = False
+          done = keep & (pkey//nr < rb)
+          sym2 += 2*np.sum(pval[done]**2)
+          keep &= ~done
+          pkey = pkey[keep]
+          pval = pval[keep]
+
+    rows_nnz = np.array(sorted(hist.items()), dtype=np.int64).reshape(-1, 2)
+    mean = nnz/nr if nr else 0.0
+    frob = float(np.sqrt(frob2))
+
+    summ = {'file': filename, 'real': bool(real), 'nrow': nr, 'ncol': nc, 'nnz': nnz,
+            'stored_zeros': stored,
+            'row_nnz': {'min': int(rows_nnz[0, 0]) if nr else 0,
+                        'max': int(rows_nnz[-1, 0]) if nr else 0,
+                        'mean': float(mean),
+                        'hist': {str(k): int(c) for k, c in rows_nnz}},
+            'bandwidth': {'lower': blow, 'upper': bupp},
+            'norms': {'frobenius': frob, 'max': float(amax),
+                      'one': float(csum.max()) if nc else 0.0, 'inf': float(ninf)}}
+
+    if square:
+       summ['diagonal'] = {'min': float(dmin), 'max': float(dmax), 'zeros': dzero}
+       summ['dominance'] = {'weak_rows': weak, 'strict_rows': strict, 'min_ratio': float(ratio)}
+       summ['symmetry'] = {'defect': float(np.sqrt(sym2)),
+                           'relative': float(np.sqrt(sym2)/frob) if frob > 0 else 0.0}
+
+    return summ
+
+###########################################################
+#   residual ||Ax-b|| from matrix and vector files        #
+###########################################################
+def residual(mfile, bfile, xfile, chunk=CHUNK):
+
+    real, nr, nc, nnz, rval, col, rowstt = map_mat(mfile)
+    nb, b = map_vec(bfile)
+    nx, x = map_vec(xfile)
+    if nb != nr or nx != nc: return None
+
+    r2 = 0.0
+    b2 = 0.0
+    for ra, rb in row_blocks(rowstt, chunk):
+       pa   = int(rowstt[ra])
+       pb   = int(rowstt[rb])
+       rows = np.repeat(np.arange(rb-ra), np.diff(np.asarray(rowstt[ra:rb+1])))
+       ax   = np.bincount(rows, weights=np.asarray(rval[pa:pb])*x[np.asarray(col[pa:pb])],
+                          minlength=rb-ra)
+       bb   = np.asarray(b[ra:rb])
+       r2  += np.dot(ax - bb, ax - bb)
+       b2  += np.dot(bb, bb)
+
+    return {'norm2': float(np.sqrt(r2)),
+            'relative': float(np.sqrt(r2/b2)) if b2 > 0 else float(np.sqrt(r2))}
+
+###########################################################
+#   print compact summary report                          #
+###########################################################
+def print_summary(summ):
+
+    if 'matrix' in summ:
+       m = summ['matrix']
+       print('\nmatrix:', m['file'])
+       print('\tdimensions:        %d x %d' % (m['nrow'], m['ncol']))
+       print('\tnon-zeros:         %d (%d stored zeros)' % (m['nnz'], m['stored_zeros']))
+       r = m['row_nnz']
+       print('\tnon-zeros per row: min %d max %d mean %.2f' % (r['min'], r['max'], r['mean']))
+       print('\trow histogram:    ', ', '.join(k + ':' + str(v) for k, v in r['hist'].items()))
+       print('\tbandwidth:         lower %d upper %d' % (m['bandwidth']['lower'], m['bandwidth']['upper']))
+       n = m['norms']
+       print('\tnorms:             frobenius %.4e max %.4e one %.4e inf %.4e' %
+             (n['frobenius'], n['max'], n['one'], n['inf']))
+       if 'diagonal' in m:
+          d = m['diagonal']
+          print('\tdiagonal:          min %.4e max %.4e zeros %d' % (d['min'], d['max'], d['zeros']))
+          d = m['dominance']
+          print('\tdiag. dominance:   weak %d strict %d of %d rows, min ratio %.4e' %
+                (d['weak_rows'], d['strict_rows'], m['nrow'], d['min_ratio']))
+          d = m['symmetry']
+          print('\tsymmetry defect:   %.4e (relative %.4e)' % (d['defect'], d['relative']))
+
+    for key in ('rhs', 'sol'):
+       if key in summ:
+          v = summ[key]
+          print('\n' + key + ' vector:', v['file'])
+          print('\tlength:            %d (%d zeros)' % (v['n'], v['zeros']))
+          print('\trange:             min %.4e max %.4e' % (v['min'], v['max']))
+          print('\tmoments:           mean %.4e std %.4e' % (v['mean'], v['std']))
+          print('\tnorms:             two %.4e max %.4e' % (v['norm2'], v['normmax']))
+
+    if 'residual' in summ and summ['residual'] is not None:
+       r = summ['residual']
+       print('\nresidual ||Ax-b||:   %.4e (relative %.4e)' % (r['norm2'], r['relative']))
+    print()
+    return
@@ -14,11 +14,14 @@
 
 import sys, getopt
 import csv
+import json
 import numpy as np
 from scipy import sparse
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
 
+from matstats import mat_summary, vec_summary, residual, print_summary
+
 ###########################################################
 #   get command line arguments                            #
 ###########################################################
@@ -26,15 +29,24 @@ def read_args(argv):
     mfile = ''
     bfile = ''
     xfile = ''
+    jfile = ''
+    summ  = False
     try:
-       opts, args = getopt.getopt(argv,"hm:b:x:",["mfile=","bfile=","xfile="])
+       opts, args = getopt.getopt(argv,"hsm:b:x:j:",["mfile=","bfile=","xfile=","jfile="])
     except getopt.GetoptError:
-       print ('plot-mat.py -m <matfile> -b <rhsfile> -x <solfile>')
+       print ('plot-mat.py -m <matfile> -b <rhsfile> -x <solfile> {-s} {-j <jsonfile>}')
        sys.exit(2)
     for opt, arg in opts:
        if opt == '-h':
-          print ('plot-mat.py -m <matfile> -b <rhsfile> -x <solfile>')
+          print ('plot-mat.py -m <matfile> -b <rhsfile> -x <solfile> {-s} {-j <jsonfile>}')
+          print ('\t-s print summary statistics instead of plotting')
+          print ('\t-j write summary statistics to json file')
           sys.exit()
+       elif opt == '-s':
+          summ = True
+       elif opt in ("-j", "--jfile"):
+          jfile = arg
+          summ  = True
        elif opt in ("-m", "--mfile"):
           mfile = arg
        elif opt in ("-b", "--bfile"):
@@ -42,7 +54,7 @@ def read_args(argv):
        elif opt in ("-x", "--xfile"):
           xfile = arg
 
-    return mfile, bfile, xfile
+    return mfile, bfile, xfile, summ, jfile
 
 ###########################################################
 #   read vector file                                      #
@@ -57,8 +69,7 @@ def read_vec(filename):
     v  = np.fromfile(file, dtype=np.double)
     file.close()
 
-    print("vector:");
-    print(v)
+    print("vector:", filename, nv)
 
     return nv, v
 
@@ -79,17 +90,11 @@ def read_mat(filename):
     nr  = nrow[0]
     nc  = ncol[0]
     nnz = nonz[0]
-    print("matrix:")
-    print(real, nrow, ncol, nnz)
+    print("matrix:", filename, real, nrow, ncol, nnz)
 
     rval = np.fromfile(file, dtype=np.double, count=nnz)
-    print(rval)
-
     col  = np.fromfile(file, dtype=np.int64, count=nnz)
-    print(col)
-
     rowstt = np.fromfile(file, dtype=np.int64, count=nr+1)
-    print(rowstt)
 
     file.close()
 
@@ -107,7 +112,23 @@ def main(argv):
     nx = 0
 
 #   get filenames
-    mfile, bfile, xfile = read_args(argv)
+    mfile, bfile, xfile, summ, jfile = read_args(argv)
+
+#   summary statistics from a single chunked pass over memory mapped files
+    if summ:
+       stats = {}
+       if(mfile): stats['matrix'] = mat_summary(mfile)
+       if(bfile): stats['rhs'] = vec_summary(bfile)
+       if(xfile): stats['sol'] = vec_summary(xfile)
+       if(mfile and bfile and xfile): stats['residual'] = residual(mfile, bfile, xfile)
+
+       if jfile:
+          print('writing summary to json file:', jfile)
+          with open(jfile, 'w') as fp:
+             json.dump(stats, fp, indent=2)
+       else:
+          print_summary(stats)
+       return
 
 #   read vectors
     if(bfile): nb, b = read_vec(bfile)
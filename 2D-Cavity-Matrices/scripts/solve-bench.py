@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import os, sys, getopt
+import re
+import csv
+import time
+import warnings
+import numpy as np
+from multiprocessing import Pool
+from scipy import sparse
+from scipy.sparse.linalg import spsolve, splu, spilu, cg, bicgstab, gmres, LinearOperator
+
+from matio import map_mat, map_vec
+
+try:
+    import pyamg
+except ImportError:
+    pyamg = None
+
+SOLVERS = ('direct', 'mixed', 'cg', 'bicgstab', 'gmres')
+PRECS   = ('none', 'ilu', 'amg')
+
+#   GMRES restart length, maxiter counts inner iterations for all solvers
+RESTART = 30
+
+###########################################################
+#   get command line arguments                            #
+###########################################################
+def read_args(argv):
+    ddir  = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    ofile = 'solve-bench.csv'
+    slist = 'direct,bicgstab+ilu,gmres+ilu,gmres+amg'
+    tol   = 1e-8
+    maxit = 1000
+    nproc = 0
+    iters = ''
+    usage = 'solve-bench.py {-d <datadir>} {-o <file.csv>} {-s <solver+prec,...>} {-t <tol>} {-m <maxiter>} {-n <nproc>} {-i <iter>}'
+    try:
+       opts, args = getopt.getopt(argv,"hd:o:s:t:m:n:i:",["ddir=","ofile=","solvers=","tol=","maxiter=","nproc=","iter="])
+    except getopt.GetoptError:
+       print (usage)
+       sys.exit(2)
+    for opt, arg in opts:
+       if opt == '-h':
+          print (usage)
+          print ('\t-d data directory containing orig, symm and orig-large, default ../data')
+          print ('\t-o results csv file, default solve-bench.csv')
+          print ('\t-s comma separated solvers', '|'.join(SOLVERS), 'each with optional +' + '|+'.join(PRECS))
+          print ('\t   default', slist)
+          print ('\t-t relative residual tolerance of iterative solvers, default 1e-8')
+          print ('\t-m maximum number of iterations, GMRES counts inner iterations, default 1000')
+          print ('\t-n number of worker processes, default number of cores, use 1 for clean timings')
+          print ('\t-i only include matrices sampled at this iteration')
+          sys.exit()
+       elif opt in ("-d", "--ddir"):
+          ddir = arg
+       elif opt in ("-o", "--ofile"):
+          ofile = arg
+       elif opt in ("-s", "--solvers"):
+          slist = arg
+       elif opt in ("-t", "--tol"):
+          tol = float(arg)
+       elif opt in ("-m", "--maxiter"):
+          maxit = int(arg)
+       elif opt in ("-n", "--nproc"):
+          nproc = int(arg)
+       elif opt in ("-i", "--iter"):
+          iters = arg
+
+    solvers = []
+    for s in slist.split(','):
+       name, _, prec = s.strip().partition('+')
+       prec = prec or 'none'
+       if name not in SOLVERS or prec not in PRECS:
+          print('\nunknown solver', s, 'use', '|'.join(SOLVERS), 'with optional +' + '|+'.join(PRECS), '\n')
+          sys.exit(2)
+       solvers.append((name, prec))
+
+    return ddir, ofile, solvers, tol, maxit, nproc, iters
+
+###########################################################
+#   find matrix, rhs and solution triples                 #
+###########################################################
+def find_cases(ddir, iters):
+
+    pattern = re.compile(r'(sym_)?cavity-pc-(\d+)x(\d+)-i(\d+)\.mat$')
+    cases = []
+    for sub in ('orig', 'symm', 'orig-large'):
+       path = os.path.join(ddir, sub)
+       if not os.path.isdir(path): continue
+       for f in os.listdir(path):
+          m = pattern.match(f)
+          if m is None: continue
+          if iters and m.group(4) != iters: continue
+          root = os.path.join(path, f[:-4])
+          if not (os.path.isfile(root + '.rhs') and os.path.isfile(root + '.sol')): continue
+          cases.append({'set': sub, 'case': f[:-4], 'root': root,
+                        'mesh': int(m.group(2)), 'iter': int(m.group(4))})
+
+    cases.sort(key=lambda d: (d['set'], d['iter'], d['mesh']))
+    return cases
+
+###########################################################
+#   build preconditioner as a linear operator             #
+###########################################################
+def precon(A, prec):
+
+    if prec == 'ilu':
+       ilu = spilu(A.tocsc(), drop_tol=1e-4, fill_factor=10)
+       return LinearOperator(A.shape, ilu.solve)
+    if prec == 'amg':
+       ml = pyamg.smoothed_aggregation_solver(A, symmetry='nonsymmetric')
+       return ml.aspreconditioner(cycle='V')
+    return None
+
+###########################################################
+#   float64 iterative refinement on float32 LU factors    #
+###########################################################
+def refine(L, lu, b, tol, maxit):
+
+    x  = lu.solve(b.astype(np.float32)).astype(np.float64)
+    bn = max(np.linalg.norm(b), 1e-300)
+    for its in range(maxit):
+       r  = b - L @ x
+       rn = np.linalg.norm(r)
+       if not np.isfinite(rn): return x, -1
+       if rn <= tol*bn: return x, 0
+       x = x + rn*lu.solve((r/rn).astype(np.float32)).astype(np.float64)
+    return x, maxit
+
+###########################################################
+#   run one solver on one case                            #
+###########################################################
+def run(task):
+
+    case, name, prec, tol, maxit = task
+    res = {'set': case['set'], 'case': case['case'], 'solver': name, 'prec': prec,
+           'nrow': 0, 'nnz': 0, 'status': '', 'setup_time': '', 'solve_time': '',
+           'matvecs': '', 'residual': '', 'error': ''}
+
+    real, nr, nc, nnz, rval, col, rowstt = map_mat(case['root'] + '.mat')
+    A = sparse.csr_matrix((np.array(rval), np.array(col), np.array(rowstt)), shape=(nr, nc))
+    b = np.array(map_vec(case['root'] + '.rhs')[1])
+    x = np.array(map_vec(case['root'] + '.sol')[1])
+    res['nrow'], res['nnz'] = nr, nnz
+
+    if prec == 'amg' and pyamg is None:
+       res['status'] = 'skipped, pyamg not installed'
+       return res
+
+#   count matrix vector products, the callbacks are not called on every exit path
+    nmv = [0]
+    def matvec(v):
+       nmv[0] += 1
+       return A @ v
+    L = LinearOperator(A.shape, matvec=matvec, dtype=A.dtype)
+
+    try:
+       with warnings.catch_warnings():
+          warnings.simplefilter('ignore', RuntimeWarning)
+          t0 = time.perf_counter()
+          M  = precon(A, prec)
+          if name == 'mixed': M = splu(A.tocsc().astype(np.float32))
+          t1 = time.perf_counter()
+          if name == 'direct':
+             s, info = spsolve(A.tocsc(), b), 0
+          elif name == 'mixed':
+             s, info = refine(L, M, b, tol, maxit)
+          elif name == 'cg':
+             s, info = cg(L, b, rtol=tol, maxiter=maxit, M=M)
+          elif name == 'bicgstab':
+             s, info = bicgstab(L, b, rtol=tol, maxiter=maxit, M=M)
+          elif name == 'gmres':
+             s, info = gmres(L, b, rtol=tol, restart=RESTART, maxiter=-(-maxit//RESTART), M=M)
+          t2 = time.perf_counter()
+    except Exception as e:
+       res['status'] = 'failed, ' + str(e).replace('\n', ' ')
+       return res
+
+    r = np.linalg.norm(b - A @ s)/max(np.linalg.norm(b), 1e-300)
+    if not np.isfinite(r) or info < 0:
+       res['status'] = 'breakdown'
+    else:
+       res['status'] = 'converged' if info == 0 else 'maxiter'
+    res['setup_time'] = t1 - t0
+    res['solve_time'] = t2 - t1
+    res['matvecs']    = nmv[0]
+    res['residual']   = r
+    res['error']      = np.linalg.norm(s - x)/max(np.linalg.norm(x), 1e-300)
+    return res
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def main(argv):
+
+    ddir, ofile, solvers, tol, maxit, nproc, iters = read_args(argv)
+
+    cases = find_cases(ddir, iters)
+    if not cases:
+       print('\nno matrix, rhs and solution files found in', ddir, '\n')
+       sys.exit(3)
+    if pyamg is None and any(p == 'amg' for n, p in solvers):
+       print('pyamg is not installed, amg preconditioned runs will be skipped')
+
+#   largest cases first so the pool is not left waiting on one long run at the end
+    tasks = [(c, n, p, tol, maxit) for c in cases for n, p in solvers]
+    tasks.sort(key=lambda t: -t[0]['mesh'])
+    print('running', len(tasks), 'solves on', len(cases), 'cases')
+
+    if nproc <= 0: nproc = os.cpu_count() or 1
+    nproc = min(nproc, len(tasks))
+    if nproc > 1:
+       with Pool(nproc) as pool:
+          results = pool.map(run, tasks, chunksize=1)
+    else:
+       results = [run(t) for t in tasks]
+
+    results.sort(key=lambda r: (r['set'], r['nrow'], r['case'], r['solver'], r['prec']))
+    head = ['set', 'case', 'nrow', 'nnz', 'solver', 'prec', 'status',
+            'setup_time', 'solve_time', 'matvecs', 'residual', 'error']
+    print('writing results to csv file:', ofile)
+    with open(ofile, 'w', newline='') as fp:
+       w = csv.DictWriter(fp, fieldnames=head)
+       w.writeheader()
+       w.writerows(results)
+
+    for r in results:
+       print('%-10s %-24s %-8s %-5s %-10s %10s %6s %10s' %
+             (r['set'], r['case'], r['solver'], r['prec'], r['status'][:10],
+              '%.3g' % r['solve_time'] if r['solve_time'] != '' else '-',
+              r['matvecs'], '%.2e' % r['error'] if r['error'] != '' else '-'))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,221 @@
+#!/usr/bin/python3
+
+# Copyright 2022 Rolls-Royce plc
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import os, sys, getopt
+import re
+import csv
+import json
+import numpy as np
+from multiprocessing import Pool
+from scipy import sparse
+from scipy.sparse.linalg import eigsh
+
+from matio import map_mat, file_hash
+
+#   matrices up to this size use dense eigensolvers
+NDENSE = 512
+
+#   version of the cached results, bump if the calculation changes
+VERSION = 1
+
+###########################################################
+#   get command line arguments                            #
+###########################################################
+def read_args(argv):
+    ddir  = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    ofile = ''
+    cfile = 'spectral-cache.json'
+    nproc = 0
+    iters = ''
+    usage = 'spectral-table.py {-d <datadir>} {-o <file.md|file.csv>} {-c <cachefile>} {-n <nproc>} {-i <iter>}'
+    try:
+       opts, args = getopt.getopt(argv,"hd:o:c:n:i:",["ddir=","ofile=","cfile=","nproc=","iter="])
+    except getopt.GetoptError:
+       print (usage)
+       sys.exit(2)
+    for opt, arg in opts:
+       if opt == '-h':
+          print (usage)
+          print ('\t-d data directory containing orig, symm and orig-large, default ../data')
+          print ('\t-o output file, markdown or csv by extension, default markdown to screen')
+          print ('\t-c cache file of results keyed on file content, default spectral-cache.json')
+          print ('\t-n number of worker processes, default number of cores')
+          print ('\t-i only include matrices sampled at this iteration')
+          sys.exit()
+       elif opt in ("-d", "--ddir"):
+          ddir = arg
+       elif opt in ("-o", "--ofile"):
+          ofile = arg
+       elif opt in ("-c", "--cfile"):
+          cfile = arg
+       elif opt in ("-n", "--nproc"):
+          nproc = int(arg)
+       elif opt in ("-i", "--iter"):
+          iters = arg
+
+    return ddir, ofile, cfile, nproc, iters
+
+###########################################################
+#   find matrix files                                     #
+###########################################################
+def find_mats(ddir, iters):
+
+    pattern = re.compile(r'(sym_)?cavity-pc-(\d+)x(\d+)-i(\d+)\.mat$')
+    mats = []
+    for sub in ('orig', 'symm', 'orig-large'):
+       path = os.path.join(ddir, sub)
+       if not os.path.isdir(path): continue
+       for f in os.listdir(path):
+          m = pattern.match(f)
+          if m is None: continue
+          if iters and m.group(4) != iters: continue
+          mats.append({'set': sub, 'file': os.path.join(path, f),
+                       'mesh': int(m.group(2)), 'iter': int(m.group(4))})
+
+    mats.sort(key=lambda d: (d['set'], d['iter'], d['mesh']))
+    return mats
+
+###########################################################
+#   extreme absolute eigenvalues of Hermitian matrix      #
+###########################################################
+def extreme_evals(H):
+
+    n = H.shape[0]
+    if n <= NDENSE:
+       ev = np.abs(np.linalg.eigvalsh(H.toarray()))
+       return ev.min(), ev.max()
+
+#   largest by Lanczos, smallest by shift-invert about zero
+    emax = np.abs(eigsh(H, k=1, which='LM', return_eigenvectors=False))[0]
+    emin = np.abs(eigsh(H.tocsc(), k=1, sigma=0, which='LM', return_eigenvectors=False))[0]
+    return emin, emax
+
+###########################################################
+#   HHL logical qubits: b register, clock and ancillas    #
+###########################################################
+def hhl_qubits(n, emin, emax):
+
+#   clock covers emax down to emin, plus sign bit of the clock and one ancilla
+    nb = int(np.ceil(np.log2(n)))
+    nc = max(0, int(np.ceil(np.log2(emax)))) + int(np.ceil(np.log2(1.0/emin)))
+    return nb + nc + 2
+
+###########################################################
+#   spectral data of one matrix file                      #
+###########################################################
+def spectrum(filename):
+
+    real, nr, nc, nnz, rval, col, rowstt = map_mat(filename)
+    A = sparse.csr_matrix((np.array(rval), np.array(col), np.array(rowstt)), shape=(nr, nc))
+    A.eliminate_zeros()
+
+#   non-symmetric matrices are embedded as [[0, A], [A^T, 0]] whose eigenvalues are +/- sigma(A)
+    D = A - A.T
+    symm = D.nnz == 0 or abs(D).max() <= 1e-14*abs(A).max()
+    H = A if symm else sparse.bmat([[None, A], [A.T, None]], format='csr')
+
+    emin, emax = extreme_evals(H)
+    return {'version': VERSION, 'nrow': nr, 'nnz': nnz, 'symmetric': bool(symm),
+            'nherm': H.shape[0], 'lmin': float(emin), 'lmax': float(emax),
+            'kappa': float(emax/emin), 'qubits': hhl_qubits(H.shape[0], emin, emax)}
+
+def spectrum_task(task):
+    key, filename = task
+    return key, spectrum(filename)
+
+###########################################################
+#   write table as markdown or csv                        #
+###########################################################
+def write_table(rows, ofile):
+
+    head = ['Set', 'Iter', 'CFD Mesh', 'PC Matrix', '#non-zeros', 'sparsity',
+            'lambda_min', 'lambda_max', 'kappa', '#HHL qubits']
+
+    if ofile.endswith('.csv'):
+       print('writing spectral table to csv file:', ofile)
+       with open(ofile, 'w', newline='') as fp:
+          w = csv.writer(fp)
+          w.writerow(head)
+          for r in rows:
+             w.writerow([r['set'], r['iter'], '%dx%d' % (r['mesh']+1, r['mesh']+1),
+                         '%dx%d' % (r['nrow'], r['nrow']), r['nnz'],
+                         r['nnz']/r['nrow']**2, r['lmin'], r['lmax'], r['kappa'], r['qubits']])
+       return
+
+    lines = ['| Set | Iter | CFD Mesh | PC Matrix | #non-zeros | sparsity | $\\lambda$<sub>min</sub> '
+             '| $\\lambda$<sub>max</sub> | $\\kappa$ | #HHL qubits |',
+             '| :--: ' * 10 + '|']
+    for r in rows:
+       lines.append('| %s | %d | %dx%d | {:,}x{:,} | {:,} | %.2f%% | %.1E | %.3g | %.1E | %d |'
+                    .format(r['nrow'], r['nrow'], r['nnz']) %
+                    (r['set'], r['iter'], r['mesh']+1, r['mesh']+1,
+                     100.0*r['nnz']/r['nrow']**2, r['lmin'], r['lmax'], r['kappa'], r['qubits']))
+    text = '\n'.join(lines) + '\n'
+
+    if ofile:
+       print('writing spectral table to markdown file:', ofile)
+       with open(ofile, 'w') as fp:
+          fp.write(text)
+    else:
+       print('\n' + text)
+    return
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def main(argv):
+
+    ddir, ofile, cfile, nproc, iters = read_args(argv)
+
+    mats = find_mats(ddir, iters)
+    if not mats:
+       print('\nno matrix files found in', ddir, '\n')
+       sys.exit(3)
+
+#   cached results are keyed on file content so renamed or moved files are reused
+    cache = {}
+    if cfile and os.path.isfile(cfile):
+       with open(cfile) as fp:
+          cache = json.load(fp)
+
+    todo = {}
+    for m in mats:
+       m['key'] = file_hash(m['file'])
+       if cache.get(m['key'], {}).get('version') != VERSION: todo[m['key']] = m['file']
+    todo = sorted(todo.items())
+
+    if todo:
+       print('computing spectra of', len(todo), 'of', len(mats), 'matrices')
+       if nproc <= 0: nproc = os.cpu_count() or 1
+       nproc = min(nproc, len(todo))
+       if nproc > 1:
+          with Pool(nproc) as pool:
+             for key, res in pool.imap_unordered(spectrum_task, todo):
+                cache[key] = res
+       else:
+          for t in todo:
+             key, res = spectrum_task(t)
+             cache[key] = res
+
+       if cfile:
+          with open(cfile, 'w') as fp:
+             json.dump(cache, fp, indent=1)
+
+    rows = [dict(m, **cache[m['key']]) for m in mats]
+    write_table(rows, ofile)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
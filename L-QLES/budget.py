@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import sys
+import numpy as np
+
+from plot import NBIN_MAX
+
+#   rough costs measured on a single core, only the order of magnitude matters
+UNITS = {'k': 2**10, 'm': 2**20, 'g': 2**30, 't': 2**40}
+NSLOT = 7
+
+#   export options in the order l-qles runs them, their arrays are kept until the writers finish
+EXPORTS = ('herm', 'part', 'pauli', 'dia', 'ell', 'qtt', 'prep')
+
+###########################################################
+#   parse memory size such as 512M or 8G                  #
+###########################################################
+def parse_mem(text):
+
+    text = text.strip().lower().rstrip('b')
+    scale = 1
+    if text and text[-1] in UNITS:
+       scale = UNITS[text[-1]]
+       text  = text[:-1]
+    try:
+       return int(float(text)*scale)
+    except ValueError:
+       return None
+
+###########################################################
+#   human readable memory and time                        #
+###########################################################
+def fmt_mem(nbytes):
+    for unit in ('B', 'kB', 'MB', 'GB', 'TB'):
+       if nbytes < 1024 or unit == 'TB': break
+       nbytes /= 1024
+    return '%.1f %s' % (nbytes, unit)
+
+def fmt_time(secs):
+    if secs < 60:   return '%.2g s' % secs
+    if secs < 3600: return '%.1f min' % (secs/60)
+    return '%.1f h' % (secs/3600)
+
+###########################################################
+#   non-zeros in the LU factors and time to compute them  #
+###########################################################
+def lu_fill(n, ndims):
+    if ndims == 1: return 4*n
+    if ndims == 2: return 6*n*np.log2(max(n, 2))
+    return 1.2*n**(5/3)
+
+def lu_time(n, ndims):
+    if ndims == 1: return 1e-6*n
+    if ndims == 2: return 5e-8*n**1.5
+    return 7e-9*n**2
+
+###########################################################
+#   memory (bytes) and time (s) of each phase option      #
+###########################################################
+def phase_cost(phase, option, n, ndims, nproc=1):
+
+#   stencil width, CSR and RHS basis storage
+    nnz  = (2*ndims+1)*n
+    csr  = 12*nnz + 8*n
+    wmat = 8*(2*ndims+1)*n
+
+    if phase == 'assemble':
+       if option == 'dense': return 8*n*n + wmat, 2.5e-5*n + 1e-9*n*n
+       if option == 'slab':  return n*(16*NSLOT + 56) + 2*csr + wmat, 6e-7*n/max(nproc, 1)
+    if phase == 'reorder':
+       if option == 'dense':  return 5*8*n*n + wmat, 7e-11*n**3 + 7e-5*n
+       if option == 'sparse': return 3*csr + wmat, 7e-5*n
+    if phase == 'solve':
+       if option == 'direct': return csr + 12*lu_fill(n, ndims) + 40*n, lu_time(n, ndims)
+       if option == 'mixed':  return 2*csr + 8*lu_fill(n, ndims) + 56*n, 0.7*lu_time(n, ndims)
+       if option == 'mg':     return 4*csr + 120*n, 5e-6*n
+    if phase == 'eigen':
+       if option == 'dense':  return 2*8*(2*n)**2, 1.5e-10*(2*n)**3
+       if option == 'sparse': return 3*csr + 12*lu_fill(n, ndims) + 8*40*n, lu_time(n, ndims) + 4e-7*lu_fill(n, ndims)
+    if phase == 'plot':
+       if option == 'dense':  return 3*8*n*n, 2e-8*n*n
+       if option == 'binned': return 4*8*min(n, NBIN_MAX)**2, 1e-7*nnz
+    if option == 'export':
+       return export_cost(phase, n, ndims)[:2]
+    return 0, 0.0
+
+###########################################################
+#   peak, time and memory kept until save_join of export  #
+###########################################################
+def export_cost(export, n, ndims):
+
+#   vectors are padded to N = 2^q for the qubit encodings
+    nnz = (2*ndims+1)*n
+    csr = 12*nnz + 8*n
+    nq  = max(1, int(np.ceil(np.log2(n))))
+    N   = 2**nq
+
+    if export == 'herm':  return 5*csr, 2e-7*nnz, 2.5*csr
+    if export == 'part':  return 1.5*csr, 2e-7*nnz, csr
+    if export == 'dia':   return 4*csr, 1e-7*nnz, 8*nnz
+    if export == 'ell':   return 3.5*csr, 1e-7*nnz, 16*nnz
+    if export == 'qtt':   return 4*csr + 64*N*nq, 1e-6*N*nq, 8*N*nq
+    if export == 'prep':  return 88*N, 1e-7*N, 0
+    if export == 'pauli':
+#   each stencil offset gives up to q distinct row^col masks, at most 60% of their N coefficients are kept,
+#   the labels cost about 30 bytes per qubit per term
+       terms = 0.6*(2*ndims*nq + 1)*N
+       return 25*64*N + terms*(100 + 30*nq), 1e-6*terms, 32*terms
+    return 0, 0.0, 0
+
+###########################################################
+#   pick the first option of each phase within budget     #
+###########################################################
+def plan_phases(n, ndims, budget, xopts, order, eigen, mplot=False):
+
+    nproc = xopts['nproc'] or 1
+    options = {'assemble': ['slab'] if xopts['slab'] else ['dense', 'slab'] if ndims == 3 else ['dense']}
+    if order:
+       options['reorder'] = ['dense', 'sparse']
+    if xopts['mg']:
+       options['solve'] = ['mg']
+    elif xopts['mixed']:
+       options['solve'] = ['mixed']
+    elif xopts['cache']:
+       options['solve'] = ['direct']
+    else:
+       options['solve'] = ['direct', 'mixed', 'mg']
+    for k in EXPORTS:
+       if xopts.get(k): options[k] = ['export']
+    if eigen:
+       options['eigen'] = ['dense', 'sparse']
+    if mplot:
+       options['plot'] = ['dense', 'binned'] if n <= NBIN_MAX else ['binned']
+
+#   the matrix is held for the whole run, as the dense array until a sparse phase replaces it
+    plan = {}
+    rows = []
+    held = 0
+    dense = False
+    ok = True
+    for phase, opts in options.items():
+       if phase == 'reorder' and not dense: opts = ['sparse']
+       costs = [(o,) + phase_cost(phase, o, n, ndims, nproc) for o in opts]
+       extra = held if phase != 'assemble' else 0
+       fits  = [c for c in costs if budget is None or extra + c[1] <= budget]
+       choice, mem, secs = fits[0] if fits else min(costs, key=lambda c: c[1])
+
+#   an export that does not fit is skipped rather than stopping the run
+       if phase in EXPORTS:
+          if fits: held += export_cost(phase, n, ndims)[2]
+          else:    choice = 'skip'
+       elif phase == 'plot':
+          if not fits: choice = 'binned'
+       else:
+          ok = ok and bool(fits)
+       plan[phase] = choice
+       rows.append((phase, choice, extra + mem, secs, bool(fits)))
+
+       if phase == 'assemble':
+          dense = choice == 'dense'
+          held  = 8*n*n if dense else 12*(2*ndims+1)*n
+       elif phase == 'reorder' and choice == 'sparse':
+          dense = False
+          held  = 12*(2*ndims+1)*n
+
+    return plan, rows, ok
+
+###########################################################
+#   pre-flight check against --max-mem                    #
+###########################################################
+def preflight(rdict, ndims, budget, xopts, order, eigen, mplot=False):
+
+    n = int(np.prod([int(rdict[xyz]['ntotal']) for xyz in ('x', 'y', 'z')[:ndims]]))
+    plan, rows, ok = plan_phases(n, ndims, budget, xopts, order, eigen, mplot)
+
+    print('\nestimated cost for', n, 'unknowns with a memory budget of', fmt_mem(budget))
+    print('\t%-10s%-10s%12s%12s' % ('phase', 'method', 'memory', 'time'))
+    for phase, choice, mem, secs, fits in rows:
+       print('\t%-10s%-10s%12s%12s%s' % (phase, choice, fmt_mem(mem), fmt_time(secs), '' if fits else '  exceeds budget'))
+    peak = max(r[2] for r in rows if r[1] != 'skip')
+    print('\tpeak memory', fmt_mem(peak), 'total time', fmt_time(sum(r[3] for r in rows if r[1] != 'skip')))
+
+    if not ok:
+       print('\nno method fits in', fmt_mem(budget), 'of memory, the smallest estimate is', fmt_mem(peak))
+       if ndims < 3 and plan['assemble'] == 'dense':
+          print('1D and 2D matrices are assembled as dense arrays, reduce the mesh size or raise --max-mem\n')
+       sys.exit(4)
+
+    return plan
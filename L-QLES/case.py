@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import numpy as np
+from   scipy import sparse
+from   scipy.sparse import csr_matrix
+from   scipy.sparse.linalg import spsolve
+
+from mesh      import parse_meshfile, generate_mesh
+from matvec    import operator_1d, operator_2d, operator_3d, rhs_params
+from reorder   import reorder
+from save      import case_name
+from hermitian import hermitian_embed
+
+#   parameter that changed -> memoised values that depend on it, any other tag rebuilds everything
+MESH_KEYS = ('length', 'ntotal', 'nclust', 'cltype', 'cratio')
+OPER_KEYS = ('btype', 'degfix', 'degen', 'order')
+RHS_KEYS  = ('bvalue', 'force')
+DEPENDS   = {'mesh':     ('mesh', 'operator', 'rhs', 'solution', 'spectrum'),
+             'operator': ('operator', 'rhs', 'solution', 'spectrum'),
+             'rhs':      ('rhs', 'solution')}
+
+###########################################################
+#   Laplace case with lazily computed, memoised results   #
+###########################################################
+class Case:
+
+    __slots__ = ('casename', 'ndims', 'rdict', 'degen', 'order', 'nproc', '_memo')
+
+#   source is an XML input file or a dict laid out as the XML file: name, dimension, force and x, y, z
+    def __init__(self, source, degen=False, order=False, nproc=None):
+
+       if isinstance(source, dict):
+          self.casename = source.get('name', 'case')
+          self.ndims    = int(source.get('dimension', sum(xyz in source for xyz in ('x', 'y', 'z'))))
+          self.rdict    = {xyz: dict(source[xyz]) for xyz in ('x', 'y', 'z')[:self.ndims]}
+          self.rdict['force'] = float(source.get('force', 0.0))
+       else:
+          self.casename, self.ndims, self.rdict = parse_meshfile(source)
+
+       self.degen = degen
+       self.order = order
+       self.nproc = nproc
+       self._memo = {}
+
+    def __repr__(self):
+       return 'Case(%r, ndims=%d, degen=%s, order=%s, cached=%s)' % (
+              self.casename, self.ndims, self.degen, self.order, sorted(self._memo))
+
+#   change parameters and drop only the memoised values that depend on them, e.g.
+#   case.update(force=2.0) or case.update(x={'bvalue': '1.0, 0.0'})
+    def update(self, **kwargs):
+
+       stale = set()
+       for key, val in kwargs.items():
+          if key in ('x', 'y', 'z')[:self.ndims]:
+             for k, v in val.items():
+                if self.rdict[key].get(k) != v: stale.add(k)
+             self.rdict[key].update(val)
+          elif key == 'force':
+             if self.rdict['force'] != float(val): stale.add(key)
+             self.rdict['force'] = float(val)
+          elif key in ('degen', 'order'):
+             if getattr(self, key) != val: stale.add(key)
+             setattr(self, key, val)
+          elif key == 'nproc':
+             self.nproc = val
+          else:
+             raise KeyError('unknown case parameter ' + key)
+
+       for k in stale:
+          if k in MESH_KEYS:   group = 'mesh'
+          elif k in OPER_KEYS: group = 'operator'
+          elif k in RHS_KEYS:  group = 'rhs'
+          else:                group = 'mesh'
+          for name in DEPENDS[group]: self._memo.pop(name, None)
+       return self
+
+#   drop the named memoised values, or all of them
+    def invalidate(self, *names):
+       for name in names or list(self._memo): self._memo.pop(name, None)
+
+    @property
+    def name(self):
+       return case_name(self.casename, self.degen, self.order)
+
+#   mesh coordinates, one array per direction
+    @property
+    def mesh(self):
+       if 'mesh' not in self._memo:
+          self._memo['mesh'] = [generate_mesh(self.rdict[xyz]) for xyz in ('x', 'y', 'z')[:self.ndims]]
+       return self._memo['mesh']
+
+#   scaled (and reordered) matrix, RHS basis and permutation, built together
+    def _operator(self):
+       if 'operator' not in self._memo:
+          m = self.mesh
+          r = self.rdict
+          if self.ndims == 1:
+             a, w = operator_1d(m[0], r['x'], self.degen)
+          elif self.ndims == 2:
+             a, w = operator_2d(m[0], m[1], r['x'], r['y'], self.degen)
+          elif self.ndims == 3:
+             a, w = operator_3d(m[0], m[1], m[2], r['x'], r['y'], r['z'], self.degen, self.nproc)
+
+          if self.order:
+             shape = [len(c) for c in m] + [1]*(3-self.ndims)
+             q, a, w = reorder(a, w, *shape)
+             q = csr_matrix(q)
+          else:
+             q = sparse.identity(np.shape(a)[0], format='csr')
+          self._memo['operator'] = (csr_matrix(a), w, q)
+       return self._memo['operator']
+
+    @property
+    def matrix(self):
+       return self._operator()[0]
+
+#   permutation Q, the solution of the reordered system is Q^T x
+    @property
+    def ordering(self):
+       return self._operator()[2]
+
+    @property
+    def rhs(self):
+       if 'rhs' not in self._memo:
+          w = self._operator()[1]
+          self._memo['rhs'] = np.dot(w, rhs_params([self.rdict[xyz] for xyz in ('x', 'y', 'z')[:self.ndims]],
+                                                   self.rdict['force']))
+       return self._memo['rhs']
+
+#   solution in mesh order, as written to the _sol files
+    @property
+    def solution(self):
+       if 'solution' not in self._memo:
+          self._memo['solution'] = self.ordering @ spsolve(self.matrix, self.rhs)
+       return self._memo['solution']
+
+#   eigenvalues of the Hermitian embedding, as used for -e
+    @property
+    def spectrum(self):
+       if 'spectrum' not in self._memo:
+          asym, _, _, _ = hermitian_embed(self.matrix, 0.0)
+          self._memo['spectrum'] = np.linalg.eigvalsh(asym.toarray())
+       return self._memo['spectrum']
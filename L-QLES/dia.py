@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix
+
+#   above this many diagonals the DIA format is not used and CSR is kept
+DIA_MAX = 16
+
+###########################################################
+#   diagonal storage from sparse matrix                   #
+###########################################################
+def dia_from_csr(a, maxdiag=DIA_MAX):
+
+#   row indexed layout: data[k][i] = A[i][i+offsets[k]], zero outside the matrix
+    s = csr_matrix(a).tocoo()
+    nr, nc = s.shape
+    keep = s.data != 0
+    rows = s.row[keep].astype(np.int64)
+    cols = s.col[keep].astype(np.int64)
+
+    offsets = np.unique(cols - rows)
+    if len(offsets) > maxdiag:
+       print('\nmatrix has', len(offsets), 'diagonals, more than', maxdiag, '- keeping CSR format')
+       return None, None
+
+    data = np.zeros((len(offsets), nr))
+    data[np.searchsorted(offsets, cols - rows), rows] = s.data[keep]
+    return offsets, data
+
+###########################################################
+#   sparse matrix from diagonal storage                   #
+###########################################################
+def dia_to_csr(offsets, data, shape):
+
+    nr, nc = shape
+    rows = np.tile(np.arange(nr, dtype=np.int64), len(offsets))
+    cols = rows + np.repeat(offsets, nr)
+    vals = data.ravel()
+    keep = (cols >= 0) & (cols < nc) & (vals != 0)
+    return csr_matrix((vals[keep], (rows[keep], cols[keep])), shape=shape)
+
+###########################################################
+#   matrix vector product in diagonal storage             #
+###########################################################
+def dia_matvec(offsets, data, x):
+
+    nr = data.shape[1]
+    nc = len(x)
+    y  = np.zeros(nr, dtype=np.result_type(data, x))
+    for k, off in enumerate(offsets):
+       i0 = max(0, -off)
+       i1 = min(nr, nc - off)
+       if i1 > i0: y[i0:i1] += data[k, i0:i1] * x[i0+off:i1+off]
+    return y
+
+###########################################################
+#   save diagonal storage to npz file                     #
+###########################################################
+def dia_save_npz(offsets, data, shape, cname):
+
+    filename = cname + '_dia.npz'
+    print('\nsaving DIA matrix to npz file:   ', filename, '(%d diagonals)' % len(offsets))
+    np.savez(filename, shape=np.array(shape, dtype=np.int64), offsets=offsets, data=data)
+    return os.path.getsize(filename)
+
+###########################################################
+#   save diagonal storage to binary file                  #
+###########################################################
+def dia_save_bin(offsets, data, shape, cname):
+
+#   bool real flag, int64 nrow, ncol, ndiag, int64 offsets then double diagonals row by row
+    filename = cname + '_dia.bin'
+    print('saving DIA matrix to binary file:', filename)
+
+    real = np.array([True], dtype=np.bool_)
+    dims = np.array([shape[0], shape[1], len(offsets)], dtype=np.int64)
+
+    with open(filename, "wb") as fp:
+       real.tofile(fp)
+       dims.tofile(fp)
+       np.asarray(offsets, dtype=np.int64).tofile(fp)
+       np.asarray(data, dtype=np.double).tofile(fp)
+    return os.path.getsize(filename)
+
+###########################################################
+#   read diagonal storage from npz or binary file         #
+###########################################################
+def dia_load(filename, mmap=True):
+
+    if filename.endswith('.npz'):
+       d = np.load(filename)
+       return d['offsets'], d['data'], tuple(int(n) for n in d['shape'])
+
+    nr, nc, nd = (int(n) for n in np.fromfile(filename, dtype=np.int64, count=3, offset=1))
+    offsets = np.fromfile(filename, dtype=np.int64, count=nd, offset=25)
+    if mmap:
+       data = np.memmap(filename, dtype=np.double, mode='r', offset=25+8*nd, shape=(nd, nr))
+    else:
+       data = np.fromfile(filename, dtype=np.double, count=nd*nr, offset=25+8*nd).reshape(nd, nr)
+    return offsets, data, (nr, nc)
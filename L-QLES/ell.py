@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix
+
+###########################################################
+#   fixed width ELLPACK tables from sparse matrix         #
+###########################################################
+def ell_from_csr(a):
+
+#   (n, s) column and value tables, columns ascending in each row,
+#   padded with column -1 and value 0 where a row has fewer than s non-zeros
+    s = csr_matrix(a, copy=True)
+    s.eliminate_zeros()
+    s.sort_indices()
+    nr = s.shape[0]
+
+    rnnz = np.diff(s.indptr)
+    sw   = int(rnnz.max()) if nr else 0
+    rows = np.repeat(np.arange(nr), rnnz)
+    pos  = np.arange(s.nnz) - np.repeat(s.indptr[:-1], rnnz)
+
+    cols = np.full((nr, sw), -1, dtype=np.int64)
+    vals = np.zeros((nr, sw))
+    cols[rows, pos] = s.indices
+    vals[rows, pos] = s.data
+    return cols, vals
+
+###########################################################
+#   non-zeros of row i, constant time lookup              #
+###########################################################
+def ell_row(cols, vals, i):
+    c = cols[i]
+    k = c >= 0
+    return c[k], vals[i][k]
+
+###########################################################
+#   matrix vector product in ELLPACK storage              #
+###########################################################
+def ell_matvec(cols, vals, x):
+    return np.sum(np.where(cols >= 0, vals*x[np.maximum(cols, 0)], 0.0), axis=1)
+
+###########################################################
+#   save ELLPACK tables to npz file                       #
+###########################################################
+def ell_save_npz(cols, vals, shape, cname):
+
+    filename = cname + '_ell.npz'
+    print('\nsaving ELL matrix to npz file:   ', filename, '(%d non-zeros per row)' % cols.shape[1])
+    np.savez(filename, shape=np.array(shape, dtype=np.int64), cols=cols, vals=vals)
+    return os.path.getsize(filename)
+
+###########################################################
+#   save ELLPACK tables to binary file                    #
+###########################################################
+def ell_save_bin(cols, vals, shape, cname):
+
+#   bool real flag, int64 nrow, ncol, s then the row major (n, s) double values and int64 columns
+    filename = cname + '_ell.bin'
+    print('saving ELL matrix to binary file:', filename)
+
+    real = np.array([True], dtype=np.bool_)
+    dims = np.array([shape[0], shape[1], cols.shape[1]], dtype=np.int64)
+
+    with open(filename, "wb") as fp:
+       real.tofile(fp)
+       dims.tofile(fp)
+       np.asarray(vals, dtype=np.double).tofile(fp)
+       np.asarray(cols, dtype=np.int64).tofile(fp)
+    return os.path.getsize(filename)
+
+###########################################################
+#   read ELLPACK tables from npz or binary file           #
+###########################################################
+def ell_load(filename, mmap=True):
+
+    if filename.endswith('.npz'):
+       d = np.load(filename)
+       return d['cols'], d['vals'], tuple(int(n) for n in d['shape'])
+
+    nr, nc, sw = (int(n) for n in np.fromfile(filename, dtype=np.int64, count=3, offset=1))
+    off = 25
+    if mmap:
+       vals = np.memmap(filename, dtype=np.double, mode='r', offset=off, shape=(nr, sw))
+       cols = np.memmap(filename, dtype=np.int64,  mode='r', offset=off+8*nr*sw, shape=(nr, sw))
+    else:
+       vals = np.fromfile(filename, dtype=np.double, count=nr*sw, offset=off).reshape(nr, sw)
+       cols = np.fromfile(filename, dtype=np.int64,  count=nr*sw, offset=off+8*nr*sw).reshape(nr, sw)
+    return cols, vals, (nr, nc)
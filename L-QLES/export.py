@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import sys, getopt
+import numpy as np
+
+from load      import read_mat, read_vec, file_casename
+from hermitian import hermitian_embed, herm_save_npz, herm_save_bin
+from pauli     import pauli_decompose, pauli_save
+from dia       import dia_from_csr, dia_save_npz, dia_save_bin
+from ell       import ell_from_csr, ell_save_npz, ell_save_bin
+from partition import partition, part_save
+from qtt       import qtt_decompose, qtt_save
+from stateprep import prep_save
+
+###########################################################
+#   read command line arguments                           #
+###########################################################
+def read_args(argv):
+    mfile = ''
+    bfile = ''
+    xfile = ''
+    cname = ''
+    xopts = {'herm': False, 'pauli': False, 'ptol': 1e-12, 'dia': False, 'maxdiag': 16, 'ell': False, 'part': 0, 'qtt': False, 'qtol': 1e-10, 'prep': False}
+
+    try:
+       opts, args = getopt.getopt(argv,"hm:b:x:o:",["herm","pauli","ptol=","dia","maxdiag=","ell","part=","qtt","qtol=","prep"])
+    except getopt.GetoptError:
+       print ('\nusage error, use:')
+       print ('\texport.py -h for help\n')
+       sys.exit(2)
+
+    for opt, arg in opts:
+       if opt == '-h':
+          print ('\nusage:')
+          print ('\texport.py -m <matrix file> {-b <rhs file>} {-x <solution file>} {-o <case name>} {--herm} {--pauli} {--ptol=<tol>} {--dia} {--maxdiag=<n>} {--ell} {--part=<p>} {--qtt} {--qtol=<tol>} {--prep}\n')
+          print ('\t\t-m {matrix file, L-QLES _mat.npz or _mat.bin or cavity .mat}')
+          print ('\t\t-b {RHS vector file, npy or binary}')
+          print ('\t\t-x {solution vector file, npy or binary}')
+          print ('\t\t-o {case name for output files}, default from matrix file name')
+          print ('\t\t-h help menu')
+          print ('\t\t--herm save sparse Hermitian embedding of the matrix, RHS and solution')
+          print ('\t\t--pauli save Pauli string decomposition of the matrix padded to 2^q')
+          print ('\t\t--ptol=<tol> drop Pauli terms below tol times the largest, default = 1e-12')
+          print ('\t\t--dia save matrix in diagonal (DIA) format')
+          print ('\t\t--maxdiag=<n> keep CSR format if the matrix has more diagonals, default = 16')
+          print ('\t\t--ell save matrix in fixed width ELLPACK format')
+          print ('\t\t--part=<p> save matrix and vectors as p row blocks with halo information')
+          print ('\t\t--qtt save quantized tensor train cores of the matrix, RHS and solution')
+          print ('\t\t--qtol=<tol> relative truncation error of the tensor trains, default = 1e-10')
+          print ('\t\t--prep save norm and rotation angle tree for preparing the RHS state, needs -b')
+          sys.exit()
+       elif opt == "-m":
+          mfile = arg
+       elif opt == "-b":
+          bfile = arg
+       elif opt == "-x":
+          xfile = arg
+       elif opt == "-o":
+          cname = arg
+       elif opt == "--herm":
+          xopts['herm'] = True
+       elif opt == "--pauli":
+          xopts['pauli'] = True
+       elif opt == "--ptol":
+          xopts['ptol'] = float(arg)
+       elif opt == "--dia":
+          xopts['dia'] = True
+       elif opt == "--maxdiag":
+          xopts['maxdiag'] = int(arg)
+       elif opt == "--ell":
+          xopts['ell'] = True
+       elif opt == "--part":
+          xopts['part'] = int(arg)
+       elif opt == "--qtt":
+          xopts['qtt'] = True
+       elif opt == "--qtol":
+          xopts['qtol'] = float(arg)
+       elif opt == "--prep":
+          xopts['prep'] = True
+
+    for f in (mfile, bfile, xfile):
+       if f and not os.path.isfile(f):
+          print('\nfile', f, 'does not exist\n')
+          sys.exit(3)
+    if not mfile:
+       print('\nno matrix file given, use export.py -h for help\n')
+       sys.exit(3)
+
+    if not cname: cname = file_casename(mfile)
+    return mfile, bfile, xfile, cname, xopts
+
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def export(argv):
+
+    mfile, bfile, xfile, cname, xopts = read_args(argv)
+
+    print('\nreading matrix from file:', mfile)
+    a = read_mat(mfile)
+    n = a.shape[0]
+    b = read_vec(bfile) if bfile else np.zeros(n)
+    x = read_vec(xfile) if xfile else None
+    status = x is not None
+
+#   Hermitian embedding
+    if xopts['herm']:
+       if abs(a - a.T).max() == 0:
+          print('\nmatrix is already symmetric, e.g. a sym_cavity file, embedding anyway')
+       h, bh, xh, e = hermitian_embed(a, b, x)
+       herm_save_npz(h, bh, xh, e, status, cname)
+       herm_save_bin(h, bh, xh, e, status, cname)
+
+#   Pauli decomposition
+    if xopts['pauli']:
+       px, pz, pc, nq = pauli_decompose(a, xopts['ptol'])
+       pauli_save(px, pz, pc, nq, cname)
+
+#   diagonal format, falls back to the CSR files if there are too many diagonals
+    if xopts['dia']:
+       offsets, ddata = dia_from_csr(a, xopts['maxdiag'])
+       if offsets is not None:
+          dia_save_npz(offsets, ddata, a.shape, cname)
+          dia_save_bin(offsets, ddata, a.shape, cname)
+
+#   fixed width ELLPACK tables for sparse access oracles
+    if xopts['ell']:
+       ecols, evals = ell_from_csr(a)
+       ell_save_npz(ecols, evals, a.shape, cname)
+       ell_save_bin(ecols, evals, a.shape, cname)
+
+#   row blocks with ghost columns and send lists for distributed solvers
+    if xopts['part']:
+       part_save(partition(a, xopts['part']), b, x, status, cname)
+
+#   quantized tensor train cores, the matrix MPO is built from its diagonals
+    if xopts['qtt']:
+       qtts, nq = qtt_decompose(a, b if bfile else None, x, xopts['qtol'])
+       qtt_save(qtts, nq, cname)
+
+#   amplitude encoding of the RHS padded to 2^q
+    if xopts['prep'] and bfile:
+       prep_save(b, cname)
+
+###########################################################
+#   call main                                             #
+###########################################################
+if __name__ == "__main__":
+    export(sys.argv[1:])
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix, csc_matrix, bmat, identity, save_npz
+from   scipy.sparse.linalg import splu, eigsh, LinearOperator
+
+from save import save_mat_bin, save_vec_bin
+
+###########################################################
+#   sparse Hermitian embedding of non-symmetric system    #
+###########################################################
+def hermitian_embed(a, b, x=None, q=None):
+
+#   [[0, A], [A^T, 0]] [0, x] = [b, 0], stored with 2*nnz(A) entries
+    s  = csr_matrix(a)
+    n  = s.shape[0]
+    h  = bmat([[None, s], [s.T, None]], format='csr')
+
+    bh = np.zeros(2*n)
+    bh[:n] = b
+
+    xh = None
+    if x is not None:
+       xh = np.zeros(2*n)
+       xh[n:] = x
+
+#   extraction map x = E xh, includes the reordering Q if the system was reordered
+    qs = identity(n, format='csr') if q is None else csr_matrix(q)
+    e  = bmat([[csr_matrix((n, n)), qs]], format='csr')
+
+    return h, bh, xh, e
+
+###########################################################
+#   extreme |eigenvalues| of the embedding without n^2    #
+###########################################################
+def herm_extremes(a):
+
+#   the eigenvalues of [[0, A], [A^T, 0]] are +/- the singular values of A
+    s = csr_matrix(a)
+    n = s.shape[0]
+    smax = abs(eigsh(LinearOperator((n, n), matvec=lambda v: s.T @ (s @ v), dtype=s.dtype),
+                     k=1, which='LM', return_eigenvectors=False)[0])**0.5
+
+#   smallest from the largest eigenvalue of (A^T A)^-1 = A^-1 A^-T with one LU of A
+    try:
+       lu = splu(csc_matrix(s))
+    except RuntimeError:
+       return 0.0, smax
+    op = LinearOperator((n, n), matvec=lambda v: lu.solve(lu.solve(v, trans='T')), dtype=s.dtype)
+    smin = abs(eigsh(op, k=1, which='LM', return_eigenvectors=False)[0])**-0.5
+
+    return smin, smax
+
+###########################################################
+#   save Hermitian embedding to npz and npy files         #
+###########################################################
+def herm_save_npz(h, bh, xh, e, status, cname):
+
+    cname += '_herm'
+
+    filename = cname + '_mat.npz'
+    print('\nsaving Hermitian matrix to npz file:  ', filename)
+    save_npz(filename, csr_matrix(h))
+
+    filename = cname + '_rhs.npy'
+    print('saving Hermitian RHS to npy file:     ', filename)
+    np.save(filename, bh)
+
+    if status:
+       filename = cname + '_sol.npy'
+       print('saving Hermitian solution to npy file:', filename)
+       np.save(filename, xh)
+
+    filename = cname + '_ext.npz'
+    print('saving extraction matrix to npz file: ', filename)
+    save_npz(filename, csr_matrix(e))
+
+    files = [cname + t for t in ('_mat.npz', '_rhs.npy', '_ext.npz')]
+    if status: files.append(cname + '_sol.npy')
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   save Hermitian embedding to binary files              #
+###########################################################
+def herm_save_bin(h, bh, xh, e, status, cname):
+
+    cname += '_herm'
+
+    filename = cname + '_mat.bin'
+    print('\nsaving Hermitian matrix to binary file:  ', filename)
+    save_mat_bin(filename, h)
+
+    filename = cname + '_rhs.bin'
+    print('saving Hermitian RHS to binary file:     ', filename)
+    save_vec_bin(filename, bh)
+
+    if status:
+       filename = cname + '_sol.bin'
+       print('saving Hermitian solution to binary file:', filename)
+       save_vec_bin(filename, xh)
+
+    filename = cname + '_ext.bin'
+    print('saving extraction matrix to binary file: ', filename)
+    save_mat_bin(filename, e)
+
+    files = [cname + t for t in ('_mat.bin', '_rhs.bin', '_ext.bin')]
+    if status: files.append(cname + '_sol.bin')
+    return sum(os.path.getsize(f) for f in files)
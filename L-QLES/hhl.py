@@ -0,0 +1,310 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import sys, getopt
+import csv
+import hashlib
+import numpy as np
+from   scipy.sparse import csr_matrix
+from   scipy.sparse.linalg import spsolve, splu, eigsh, LinearOperator
+
+from load import read_mat, read_vec
+
+#   bump if the cached decomposition changes so old cache entries are ignored
+HHL_VERSION = 1
+
+#   matrices up to this size use a cached dense SVD, larger ones Lanczos
+HHL_NDENSE = 2048
+
+#   Lanczos steps on A^T A for large matrices
+HHL_STEPS = 150
+
+###########################################################
+#   read command line arguments                           #
+###########################################################
+def read_args(argv):
+    mfile = ''
+    bfile = ''
+    xfile = ''
+    ofile = ''
+    xopts = {'clock': [4, 6, 8, 10], 'cut': 0.0, 'steps': HHL_STEPS, 'ndense': HHL_NDENSE, 'cache': 'hhl-cache', 'matvec': False}
+
+    try:
+       opts, args = getopt.getopt(argv,"hm:b:x:o:t:l:k:",["ndense=","cache=","matvec"])
+    except getopt.GetoptError:
+       print ('\nusage error, use:')
+       print ('\thhl.py -h for help\n')
+       sys.exit(2)
+
+    for opt, arg in opts:
+       if opt == '-h':
+          print ('\nusage:')
+          print ('\thhl.py -m <matrix file> -b <rhs file> {-x <solution file>} {-o <file.csv>} {-t <t1,t2,..>} {-l <cutoff>} {-k <steps>} {--ndense=<n>} {--cache=<dir>} {--matvec}\n')
+          print ('\t\t-m {matrix file, L-QLES _mat.npz or _mat.bin or cavity .mat}')
+          print ('\t\t-b {RHS vector file, npy or binary}')
+          print ('\t\t-x {solution vector file, npy or binary}, default direct solve')
+          print ('\t\t-o {csv file for the results}, default screen only')
+          print ('\t\t-t {comma separated clock register sizes}, default = 4,6,8,10')
+          print ('\t\t-l {eigenvalue cutoff relative to the largest}, default = 0, only eigenvalues rounding to zero are dropped')
+          print ('\t\t-k {Lanczos steps for large matrices}, default =', HHL_STEPS)
+          print ('\t\t-h help menu')
+          print ('\t\t--ndense=<n> largest matrix for the dense SVD, default =', HHL_NDENSE)
+          print ('\t\t--cache=<dir> directory for cached singular vectors, default = hhl-cache, empty to disable')
+          print ('\t\t--matvec Lanczos on A^T A with matrix-vector products only, default (A^T A)^-1 with one sparse LU of A')
+          sys.exit()
+       elif opt == "-m":
+          mfile = arg
+       elif opt == "-b":
+          bfile = arg
+       elif opt == "-x":
+          xfile = arg
+       elif opt == "-o":
+          ofile = arg
+       elif opt == "-t":
+          xopts['clock'] = [int(t) for t in arg.split(',')]
+       elif opt == "-l":
+          xopts['cut'] = float(arg)
+       elif opt == "-k":
+          xopts['steps'] = int(arg)
+       elif opt == "--ndense":
+          xopts['ndense'] = int(arg)
+       elif opt == "--cache":
+          xopts['cache'] = arg
+       elif opt == "--matvec":
+          xopts['matvec'] = True
+
+    for f in (mfile, bfile, xfile):
+       if f and not os.path.isfile(f):
+          print('\nfile', f, 'does not exist\n')
+          sys.exit(3)
+    if not mfile or not bfile:
+       print('\nmatrix and RHS files are needed, use hhl.py -h for help\n')
+       sys.exit(3)
+
+    return mfile, bfile, xfile, ofile, xopts
+
+###########################################################
+#   hash of the matrix values and sparsity                #
+###########################################################
+def hhl_key(a):
+
+    h = hashlib.sha256(np.array([HHL_VERSION, *a.shape], dtype=np.int64).tobytes())
+    for arr in (a.indptr, a.indices, a.data):
+       h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()[:20]
+
+###########################################################
+#   dense SVD, read from or written to the cache          #
+###########################################################
+def hhl_svd(a, cdir):
+
+    filename = os.path.join(cdir, hhl_key(a) + '.npz') if cdir else ''
+    if filename and os.path.isfile(filename):
+       print('\nreading singular vectors from cache file:', filename)
+       with np.load(filename) as f:
+          return f['u'], f['s'], f['vt']
+
+#   eigenpairs of the embedding [[0, A], [A^T, 0]] are (u, +/-v)/sqrt(2) with eigenvalues +/-s
+    u, s, vt = np.linalg.svd(a.toarray())
+    if filename:
+       os.makedirs(cdir, exist_ok=True)
+       print('\nsaving singular vectors to cache file:', filename)
+       np.savez(filename, u=u, s=s, vt=vt)
+    return u, s, vt
+
+###########################################################
+#   phase estimation and controlled rotation filter       #
+###########################################################
+def hhl_filter(s, smax, t, cut):
+
+#   ideal phase estimation rounds |lambda| to the clock grid, the sign is carried by its own qubit
+    delta = smax/(2**t - 1)
+    sq = delta*np.rint(s/delta)
+
+#   the rotation constant is the smallest clock value that is inverted
+    c = delta*max(1.0, np.ceil(cut*smax/delta - 1e-12))
+    keep = sq >= c*(1.0 - 1e-12)
+    f = np.zeros_like(s)
+    f[keep] = c/sq[keep]
+    return f, keep, delta, c
+
+###########################################################
+#   Lanczos tridiagonalisation of op from r               #
+###########################################################
+def hhl_lanczos(op, r, steps):
+
+    n = r.shape[0]
+    nrm = np.linalg.norm(r)
+    steps = min(steps, n)
+    q = np.zeros((steps, n))
+    alpha = np.zeros(steps)
+    beta = np.zeros(steps)
+
+    q[0] = r/nrm
+    for k in range(steps):
+       w = op(q[k])
+       alpha[k] = q[k] @ w
+#   full reorthogonalisation, twice is enough
+       for _ in range(2):
+          w -= q[:k+1].T @ (q[:k+1] @ w)
+       beta[k] = np.linalg.norm(w)
+       if k+1 == steps: break
+       if beta[k] <= 1e-12*abs(alpha[:k+1]).max():
+          steps = k+1
+          break
+       q[k+1] = w/beta[k]
+
+    return q[:steps], alpha[:steps], beta[:steps-1], nrm
+
+###########################################################
+#   HHL output from the first m Lanczos vectors           #
+###########################################################
+def lanczos_apply(q, alpha, beta, nrm, m, smax, t, cut, invert):
+
+    theta, z = np.linalg.eigh(np.diag(alpha[:m]) + np.diag(beta[:m-1], 1) + np.diag(beta[:m-1], -1))
+    theta = np.maximum(theta, 1e-300)
+    s = theta**-0.5 if invert else theta**0.5
+    f, keep, delta, c = hhl_filter(s, smax, t, cut)
+
+#   x = V f(S) U^T b is g(A^T A) A^T b with g(s^2) = f(s)/s, or g((A^T A)^-1) A^-1 b with g(s^-2) = f(s) s
+    g = f*s if invert else f/s
+    x = q[:m].T @ (z @ (g*z[0]*nrm))
+
+#   Gauss quadrature weights of b on the Ritz values, |U^T b| = |S V^T A^-1 b| = |S^-1 V^T A^T b|
+    w = (z[0]*nrm*s)**2 if invert else (z[0]*nrm/s)**2
+    dropped = w[~keep].sum()/w.sum()
+    return x, dropped, delta, c
+
+###########################################################
+#   Lanczos operator and start vector for HHL             #
+###########################################################
+def hhl_operator(a, b, matvec):
+
+    at = csr_matrix(a.T)
+    n = a.shape[0]
+    ata = LinearOperator((n, n), matvec=lambda v: at @ (a @ v), dtype=a.dtype)
+
+#   the clock is scaled by the largest singular value
+    smax = abs(eigsh(ata, k=1, which='LM', return_eigenvectors=False)[0])**0.5
+    if matvec:
+       return ata.matvec, at @ b, smax, False
+
+#   (A^T A)^-1 = A^-1 A^-T with one LU of A, resolves the small singular values that HHL inverts first
+    try:
+       lu = splu(a.tocsc())
+    except (RuntimeError, MemoryError):
+       print('\nLU factorisation failed, using matrix-vector products only')
+       return ata.matvec, at @ b, smax, False
+    return lambda v: lu.solve(lu.solve(v, trans='T')), lu.solve(b), smax, True
+
+###########################################################
+#   fidelity of two real states                           #
+###########################################################
+def fidelity(x, y):
+
+    nx = np.linalg.norm(x)
+    if nx == 0.0: return 0.0
+    return float((x @ y)**2/(nx*nx*(y @ y)))
+
+###########################################################
+#   write results as csv                                  #
+###########################################################
+def hhl_write(ofile, rows):
+
+    print('\nwriting results to file:', ofile)
+    with open(ofile, 'w', newline='') as f:
+       w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+       w.writeheader()
+       w.writerows(rows)
+
+###########################################################
+#   main routine                                          #
+###########################################################
+def hhl(argv):
+
+    mfile, bfile, xfile, ofile, xopts = read_args(argv)
+
+    print('\nreading matrix from file:', mfile)
+    a = csr_matrix(read_mat(mfile))
+    n = a.shape[0]
+    b = np.array(read_vec(bfile), dtype=np.double)
+    b = b/np.linalg.norm(b)
+    if xfile:
+       x = np.array(read_vec(xfile), dtype=np.double)
+    else:
+       print('\nno solution file, solving directly')
+       x = spsolve(a.tocsc(), b)
+
+#   the output state depends only on the singular triplets since f is odd on the embedding spectrum
+    rows = []
+    dense = n <= xopts['ndense']
+    if dense:
+       u, s, vt = hhl_svd(a, xopts['cache'])
+       smax = s.max()
+       print('\ndense SVD, singular values', s.min(), 'to', smax, 'kappa', smax/s.min())
+       ub = u.T @ b
+       for t in xopts['clock']:
+          f, keep, delta, c = hhl_filter(s, smax, t, xopts['cut'])
+          xt = vt.T @ (f*ub)
+          rows.append({'clock': t, 'delta': delta, 'C': c, 'dropped': float(ub[~keep] @ ub[~keep]),
+                       'psuccess': float(xt @ xt), 'fidelity': fidelity(xt, x), 'error': 0.0})
+    else:
+       op, r, smax, invert = hhl_operator(a, b, xopts['matvec'])
+       q, alpha, beta, nrm = hhl_lanczos(op, r, xopts['steps'])
+       m = len(alpha)
+       print('\nLanczos on', '(A^T A)^-1,' if invert else 'A^T A,', m, 'steps, largest singular value', smax)
+       for t in xopts['clock']:
+          xt, dropped, delta, c = lanczos_apply(q, alpha, beta, nrm, m, smax, t, xopts['cut'], invert)
+#   change against three quarters of the steps estimates the Lanczos error, exact on breakdown
+          if m < min(xopts['steps'], n):
+             err = 0.0
+          else:
+             xh = lanczos_apply(q, alpha, beta, nrm, max(1, 3*m//4), smax, t, xopts['cut'], invert)[0]
+             err = np.linalg.norm(xt - xh)/max(np.linalg.norm(xt), 1e-300)
+          rows.append({'clock': t, 'delta': delta, 'C': c, 'dropped': float(dropped),
+                       'psuccess': float(xt @ xt), 'fidelity': fidelity(xt, x), 'error': float(err)})
+
+    print('\n  clock      delta          C    dropped   psuccess   fidelity', '' if dense else '   error')
+    for r in rows:
+       line = '  {:5d} {:10.3e} {:10.3e} {:10.3e} {:10.3e} {:10.6f}'.format(
+              r['clock'], r['delta'], r['C'], r['dropped'], r['psuccess'], r['fidelity'])
+       print(line if dense else line + ' {:10.3e}'.format(r['error']))
+
+    if ofile: hhl_write(ofile, rows)
+
+###########################################################
+#   call main                                             #
+###########################################################
+if __name__ == "__main__":
+    hhl(sys.argv[1:])
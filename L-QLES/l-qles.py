@@ -40,10 +40,23 @@ from scipy.sparse import csr_matrix
 from scipy.sparse.linalg import spsolve
 
 from mesh    import parse_meshfile, generate_mesh
-from matvec  import matvec_1d,  matvec_2d,  matvec_3d
-from plot    import plotsol_1d, plotsol_2d, plotsol_3d, plotmat
+from matvec  import operator_1d, operator_2d, operator_3d, rhs_params
+from plot    import plotsol_1d, plotsol_2d, plotsol_3d, plotmat, plotmat_binned, render_slices
 from reorder import reorder
-from save    import case_save_npz, case_save_bin
+from save    import case_save_npz, case_save_bin, case_save_rhs, case_name, save_async, save_join
+from hermitian import hermitian_embed, herm_extremes, herm_save_npz, herm_save_bin
+from pauli     import pauli_decompose, pauli_save
+from dia       import dia_from_csr, dia_save_npz, dia_save_bin
+from ell       import ell_from_csr, ell_save_npz, ell_save_bin
+from multigrid import mg_hierarchy, mg_solve, mg_save
+from opcache   import op_key, op_load, op_save, op_factor, op_solve
+from partition import partition, part_save
+from mixed     import mixed_solve
+from budget    import parse_mem, preflight, EXPORTS
+from qtt       import qtt_decompose, qtt_save
+from stateprep import prep_save
+from vtr       import vtk_save
+from stats     import stats_load
 
 ###########################################################
 #   read command line arguments                           #
@@ -57,9 +70,10 @@ def read_args(argv):
     eigen = False
     order = False
     psplt = False
+    xopts = {'mpng': '', 'bins': 1024, 'window': None, 'spng': '', 'nproc': 0, 'herm': False, 'pauli': False, 'ptol': 1e-12, 'dia': False, 'maxdiag': 16, 'ell': False, 'mg': False, 'cache': '', 'slab': False, 'part': 0, 'mixed': False, 'maxmem': 0, 'qtt': False, 'qtol': 1e-10, 'prep': False, 'vtk': False}
     
     try:
-       opts, args = getopt.getopt(argv,"hmsdejri:c:",["i=","c="])
+       opts, args = getopt.getopt(argv,"hmsdejri:c:",["i=","c=","mpng=","bins=","window=","spng=","nproc=","herm","pauli","ptol=","dia","maxdiag=","ell","mg","cache=","slab","part=","mixed","max-mem=","qtt","qtol=","prep","vtk"])
     except getopt.GetoptError:
        print ('\nusage error, use:')
        print ('\tlaplace.py -h for help\n')
@@ -71,6 +85,7 @@ def read_args(argv):
           print ('\tl-qles.py -i <input file> {-c <x,y,z>} {-d} {-e} {-h} {-j} {-m} {-r} {-s}\n')
           print ('\t\t-i {name of input file}')
           print ('\t\t-c {x,y,z} cut slice of 3D solution to be plotted, default = x')
+          print ('\t\t   comma separated list of cuts, each optionally with =<plane index>')
           print ('\t\t-d allow degnerate matrices, default = False')
           print ('\t\t-e calculate eigenvalues and condition number, default = False')
           print ('\t\t-h help menu')
@@ -78,6 +93,27 @@ def read_args(argv):
           print ('\t\t-m plot matrix, default = False')
           print ('\t\t-r reorder matrix and RHS to use shell ordering of mesh, default = False')
           print ('\t\t-s plot solutons and mesh, default = False')
+          print ('\t\t--mpng=<file> write binned matrix plots to png files without a display')
+          print ('\t\t--bins=<n> resolution of binned matrix plots, default = 1024')
+          print ('\t\t--window=<r0:r1,c0:c1> row and column range of binned matrix plots')
+          print ('\t\t--spng=<file> write solution and mesh plots to png files without a display')
+          print ('\t\t--nproc=<n> number of worker processes, default = number of cores')
+          print ('\t\t--herm save sparse Hermitian embedding of the matrix, RHS and solution')
+          print ('\t\t--pauli save Pauli string decomposition of the matrix padded to 2^q')
+          print ('\t\t--ptol=<tol> drop Pauli terms below tol times the largest, default = 1e-12')
+          print ('\t\t--dia save matrix in diagonal (DIA) format')
+          print ('\t\t--maxdiag=<n> keep CSR format if the matrix has more diagonals, default = 16')
+          print ('\t\t--ell save matrix in fixed width ELLPACK format')
+          print ('\t\t--mg save multigrid hierarchy and solve with V-cycle preconditioned BiCGStab')
+          print ('\t\t--cache=<dir> reuse operator and factorisation if only boundary values or force change')
+          print ('\t\t--slab assemble 3D matrix in sparse format over k-slabs using --nproc processes')
+          print ('\t\t--part=<p> save matrix and vectors as p row blocks with halo information')
+          print ('\t\t--mixed solve with single precision LU and double precision iterative refinement')
+          print ('\t\t--max-mem=<size> estimate memory and time, choose methods that fit in size, e.g. 8G')
+          print ('\t\t--qtt save quantized tensor train cores of the matrix, RHS and solution')
+          print ('\t\t--qtol=<tol> relative truncation error of the tensor trains, default = 1e-10')
+          print ('\t\t--prep save norm and rotation angle tree for preparing the RHS state')
+          print ('\t\t--vtk save mesh and solution as VTK rectilinear grid for ParaView')
           sys.exit()
        elif opt in ("-c", "--c"):
           cut3d = arg
@@ -95,12 +131,62 @@ def read_args(argv):
           order = True
        elif opt in ("-s", "--s"):
           splot = True
+       elif opt == "--mpng":
+          xopts['mpng'] = arg
+       elif opt == "--bins":
+          xopts['bins'] = int(arg)
+       elif opt == "--spng":
+          xopts['spng'] = arg
+       elif opt == "--nproc":
+          xopts['nproc'] = int(arg)
+       elif opt == "--herm":
+          xopts['herm'] = True
+       elif opt == "--pauli":
+          xopts['pauli'] = True
+       elif opt == "--ptol":
+          xopts['ptol'] = float(arg)
+       elif opt == "--dia":
+          xopts['dia'] = True
+       elif opt == "--maxdiag":
+          xopts['maxdiag'] = int(arg)
+       elif opt == "--ell":
+          xopts['ell'] = True
+       elif opt == "--mg":
+          xopts['mg'] = True
+       elif opt == "--cache":
+          xopts['cache'] = arg
+       elif opt == "--slab":
+          xopts['slab'] = True
+       elif opt == "--part":
+          xopts['part'] = int(arg)
+       elif opt == "--mixed":
+          xopts['mixed'] = True
+       elif opt == "--qtt":
+          xopts['qtt'] = True
+       elif opt == "--qtol":
+          xopts['qtol'] = float(arg)
+       elif opt == "--prep":
+          xopts['prep'] = True
+       elif opt == "--vtk":
+          xopts['vtk'] = True
+       elif opt == "--max-mem":
+          xopts['maxmem'] = parse_mem(arg)
+          if not xopts['maxmem']:
+             print('\ninvalid memory size', arg, 'use e.g. --max-mem=512M or --max-mem=8G\n')
+             sys.exit(2)
+       elif opt == "--window":
+          try:
+             rw, cw = arg.split(',')
+             xopts['window'] = tuple(int(v) for v in rw.split(':') + cw.split(':'))
+          except ValueError:
+             print('\ninvalid window', arg, 'use --window=r0:r1,c0:c1\n')
+             sys.exit(2)
 
     if not os.path.isfile(inputfile):
        print('\nfile', inputfile, 'does not exist\n') 
        sys.exit(3)
 
-    return inputfile, mplot, splot, cut3d, degen, eigen, order, psplt
+    return inputfile, mplot, splot, cut3d, degen, eigen, order, psplt, xopts
 
 
 ###########################################################
@@ -109,55 +195,170 @@ def read_args(argv):
 def laplace(argv):
 
 #   read input file 
-    inputfile, mplot, splot, cut, degen, eigen, order, psplt = read_args(argv)
+    inputfile, mplot, splot, cut, degen, eigen, order, psplt, xopts = read_args(argv)
     casename, ndims, rdict = parse_meshfile(inputfile)
 #   print("rdict:\n", rdict)
 
+#   check the run fits in --max-mem before allocating anything, switching to sparse methods if needed
+    plan = {}
+    if xopts['maxmem']:
+       plan = preflight(rdict, ndims, xopts['maxmem'], xopts, order, eigen, mplot)
+       for k in EXPORTS:
+          if plan.get(k) == 'skip':
+             print('--' + k, 'does not fit in --max-mem, skipped')
+             xopts[k] = False
+
 #   generate mesh coordinates
     if ndims > 0: x = generate_mesh(rdict['x'])
     if ndims > 1: y = generate_mesh(rdict['y'])
     if ndims > 2: z = generate_mesh(rdict['z'])
 
-#   generate matrix and rhs
-    if ndims == 1:
-       a, b = matvec_1d(x, rdict['x'], rdict['force'], degen)
-    elif ndims == 2:
-       a, b = matvec_2d(x, y, rdict['x'], rdict['y'], rdict['force'], degen)
-    elif ndims == 3:
-       a, b = matvec_3d(x, y, z, rdict['x'], rdict['y'], rdict['z'], rdict['force'], degen)
+#   the operator only depends on the mesh and boundary types, reuse it if only bvalue or force change
+    hit = None
+    key = None
+    if xopts['cache']:
+       key = op_key(ndims, rdict, degen, order)
+       hit = op_load(xopts['cache'], key)
 
-#   reorder: solve PAP^{-1} Px = Pb where P is a permutation matrix, need to permute solution later
-    if order:
+    if hit is not None:
+       a, w, q, lu = hit
+       if q is None: q = sparse.identity(a.shape[0], format='csr')
+    else:
+       lu = None
+
+#      generate matrix and RHS basis, b = w.p
        if ndims == 1:
-          q, a, b  = reorder(a, b, len(x), 1, 1)
+          a, w = operator_1d(x, rdict['x'], degen)
        elif ndims == 2:
-          q, a, b = reorder(a, b, len(x), len(y), 1)
+          a, w = operator_2d(x, y, rdict['x'], rdict['y'], degen)
        elif ndims == 3:
-          q, a, b = reorder(a, b, len(x), len(y), len(z))
-    else:
-       q = np.identity(np.shape(a)[0])
+          a, w = operator_3d(x, y, z, rdict['x'], rdict['y'], rdict['z'], degen,
+                             xopts['nproc'] if xopts['slab'] or plan.get('assemble') == 'slab' else None)
+
+       if not sparse.issparse(a):
+          with np.printoptions(precision=2, suppress=True, linewidth=100):
+             print(a)
+
+#      reorder: solve PAP^{-1} Px = Pb where P is a permutation matrix, need to permute solution later
+       if order:
+          if plan.get('reorder') == 'sparse': a = csr_matrix(a)
+          if ndims == 1:
+             q, a, w = reorder(a, w, len(x), 1, 1)
+          elif ndims == 2:
+             q, a, w = reorder(a, w, len(x), len(y), 1)
+          elif ndims == 3:
+             q, a, w = reorder(a, w, len(x), len(y), len(z))
+       else:
+          q = sparse.identity(np.shape(a)[0], format='csr')
+
+#   generate rhs from boundary values and force
+    b = np.dot(w, rhs_params([rdict[xyz] for xyz in ('x', 'y', 'z')[:ndims]], rdict['force']))
 
 #   solve (scipy sparse linalg solver is more reliable than numpy linalg lin.solve(a,b))
     SP = csr_matrix(a)
-    s  = spsolve(SP, b)
-    status = np.allclose(np.dot(a, s), b)
+    if xopts['mg'] or plan.get('solve') == 'mg':
+       if ndims == 1:
+          meshes = [x]
+       elif ndims == 2:
+          meshes = [x, y]
+       elif ndims == 3:
+          meshes = [x, y, z]
+       levels = mg_hierarchy(SP, meshes, q if order else None)
+       s, info, its = mg_solve(levels, b)
+       print("multigrid solve levels =", len(levels), "iterations =", its, "info =", info)
+    elif xopts['mixed'] or plan.get('solve') == 'mixed':
+       s, conv, its = mixed_solve(SP, b)
+       print("mixed precision solve refinement steps =", its, "converged =", conv)
+    elif xopts['cache']:
+       if lu is None: lu = op_factor(key, SP)
+       s  = op_solve(lu, SP, b)
+    else:
+       s  = spsolve(SP, b)
+    status = np.allclose(SP @ s, b)
     print("solution status = ", status)
 
+    if xopts['cache'] and hit is None:
+       op_save(xopts['cache'], key, SP, w, q if order else None, lu)
+
+#   Hermitian embedding uses the solution of the (reordered) system, the extraction map applies Q
+    if xopts['herm']:
+       h, bh, xh, e = hermitian_embed(a, b, s, q if order else None)
+
+#   row blocks are of the (reordered) system, so keep its solution
+    if xopts['part']:
+       parts = partition(a, xopts['part'])
+       sr = s
+
 #   permute solution
     if order:
-       s = np.matmul(q, s)
+       s = q @ s
 
-#   save python npz and C binary files
-    case_save_npz(a, b, s, q, status, degen, order, casename)
-    case_save_bin(a, b, s, q, status, degen, order, casename)
+#   save python npz and C binary files, only the RHS and solution if the operator was reused
+#   and the matrix files of this case name were written from the same operator
+    saved = stats_load(case_name(casename, degen, order)) if hit is not None else None
+    if saved is not None and saved.get('opkey') == key and os.path.isfile(case_name(casename, degen, order) + '_mat.npz'):
+       save_async(case_save_rhs, b, s, status, degen, order, casename)
+    else:
+       if hit is not None: print('\nsaved matrix files are not from the cached operator, rewriting them')
+       save_async(case_save_npz, a, b, s, q, status, degen, order, casename, key)
+       save_async(case_save_bin, a, b, s, q, status, degen, order, casename)
+
+    if xopts['herm']:
+       cname = case_name(casename, degen, order)
+       save_async(herm_save_npz, h, bh, xh, e, status, cname)
+       save_async(herm_save_bin, h, bh, xh, e, status, cname)
+
+#   Pauli decomposition of the (reordered) matrix
+    if xopts['pauli']:
+       px, pz, pc, nq = pauli_decompose(a, xopts['ptol'])
+       save_async(pauli_save, px, pz, pc, nq, case_name(casename, degen, order))
+
+#   diagonal format, falls back to the CSR files if there are too many diagonals
+    if xopts['dia']:
+       offsets, ddata = dia_from_csr(a, xopts['maxdiag'])
+       if offsets is not None:
+          save_async(dia_save_npz, offsets, ddata, a.shape, case_name(casename, degen, order))
+          save_async(dia_save_bin, offsets, ddata, a.shape, case_name(casename, degen, order))
+
+#   fixed width ELLPACK tables for sparse access oracles
+    if xopts['ell']:
+       ecols, evals = ell_from_csr(a)
+       save_async(ell_save_npz, ecols, evals, a.shape, case_name(casename, degen, order))
+       save_async(ell_save_bin, ecols, evals, a.shape, case_name(casename, degen, order))
+
+#   quantized tensor train cores, the matrix MPO is built from its diagonals
+    if xopts['qtt']:
+       qtts, nq = qtt_decompose(a, b, s if status else None, xopts['qtol'])
+       save_async(qtt_save, qtts, nq, case_name(casename, degen, order))
+
+#   amplitude encoding of the (reordered) RHS padded to 2^q
+    if xopts['prep']:
+       save_async(prep_save, b, case_name(casename, degen, order))
+
+#   mesh and solution, in mesh order, for ParaView
+    if xopts['vtk'] and status:
+       save_async(vtk_save, x, y if ndims > 1 else None, z if ndims > 2 else None, s, case_name(casename, degen, order))
+
+#   restriction, prolongation and Galerkin coarse matrices for each level
+    if xopts['mg']:
+       save_async(mg_save, levels, case_name(casename, degen, order))
+
+#   row blocks with ghost columns and send lists for distributed solvers
+    if xopts['part']:
+       save_async(part_save, parts, b, sr, status, case_name(casename, degen, order))
 
 #   eigen analysis - use symmetrised Hernmitian matrix
-    if eigen:
+    if eigen and plan.get('eigen') == 'sparse':
+       print("\nestimating extreme eigenvalues:")
+       emin, emax = herm_extremes(a)
+       print("\tcondition number:  ",emax/emin if emin > 0 else np.inf)
+       print("\tmin abs eigenvalue:", emin)
+       print("\tmax abs eigenvalue:", emax)
+    elif eigen:
        print("\ncalculating eigenvalues:")
-       nt    = a.shape[0]
-       asym  = np.block([[np.zeros([nt,nt]),a],[np.transpose(a),np.zeros([nt,nt])]])
+       asym, _, _, _ = hermitian_embed(a, b)
 #      kappa = np.linalg.cond(asym)
-       evals = np.linalg.eigvals(asym)
+       evals = np.linalg.eigvalsh(asym.toarray())
        emin  = min(np.abs(evals))
        emax  = max(np.abs(evals))
        kappa = emax/emin
@@ -174,7 +375,23 @@ def laplace(argv):
        if ndims == 3:
           plotsol_3d(x, y, z, s, cut, status, psplt)
 
-    if mplot: plotmat(a, psplt)
+    if xopts['spng']:
+       if ndims == 1:
+          render_slices(x, None, None, s, cut, status, xopts['spng'], xopts['nproc'])
+       if ndims == 2:
+          render_slices(x, y, None, s, cut, status, xopts['spng'], xopts['nproc'])
+       if ndims == 3:
+          render_slices(x, y, z, s, cut, status, xopts['spng'], xopts['nproc'])
+
+    if mplot: plotmat(a, psplt, plan.get('plot') == 'binned')
+
+    if xopts['mpng']:
+       root, ext = os.path.splitext(xopts['mpng'])
+       plotmat_binned(a, root + '_den' + (ext or '.png'), xopts['bins'], xopts['window'], 'density')
+       plotmat_binned(a, root + '_max' + (ext or '.png'), xopts['bins'], xopts['window'], 'max')
+
+#   wait for the background writers started after the solve
+    if save_join(): sys.exit(5)
 
 ###########################################################
 #   call main                                             #
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix, load_npz
+
+###########################################################
+#   read sparse matrix from C binary file                 #
+###########################################################
+def read_mat_bin(filename, mmap=True):
+
+#   bool real flag, int64 nrow, ncol, nnz then values, columns and row starts
+    dims = np.fromfile(filename, dtype=np.int64, count=3, offset=1)
+    nr, nc, nnz = (int(d) for d in dims)
+
+    off = 25
+    if mmap:
+       rval = np.memmap(filename, dtype=np.double, mode='r', offset=off, shape=(nnz,))
+       col  = np.memmap(filename, dtype=np.int64,  mode='r', offset=off+8*nnz, shape=(nnz,))
+       rstt = np.memmap(filename, dtype=np.int64,  mode='r', offset=off+16*nnz, shape=(nr+1,))
+    else:
+       rval = np.fromfile(filename, dtype=np.double, count=nnz,  offset=off)
+       col  = np.fromfile(filename, dtype=np.int64,  count=nnz,  offset=off+8*nnz)
+       rstt = np.fromfile(filename, dtype=np.int64,  count=nr+1, offset=off+16*nnz)
+
+    return csr_matrix((rval, col, rstt), shape=(nr, nc), copy=False)
+
+###########################################################
+#   read vector from C binary file                        #
+###########################################################
+def read_vec_bin(filename, mmap=True):
+
+    nv = int(np.fromfile(filename, dtype=np.int64, count=1)[0])
+    if mmap:
+       return np.memmap(filename, dtype=np.double, mode='r', offset=8, shape=(nv,))
+    return np.fromfile(filename, dtype=np.double, count=nv, offset=8)
+
+###########################################################
+#   read matrix in L-QLES npz or binary format            #
+###########################################################
+def read_mat(filename):
+
+#   anything other than npz is taken to be a binary file, e.g. _mat.bin or cavity .mat
+    if filename.endswith('.npz'):
+       return load_npz(filename).tocsr()
+    return read_mat_bin(filename)
+
+###########################################################
+#   read vector in L-QLES npy or binary format            #
+###########################################################
+def read_vec(filename):
+
+    if filename.endswith('.npy'):
+       return np.load(filename, mmap_mode='r')
+    return read_vec_bin(filename)
+
+###########################################################
+#   case name from matrix file name                       #
+###########################################################
+def file_casename(filename):
+
+#   strip directory, extension and L-QLES _mat suffix
+    cname = os.path.splitext(os.path.basename(filename))[0]
+    if cname.endswith('_mat'): cname = cname[:-4]
+    return cname
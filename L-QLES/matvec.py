@@ -31,11 +31,20 @@
 #                                                                                               #
 #################################################################################################
 
+import os
 import numpy as np
+from   multiprocessing import Pool, shared_memory
+from   scipy.sparse import csr_matrix
 
 mij  = lambda i, j, ni:        i + ni*j
 mijk = lambda i, j, k, ni, nj: i + ni*j + ni*nj*k
 
+#   entries per row of the slab assembly: centre and six neighbours
+NSLOT = 7
+
+#   shared row arrays attached by each slab worker
+slab_state = {}
+
 ###########################################################
 #   check consistency of boundary conditions              #
 ###########################################################
@@ -54,11 +63,40 @@ def check_bcs(bcs, axis):
              'in', axis, 'direction' '\n')
        exit(1);
 
+###########################################################
+#   RHS parameters: boundary values then source term      #
+###########################################################
+def rhs_params(dicts, f):
+
+#   b = w.p where p holds the low and high boundary values in each direction followed by the force
+    p = []
+    for d in dicts:
+       bval = d["bvalue"].replace(" ", "").split(',') + ['', '']
+       p += [float(v) if v else 0.0 for v in bval[:2]]
+    p.append(f)
+    return np.array(p)
+
 ###########################################################
 #   generate 1D matrix and rhs, solution vectors          #
 ###########################################################
 def matvec_1d(x, xdict, f, degen):
 
+    a, w = operator_1d(x, xdict, degen)
+    b = np.dot(w, rhs_params([xdict], f))
+
+#   debug print
+#   print(np.get_printoptions())
+    with np.printoptions(precision=2, suppress=True, linewidth=100):
+       print(a)
+       print(b)
+
+    return a, b
+
+###########################################################
+#   generate 1D matrix and RHS basis b = w.p              #
+###########################################################
+def operator_1d(x, xdict, degen):
+
 #   check consistency of bcs
     bcs = xdict["btype"].replace(" ", "").split(',')
     check_bcs(bcs, 'x')
@@ -69,7 +107,7 @@ def matvec_1d(x, xdict, f, degen):
 #   initialise
     nx = len(x)
     a  = np.zeros(shape=(nx, nx))
-    b  = np.zeros(shape=(nx))
+    w  = np.zeros(shape=(nx, 3))
     dx = np.zeros(shape=(nx+1))
 
     for i in range(1, nx): dx[i] = x[i] - x[i-1]
@@ -105,10 +143,9 @@ def matvec_1d(x, xdict, f, degen):
          a[nx-1][nx-2] = -a[nx-1][nx-1]
 
 #   set RHS state - Symmetry is special case of Neumann with zero gradient
-    bval = xdict["bvalue"].replace(" ", "").split(',')
-    if bcs[0] != 'S': b[0]    = float(bval[0])*a[0][0]
-    if bcs[1] != 'S': b[nx-1] = float(bval[1])*a[nx-1][nx-1]
-    for i in range(1, nx-1): b[i] = f
+    if bcs[0] != 'S': w[0][0]    = a[0][0]
+    if bcs[1] != 'S': w[nx-1][1] = a[nx-1][nx-1]
+    for i in range(1, nx-1): w[i][2] = 1.0
 
 #   if degen is off, fix row i if matrix is degenerate
     if not degen:
@@ -116,25 +153,34 @@ def matvec_1d(x, xdict, f, degen):
           i = int(xdict["degfix"])
           a[i][i-1] = 0.0
           a[i][i+1] = 0.0
-          b[i]      = b[i]*a[i][i]
+          w[i]      = w[i]*a[i][i]
 
 #   scale to give ||a|| = 1.0 in max norm
     amax = np.amax(a)
     a = a/amax
-    b = b/amax
+    w = w/amax
+
+    return a, w
+
+###########################################################
+#   generate 2D matrix and rhs, solution vectors          #
+###########################################################
+def matvec_2d(x, y, xdict, ydict, f, degen):
+
+    a, w = operator_2d(x, y, xdict, ydict, degen)
+    b = np.dot(w, rhs_params([xdict, ydict], f))
 
 #   debug print
 #   print(np.get_printoptions())
     with np.printoptions(precision=2, suppress=True, linewidth=100):
        print(a)
-       print(b)
 
     return a, b
 
 ###########################################################
-#   generate 2D matrix and rhs, solution vectors          #
+#   generate 2D matrix and RHS basis b = w.p              #
 ###########################################################
-def matvec_2d(x, y, xdict, ydict, f, degen):
+def operator_2d(x, y, xdict, ydict, degen):
 
 #   check consistency of bcs
     bcx = xdict["btype"].replace(" ", "").split(',')
@@ -152,7 +198,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
     ny = len(y)
     n2 = nx*ny
     a  = np.zeros(shape=(n2, n2))
-    b  = np.zeros(shape=(n2))
+    w  = np.zeros(shape=(n2, 5))
     dx = np.zeros(shape=(nx+1))
     dy = np.zeros(shape=(ny+1))
 
@@ -164,9 +210,6 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
     dy[0]  = dy[1]
     dy[ny] = dy[ny-1]
 
-    bvx = xdict["bvalue"].replace(" ", "").split(',')
-    bvy = ydict["bvalue"].replace(" ", "").split(',')
-
 #   set Dirichet bcs as these take precedence
     for i in range(0, nx, nx-1):
        ib = int(i/(nx-1))
@@ -177,7 +220,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
              if a[m][m] == 0:
                 ay = 0.5*(dy[j] + dy[j+1])
                 a[m][m] = 2*ay/ax + ax/dy[j] + ax/dy[j+1]
-                b[m]    = float(bvx[ib])*a[m][m] 
+                w[m][ib]   = a[m][m]
 
     for j in range(0, ny, ny-1):
        jb = int(j/(ny-1))
@@ -188,7 +231,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
              if a[m][m] == 0:
                 ax = 0.5*(dx[i] + dx[i+1])
                 a[m][m] = 2*ax/ay + ay/dx[i] + ay/dx[i+1]
-                b[m]    = float(bvy[jb])*a[m][m]
+                w[m][2+jb] = a[m][m]
 
 #   set Neumann/Symmetry bcs next as these take precedence over repeating bcs
     for i in range(0, nx, nx-1):
@@ -202,7 +245,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
                 ay = 0.5*(dy[j] + dy[j+1])
                 a[m][m]    = 2*ay/ax + ax/dy[j] + ax/dy[j+1]
                 a[m][m+ia] = -a[m][m]
-                if bcx[ib] == 'N': b[m] = float(bvx[ib])*a[m][m]
+                if bcx[ib] == 'N': w[m][ib] = a[m][m]
 
     for j in range(0, ny, ny-1):
        jb = int(j/(ny-1))
@@ -215,7 +258,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
                 ax = 0.5*(dx[i] + dx[i+1])
                 a[m][m]       = 2*ax/ay + ay/dx[i] + ay/dx[i+1]
                 a[m][m+ja*nx] = -a[m][m]
-                if bcy[jb] == 'N': b[m] = float(bvy[jb])*a[m][m]
+                if bcy[jb] == 'N': w[m][2+jb] = a[m][m]
 
 #   set dx and dy for repeating bcs
     if repeatx:
@@ -255,7 +298,7 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
              a[m][ms] = -ax/dy[j]
              a[m][mn] = -ax/dy[j+1]
              a[m][m]  = -a[m][me] - a[m][mw] - a[m][ms] - a[m][mn]
-             b[m]     = f*ax*ay
+             w[m][4]  = ax*ay
 
 #   if degen is off, fix row mij(i,j,nx)  if matrix is degenerate
     if not degen:
@@ -273,25 +316,40 @@ def matvec_2d(x, y, xdict, ydict, f, degen):
              a[m][me] = 0.0
              a[m][ms] = 0.0
              a[m][mn] = 0.0
-             b[m]     = b[m]*a[m][m]
+             w[m]     = w[m]*a[m][m]
 
 
 #   scale to give ||a|| = 1.0 in max norm
     amax = np.amax(a)
     a = a/amax
-    b = b/amax
+    w = w/amax
+
+    return a, w
+
+###########################################################
+#   generate 3D matrix and rhs, solution vectors          #
+###########################################################
+def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen, nproc=None):
+
+    a, w = operator_3d(x, y, z, xdict, ydict, zdict, degen, nproc)
+    b = np.dot(w, rhs_params([xdict, ydict, zdict], f))
 
 #   debug print
 #   print(np.get_printoptions())
-    with np.printoptions(precision=2, suppress=True, linewidth=100):
-       print(a)
+    if nproc is None:
+       with np.printoptions(precision=3, suppress=True, linewidth=100):
+          print(a)
 
     return a, b
 
 ###########################################################
-#   generate 3D matrix and rhs, solution vectors          #
+#   generate 3D matrix and RHS basis b = w.p              #
 ###########################################################
-def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
+def operator_3d(x, y, z, xdict, ydict, zdict, degen, nproc=None):
+
+#   sparse assembly over k-slabs in nproc processes, 0 for all cores
+    if nproc is not None:
+       return slab_operator_3d(x, y, z, xdict, ydict, zdict, degen, nproc)
 
 #   check consistency of bcs
     bcx = xdict["btype"].replace(" ", "").split(',')
@@ -314,7 +372,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
     nz = len(z)
     n3 = nx*ny*nz
     a  = np.zeros(shape=(n3, n3))
-    b  = np.zeros(shape=(n3))
+    w  = np.zeros(shape=(n3, 7))
     dx = np.zeros(shape=(nx+1))
     dy = np.zeros(shape=(ny+1))
     dz = np.zeros(shape=(nz+1))
@@ -331,10 +389,6 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
     dz[0]  = dz[1]
     dz[nz] = dz[nz-1]
 
-    bvx = xdict["bvalue"].replace(" ", "").split(',')
-    bvy = ydict["bvalue"].replace(" ", "").split(',')
-    bvz = zdict["bvalue"].replace(" ", "").split(',')
-
 #   set Dirichet bcs as these take precedence
     for i in range(0, nx, nx-1):
        ib = int(i/(nx-1))
@@ -347,7 +401,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 m = mijk(i, j, k, nx, ny)
                 if a[m][m] == 0:
                    a[m][m] = 2*ay*az/ax + ax*az/dy[j] + ax*az/dy[j+1] + ax*ay/dz[k] + ax*ay/dz[k+1] 
-                   b[m]    = float(bvx[ib])*a[m][m]
+                   w[m][ib]   = a[m][m]
 
     for j in range(0, ny, ny-1):
        jb = int(j/(ny-1))
@@ -360,7 +414,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 m = mijk(i, j, k, nx, ny)
                 if a[m][m] == 0:
                    a[m][m] = 2*ax*az/ay + ay*az/dx[i] + ay*az/dx[i+1] + ax*ay/dz[k] + ax*ay/dz[k+1]
-                   b[m]    = float(bvy[jb])*a[m][m]
+                   w[m][2+jb] = a[m][m]
 
     for k in range(0, nz, nz-1):
        kb = int(k/(nz-1))
@@ -373,7 +427,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 m = mijk(i, j, k, nx, ny)
                 if a[m][m] == 0:
                    a[m][m] = 2*ax*ay/az + ay*az/dx[i] + ay*az/dx[i+1] + ax*az/dy[j] + ax*az/dy[j+1]
-                   b[m]    = float(bvz[kb])*a[m][m]
+                   w[m][4+kb] = a[m][m]
 
 #   set Neumann/Symmetry bcs next as these take precedence over repeating bcs
     for i in range(0, nx, nx-1):
@@ -389,7 +443,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 if a[m][m] == 0:
                    a[m][m] = 2*ay*az/ax + ax*az/dy[j] + ax*az/dy[j+1] + ax*ay/dz[k] + ax*ay/dz[k+1]
                    a[m][mijk(i+ia, j, k, nx, ny)] = -a[m][m]
-                   if bcx[ib] == 'N': b[m] = float(bvx[ib])*a[m][m]
+                   if bcx[ib] == 'N': w[m][ib] = a[m][m]
 
     for j in range(0, ny, ny-1):
        jb = int(j/(ny-1))
@@ -404,7 +458,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 if a[m][m] == 0:
                    a[m][m] = 2*ax*az/ay + ay*az/dx[i] + ay*az/dx[i+1] + ax*ay/dz[k] + ax*ay/dz[k+1]
                    a[m][mijk(i, j+ja, k, nx, ny)] = -a[m][m]
-                   if bcy[jb] == 'N': b[m] = float(bvy[jb])*a[m][m]
+                   if bcy[jb] == 'N': w[m][2+jb] = a[m][m]
 
     for k in range(0, nz, nz-1):
        kb = int(k/(nz-1))
@@ -419,7 +473,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 if a[m][m] == 0:
                    a[m][m] = 2*ax*ay/az + ay*az/dx[i] + ay*az/dx[i+1] + ax*az/dy[j] + ax*az/dy[j+1]
                    a[m][mijk(i, j, k+ka, nx, ny)] = -a[m][m]
-                   if bcy[jb] == 'N': b[m] = float(bvz[kb])*a[m][m]
+                   if bcz[kb] == 'N': w[m][4+kb] = a[m][m]
 
 #   set dx, dy, dz for repeating bcs
     if repeatx:
@@ -474,7 +528,7 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 a[m][md] = -ax*ay/dz[k]
                 a[m][mu] = -ax*ay/dz[k+1]
                 a[m][m]  = -a[m][me] - a[m][mw] - a[m][ms] - a[m][mn] - a[m][md] - a[m][mu]
-                b[m]     = f*ax*ay*az
+                w[m][6]  = ax*ay*az
 
 #   if degen is off, fix row mijk(i,j,k, nx, ny)  if matrix is degenerate
     if not degen:
@@ -497,17 +551,205 @@ def matvec_3d(x, y, z, xdict, ydict, zdict, f, degen):
                 a[m][mn] = 0.0
                 a[m][md] = 0.0
                 a[m][mu] = 0.0
-                b[m]     = b[m]*a[m][m]
+                w[m]     = w[m]*a[m][m]
 
 #   scale to give ||a|| = 1.0 in max norm
     amax = np.amax(a)
     a = a/amax
-    b = b/amax
+    w = w/amax
 
-#   debug print
-#   print(np.get_printoptions())
-    with np.printoptions(precision=3, suppress=True, linewidth=100):
-       print(a)
+    return a, w
 
-    return a, b
+###########################################################
+#   cell spacings, original and with repeating bcs        #
+###########################################################
+def spacings(x, repeat):
+
+    n  = len(x)
+    d0 = np.zeros(shape=(n+1))
+    d0[1:n] = x[1:] - x[:-1]
+    d0[0]   = d0[1]
+    d0[n]   = d0[n-1]
+
+#   boundary rows use the original spacings, interior rows the repeating ones
+    dr = d0.copy()
+    if repeat:
+       dr[0] = d0[n-1]
+       dr[n] = d0[1]
+    return d0, dr
+
+###########################################################
+#   assemble rows of k-slab into fixed width row arrays   #
+###########################################################
+def slab_rows(geo, k0, k1, cols, vals, w):
+
+    nx, ny, nz = geo['n']
+    bcs = geo['bcs']
+    dx, dy, dz = geo['d0']
+    ex, ey, ez = geo['dr']
+
+    K, J, I = np.meshgrid(np.arange(k0, k1), np.arange(ny), np.arange(nx), indexing='ij')
+    I = I.ravel()
+    J = J.ravel()
+    K = K.ravel()
+    m   = I + nx*J + nx*ny*K
+    ijk = (I, J, K)
+    nn  = (nx, ny, nz)
+    st  = (1, nx, nx*ny)
+
+#   row type set with lowest precedence first: 0 interior, 1-3 Neumann/Symmetry x,y,z, 4-6 Dirichlet x,y,z
+    t = np.zeros(len(m), dtype=np.int8)
+    for base, types in ((1, 'NS'), (4, 'D')):
+       for d in (2, 1, 0):
+          for side in (1, 0):
+             if bcs[d][side] in types:
+                t[ijk[d] == side*(nn[d]-1)] = base + d
+
+    c = np.full((len(m), NSLOT), -1, dtype=np.int64)
+    v = np.zeros((len(m), NSLOT))
+    r = np.zeros((len(m), 7))
+    c[:, 0] = m
+
+#   boundary rows, same expressions as the dense assembly
+    for d in (0, 1, 2):
+       for base in (1, 4):
+          sel = np.nonzero(t == base + d)[0]
+          if len(sel) == 0: continue
+          i, j, k = I[sel], J[sel], K[sel]
+          ax = 0.5*(dx[i] + dx[i+1])
+          ay = 0.5*(dy[j] + dy[j+1])
+          az = 0.5*(dz[k] + dz[k+1])
+          if d == 0:
+             ax = dx[i]
+             diag = 2*ay*az/ax + ax*az/dy[j] + ax*az/dy[j+1] + ax*ay/dz[k] + ax*ay/dz[k+1]
+          elif d == 1:
+             ay = dy[j]
+             diag = 2*ax*az/ay + ay*az/dx[i] + ay*az/dx[i+1] + ax*ay/dz[k] + ax*ay/dz[k+1]
+          else:
+             az = dz[k]
+             diag = 2*ax*ay/az + ay*az/dx[i] + ay*az/dx[i+1] + ax*az/dy[j] + ax*az/dy[j+1]
+          v[sel, 0] = diag
+
+          side = (ijk[d][sel] != 0).astype(np.int64)
+          if base == 4:
+             r[sel, 2*d+side] = diag
+          else:
+             c[sel, 1] = m[sel] + (1-2*side)*st[d]
+             v[sel, 1] = -diag
+             for s in (0, 1):
+                if bcs[d][s] == 'N':
+                   r[sel[side == s], 2*d+s] = diag[side == s]
+
+#   interior rows, neighbours wrap around for repeating bcs
+    sel = np.nonzero(t == 0)[0]
+    if len(sel):
+       i, j, k = I[sel], J[sel], K[sel]
+       ax = 0.5*(ex[i] + ex[i+1])
+       ay = 0.5*(ey[j] + ey[j+1])
+       az = 0.5*(ez[k] + ez[k+1])
+       vw = -ay*az/ex[i]
+       ve = -ay*az/ex[i+1]
+       vs = -ax*az/ey[j]
+       vn = -ax*az/ey[j+1]
+       vd = -ax*ay/ez[k]
+       vu = -ax*ay/ez[k+1]
+       ms = m[sel]
+       c[sel, 1] = ms + ((i-1) % nx - i)
+       c[sel, 2] = ms + ((i+1) % nx - i)
+       c[sel, 3] = ms + ((j-1) % ny - j)*nx
+       c[sel, 4] = ms + ((j+1) % ny - j)*nx
+       c[sel, 5] = ms + ((k-1) % nz - k)*nx*ny
+       c[sel, 6] = ms + ((k+1) % nz - k)*nx*ny
+       v[sel, 0] = -ve - vw - vs - vn - vd - vu
+       v[sel, 1:] = np.stack((vw, ve, vs, vn, vd, vu), axis=1)
+       r[sel, 6] = ax*ay*az
+
+    m0, m1 = nx*ny*k0, nx*ny*k1
+    cols[m0:m1] = c
+    vals[m0:m1] = v
+    w[m0:m1]    = r
+
+###########################################################
+#   attach worker process to shared row arrays            #
+###########################################################
+def slab_init(geo, names, n3):
+
+    slab_state['geo'] = geo
+    slab_state['shm'] = [shared_memory.SharedMemory(name=nm) for nm in names]
+    cols, vals, w = (shm.buf for shm in slab_state['shm'])
+    slab_state['cols'] = np.ndarray((n3, NSLOT), dtype=np.int64, buffer=cols)
+    slab_state['vals'] = np.ndarray((n3, NSLOT), dtype=np.double, buffer=vals)
+    slab_state['w']    = np.ndarray((n3, 7),     dtype=np.double, buffer=w)
+
+def slab_task(kk):
+    slab_rows(slab_state['geo'], kk[0], kk[1], slab_state['cols'], slab_state['vals'], slab_state['w'])
+
+###########################################################
+#   sparse 3D matrix and RHS basis assembled over k-slabs #
+###########################################################
+def slab_operator_3d(x, y, z, xdict, ydict, zdict, degen, nproc=0):
+
+#   check consistency of bcs
+    bcx = xdict["btype"].replace(" ", "").split(',')
+    bcy = ydict["btype"].replace(" ", "").split(',')
+    bcz = zdict["btype"].replace(" ", "").split(',')
+    check_bcs(bcx, 'x')
+    check_bcs(bcy, 'y')
+    check_bcs(bcz, 'z')
 
+    nx = len(x)
+    ny = len(y)
+    nz = len(z)
+    n3 = nx*ny*nz
+    dx = spacings(x, bcx[0] == 'R')
+    dy = spacings(y, bcy[0] == 'R')
+    dz = spacings(z, bcz[0] == 'R')
+    geo = {'n': (nx, ny, nz), 'bcs': (bcx, bcy, bcz),
+           'd0': (dx[0], dy[0], dz[0]), 'dr': (dx[1], dy[1], dz[1])}
+
+#   several slabs per process to balance the load
+    if nproc <= 0: nproc = os.cpu_count() or 1
+    nproc  = min(nproc, nz)
+    nslab  = min(nz, 4*nproc)
+    kb     = np.linspace(0, nz, nslab+1).astype(int)
+    slabs  = list(zip(kb[:-1], kb[1:]))
+
+#   each slab writes its own rows of the shared arrays so no stitching is needed
+    shms = []
+    try:
+       if nproc > 1:
+          for size in (8*n3*NSLOT, 8*n3*NSLOT, 8*n3*7):
+             shms.append(shared_memory.SharedMemory(create=True, size=size))
+          cols = np.ndarray((n3, NSLOT), dtype=np.int64,  buffer=shms[0].buf)
+          vals = np.ndarray((n3, NSLOT), dtype=np.double, buffer=shms[1].buf)
+          w    = np.ndarray((n3, 7),     dtype=np.double, buffer=shms[2].buf)
+          with Pool(nproc, initializer=slab_init, initargs=(geo, [s.name for s in shms], n3)) as pool:
+             pool.map(slab_task, slabs, chunksize=1)
+       else:
+          cols = np.empty((n3, NSLOT), dtype=np.int64)
+          vals = np.empty((n3, NSLOT))
+          w    = np.empty((n3, 7))
+          for k0, k1 in slabs: slab_rows(geo, k0, k1, cols, vals, w)
+
+#      if degen is off, fix row mijk(i,j,k, nx, ny)  if matrix is degenerate
+       if not degen:
+          if 'D' not in bcx and 'D' not in bcy and 'D' not in bcz:
+             m = mijk(int(xdict["degfix"]), int(ydict["degfix"]), int(zdict["degfix"]), nx, ny)
+             cols[m, 1:] = -1
+             w[m]        = w[m]*vals[m, 0]
+
+#      scale to give ||a|| = 1.0 in max norm
+       keep = cols >= 0
+       amax = np.amax(vals[keep])
+       rptr = np.zeros(n3+1, dtype=np.int64)
+       np.cumsum(np.count_nonzero(keep, axis=1), out=rptr[1:])
+       a = csr_matrix((vals[keep]/amax, cols[keep], rptr), shape=(n3, n3))
+       w = w/amax
+    finally:
+       for s in shms:
+          s.close()
+          s.unlink()
+
+    a.sum_duplicates()
+    a.eliminate_zeros()
+    return a, w
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import numpy as np
+from   scipy.sparse import csr_matrix, csc_matrix
+from   scipy.sparse.linalg import splu, spsolve
+
+#   refinement steps before falling back to a double precision factorisation
+MIXED_MAXIT = 30
+
+###########################################################
+#   float32 LU with float64 iterative refinement          #
+###########################################################
+def mixed_solve(a, b, maxiter=MIXED_MAXIT):
+
+    A = csr_matrix(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n = A.shape[0]
+
+#   single precision factors take half the memory of the double ones
+    try:
+       lu = splu(csc_matrix(A, dtype=np.float32))
+    except RuntimeError:
+       print('matrix is singular in single precision, using double precision solver')
+       return spsolve(A, b), False, 0
+
+#   stop on the normwise backward error used by LAPACK dsgesv, ||r|| < sqrt(n) eps ||A|| ||x||
+    anrm = abs(A).sum(axis=1).max()
+    eps  = np.finfo(np.float64).eps
+    x    = lu.solve(b.astype(np.float32)).astype(np.float64)
+
+    for its in range(maxiter+1):
+       r = b - A @ x
+       if not np.all(np.isfinite(r)): break
+       rnrm = np.abs(r).max()
+       if rnrm <= np.sqrt(n)*eps*anrm*np.abs(x).max() or rnrm == 0.0:
+          return x, True, its
+       if its == maxiter: break
+
+#      correction solved in single precision, residual and update kept in double
+       scale = rnrm
+       d = lu.solve((r/scale).astype(np.float32)).astype(np.float64)
+       x = x + scale*d
+
+    print('iterative refinement did not converge in', its, 'steps, using double precision solver')
+    return spsolve(A, b), False, its
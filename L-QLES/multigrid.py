@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix, kron, diags, save_npz
+from   scipy.sparse.linalg import splu, bicgstab, LinearOperator
+
+from save import save_mat_bin
+
+#   stop coarsening at this many unknowns
+MG_NMIN = 64
+
+###########################################################
+#   1D linear prolongation on non-uniform mesh            #
+###########################################################
+def prolong_1d(x):
+
+#   coarse mesh is every other point plus the last point so both boundaries are kept
+    nf = len(x)
+    ic = np.unique(np.append(np.arange(0, nf, 2), nf-1))
+    xc = x[ic]
+    nc = len(ic)
+
+#   interpolate each fine point from the coarse points either side
+    k  = np.clip(np.searchsorted(xc, x, side='right') - 1, 0, nc-2)
+    w  = (x - xc[k])/(xc[k+1] - xc[k])
+    rows = np.concatenate((np.arange(nf), np.arange(nf)))
+    cols = np.concatenate((k, k+1))
+    vals = np.concatenate((1-w, w))
+    p = csr_matrix((vals, (rows, cols)), shape=(nf, nc))
+    p.eliminate_zeros()
+    return p, xc
+
+###########################################################
+#   geometric hierarchy with Galerkin coarse matrices     #
+###########################################################
+def mg_hierarchy(a, meshes, q=None, nmin=MG_NMIN):
+
+#   levels[l] = (A_l, P_l) with P_l prolonging level l to l-1, P_0 = None
+#   unknown index is i + nx*j + nx*ny*k so P = Pz x Py x Px
+    A = csr_matrix(a)
+    levels = [(A, None)]
+    meshes = list(meshes)
+
+    while A.shape[0] > nmin and max(len(m) for m in meshes) > 3:
+       ps = []
+       for d, m in enumerate(meshes):
+          if len(m) > 3:
+             p, meshes[d] = prolong_1d(m)
+          else:
+             p = diags(np.ones(len(m)), format='csr')
+          ps.append(p)
+       P = ps[0]
+       for p in ps[1:]: P = kron(p, P, format='csr')
+
+#      reordered system is Q^T A Q so the fine level prolongation is Q^T P
+       if len(levels) == 1 and q is not None:
+          P = csr_matrix(csr_matrix(q).T @ P)
+
+       A = csr_matrix(P.T @ A @ P)
+       levels.append((A, P))
+
+    return levels
+
+###########################################################
+#   damped Jacobi smoother                                #
+###########################################################
+def smooth(A, dinv, b, x, nu, omega=0.8):
+    for i in range(nu):
+       x = x + omega*dinv*(b - A @ x)
+    return x
+
+###########################################################
+#   V-cycle                                               #
+###########################################################
+def vcycle(levels, dinvs, lu, b, l=0, nu=2):
+
+    A = levels[l][0]
+    if l == len(levels)-1:
+       return lu.solve(b)
+
+    x = smooth(A, dinvs[l], b, np.zeros_like(b), nu)
+    r = b - A @ x
+    P = levels[l+1][1]
+    x = x + P @ vcycle(levels, dinvs, lu, P.T @ r, l+1, nu)
+    return smooth(A, dinvs[l], b, x, nu)
+
+###########################################################
+#   V-cycle preconditioned BiCGStab solve                 #
+###########################################################
+def mg_solve(levels, b, tol=1e-12, maxiter=200):
+
+    dinvs = [1.0/A.diagonal() for A, P in levels[:-1]]
+    lu    = splu(levels[-1][0].tocsc())
+    n     = levels[0][0].shape[0]
+    M     = LinearOperator((n, n), matvec=lambda r: vcycle(levels, dinvs, lu, r))
+
+    its = [0]
+    def count(xk): its[0] += 1
+
+    x, info = bicgstab(levels[0][0], b, rtol=tol, atol=0.0, maxiter=maxiter, M=M, callback=count)
+    return x, info, its[0]
+
+###########################################################
+#   save hierarchy to npz and binary files                #
+###########################################################
+def mg_save(levels, cname):
+
+    print('\nsaving multigrid hierarchy with', len(levels), 'levels:',
+          ' '.join(str(A.shape[0]) for A, P in levels))
+    files = []
+    for l in range(1, len(levels)):
+       A, P = levels[l]
+       for tag, m in (('mat', A), ('pro', P), ('res', csr_matrix(P.T))):
+          filename = cname + '_mg%d_%s' % (l, tag)
+          print('saving level', l, tag, 'matrix to files:', filename + '.npz', filename + '.bin')
+          save_npz(filename + '.npz', m)
+          save_mat_bin(filename + '.bin', m)
+          files += [filename + '.npz', filename + '.bin']
+    return sum(os.path.getsize(f) for f in files)
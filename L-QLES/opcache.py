@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import json
+import hashlib
+import numpy as np
+from   scipy.sparse import csr_matrix, csc_matrix
+from   scipy.sparse.linalg import splu, spsolve, spsolve_triangular
+
+#   bump if the operator assembly changes so old cache entries are ignored
+OP_VERSION = 1
+
+#   factorisations kept in memory for repeated RHS within one process
+lu_memo = {}
+
+###########################################################
+#   hash of the parameters that define the operator       #
+###########################################################
+def op_key(ndims, rdict, degen, order):
+
+#   everything except the boundary values and force determines the matrix
+    mdict = {}
+    for xyz in ('x', 'y', 'z')[:ndims]:
+       mdict[xyz] = {k: v for k, v in rdict[xyz].items() if k != 'bvalue'}
+    text = json.dumps({'version': OP_VERSION, 'ndims': ndims, 'mesh': mdict,
+                       'degen': bool(degen), 'order': bool(order)}, sort_keys=True)
+
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+###########################################################
+#   LU factorisation, memoised on operator key            #
+###########################################################
+def op_factor(key, a):
+
+    if key in lu_memo: return lu_memo[key]
+
+    try:
+       lu = splu(csc_matrix(a))
+    except RuntimeError:
+       print('matrix is singular, factorisation is not cached')
+       return None
+
+    lu_memo[key] = lu
+    return lu
+
+###########################################################
+#   solve with SuperLU object or cached factors           #
+###########################################################
+def op_solve(lu, a, b):
+
+    if lu is None:
+       return spsolve(csr_matrix(a), b)
+    if not isinstance(lu, tuple):
+       return lu.solve(b)
+
+#   Pr A Pc = L U so x = Pc U^-1 L^-1 Pr b
+    L, U, perm_r, perm_c = lu
+    y = np.empty_like(b)
+    y[perm_r] = b
+    y = spsolve_triangular(L, y, lower=True, unit_diagonal=True)
+    y = spsolve_triangular(U, y, lower=False)
+    return y[perm_c]
+
+###########################################################
+#   save operator, RHS basis, reordering and factors      #
+###########################################################
+def op_save(cdir, key, a, w, q, lu):
+
+    os.makedirs(cdir, exist_ok=True)
+    filename = os.path.join(cdir, key + '.npz')
+    print('\nsaving operator to cache file:', filename)
+
+    a = csr_matrix(a)
+    arrays = {'shape': np.array(a.shape), 'data': a.data, 'indices': a.indices, 'indptr': a.indptr, 'w': w}
+    if q is not None:
+       q = csr_matrix(q)
+       arrays.update(q_data=q.data, q_indices=q.indices, q_indptr=q.indptr)
+    if lu is not None:
+       if isinstance(lu, tuple):
+          L, U, perm_r, perm_c = lu
+       else:
+          L, U, perm_r, perm_c = lu.L.tocsr(), lu.U.tocsr(), lu.perm_r, lu.perm_c
+       arrays.update(L_data=L.data, L_indices=L.indices, L_indptr=L.indptr,
+                     U_data=U.data, U_indices=U.indices, U_indptr=U.indptr,
+                     perm_r=perm_r, perm_c=perm_c)
+    np.savez(filename, **arrays)
+
+###########################################################
+#   load operator from cache, None if not found           #
+###########################################################
+def op_load(cdir, key):
+
+    filename = os.path.join(cdir, key + '.npz')
+    if not os.path.isfile(filename): return None
+    print('\nreading operator from cache file:', filename)
+
+    with np.load(filename) as f:
+       shape = tuple(f['shape'])
+       a = csr_matrix((f['data'], f['indices'], f['indptr']), shape=shape)
+       w = f['w']
+       q = None
+       if 'q_data' in f:
+          q = csr_matrix((f['q_data'], f['q_indices'], f['q_indptr']), shape=shape)
+       lu = lu_memo.get(key)
+       if lu is None and 'L_data' in f:
+          L  = csr_matrix((f['L_data'], f['L_indices'], f['L_indptr']), shape=shape)
+          U  = csr_matrix((f['U_data'], f['U_indices'], f['U_indptr']), shape=shape)
+          lu = (L, U, f['perm_r'], f['perm_c'])
+          lu_memo[key] = lu
+
+    return a, w, q, lu
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix
+
+from save import save_mat_bin
+
+###########################################################
+#   contiguous row ranges along the grid ordering         #
+###########################################################
+def part_bounds(n, p):
+    return np.linspace(0, n, p+1).astype(np.int64)
+
+###########################################################
+#   split matrix into row blocks with halo information    #
+###########################################################
+def partition(a, p):
+
+    s = csr_matrix(a)
+    n = s.shape[0]
+    if p > n:
+       print('\nonly', n, 'rows, using', n, 'blocks rather than', p)
+       p = n
+    bounds = part_bounds(n, p)
+
+#   local columns are the owned rows first then the ghost columns in ascending global order
+    parts = []
+    for r in range(p):
+       r0, r1 = int(bounds[r]), int(bounds[r+1])
+       blk = s[r0:r1]
+       col = blk.indices
+       own = (col >= r0) & (col < r1)
+       ghosts = np.unique(col[~own])
+       owners = np.searchsorted(bounds, ghosts, side='right') - 1
+
+       lcol = np.where(own, col - r0, (r1 - r0) + np.searchsorted(ghosts, col))
+       loc  = csr_matrix((blk.data, lcol, blk.indptr), shape=(r1 - r0, r1 - r0 + len(ghosts)))
+       loc.sort_indices()
+       parts.append({'rank': r, 'nparts': p, 'row0': r0, 'row1': r1, 'nglobal': n,
+                     'mat': loc, 'ghosts': ghosts.astype(np.int64), 'owners': owners.astype(np.int64)})
+
+#   send lists: local rows of block r that are ghosts of block q, grouped by q
+    for r, pr in enumerate(parts):
+       idx = []
+       ptr = [0]
+       for q in range(p):
+          pq = parts[q]
+          g  = pq['ghosts'][pq['owners'] == r]
+          idx.append(g - pr['row0'])
+          ptr.append(ptr[-1] + len(g))
+       pr['send_ptr'] = np.array(ptr, dtype=np.int64)
+       pr['send_idx'] = np.concatenate(idx).astype(np.int64)
+
+    return parts
+
+###########################################################
+#   file name of block r                                  #
+###########################################################
+def part_name(cname, p, r):
+    return cname + '_part%d_%04d' % (p, r)
+
+###########################################################
+#   save each row block to its own npz and binary file    #
+###########################################################
+def part_save(parts, b, x, status, cname):
+
+    p = len(parts)
+    nghost = sum(len(pr['ghosts']) for pr in parts)
+    print('\nsaving', p, 'row blocks with', nghost, 'ghost columns in total to files:',
+          part_name(cname, p, 0) + '.*', '...', part_name(cname, p, p-1) + '.*')
+
+    files = []
+    for pr in parts:
+       r0, r1 = pr['row0'], pr['row1']
+       bl = np.asarray(b[r0:r1], dtype=np.double)
+       xl = np.asarray(x[r0:r1], dtype=np.double) if status else np.zeros(0)
+       head = np.array([pr['nparts'], pr['rank'], r0, r1, pr['nglobal'],
+                        len(pr['ghosts']), len(pr['send_idx'])], dtype=np.int64)
+       filename = part_name(cname, p, pr['rank'])
+
+       m = pr['mat']
+       np.savez(filename + '.npz', head=head, data=m.data, indices=m.indices, indptr=m.indptr,
+                ghosts=pr['ghosts'], owners=pr['owners'],
+                send_ptr=pr['send_ptr'], send_idx=pr['send_idx'], rhs=bl, sol=xl)
+
+#      local CSR matrix as in _mat.bin, then the int64 header, ghosts, owners, send lists,
+#      then the local RHS and solution as in _rhs.bin, zero length solution if not found
+       save_mat_bin(filename + '.bin', m)
+       with open(filename + '.bin', "ab") as fp:
+          head.tofile(fp)
+          pr['ghosts'].tofile(fp)
+          pr['owners'].tofile(fp)
+          pr['send_ptr'].tofile(fp)
+          pr['send_idx'].tofile(fp)
+          for v in (bl, xl):
+             np.array([len(v)], dtype=np.int64).tofile(fp)
+             v.tofile(fp)
+       files += [filename + '.npz', filename + '.bin']
+
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   read one row block from npz or binary file            #
+###########################################################
+def part_load(filename, mmap=True):
+
+    if filename.endswith('.npz'):
+       d = dict(np.load(filename))
+       head = d['head']
+       nloc = int(head[3] - head[2])
+       mat  = csr_matrix((d['data'], d['indices'], d['indptr']), shape=(nloc, nloc + int(head[5])))
+    else:
+       nr, nc, nnz = (int(n) for n in np.fromfile(filename, dtype=np.int64, count=3, offset=1))
+       mode = 'r' if mmap else 'c'
+       raw  = np.memmap(filename, dtype=np.uint8, mode=mode)
+       off  = 25
+       def take(dtype, count):
+          nonlocal off
+          v = raw[off:off + 8*count].view(dtype)
+          off += 8*count
+          return v
+       data    = take(np.double, nnz)
+       indices = take(np.int64, nnz)
+       indptr  = take(np.int64, nr+1)
+       mat  = csr_matrix((data, indices, indptr), shape=(nr, nc))
+       head = take(np.int64, 7)
+       d = {'ghosts': take(np.int64, int(head[5])), 'owners': take(np.int64, int(head[5])),
+            'send_ptr': take(np.int64, int(head[0])+1), 'send_idx': take(np.int64, int(head[6]))}
+       d['rhs'] = take(np.double, int(take(np.int64, 1)[0]))
+       d['sol'] = take(np.double, int(take(np.int64, 1)[0]))
+
+    return {'rank': int(head[1]), 'nparts': int(head[0]), 'row0': int(head[2]), 'row1': int(head[3]),
+            'nglobal': int(head[4]), 'mat': mat, 'ghosts': d['ghosts'], 'owners': d['owners'],
+            'send_ptr': d['send_ptr'], 'send_idx': d['send_idx'], 'rhs': d['rhs'], 'sol': d['sol']}
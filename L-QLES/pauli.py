@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+from   scipy.sparse import csr_matrix, coo_matrix, identity, block_diag
+
+#   number of x masks transformed together, bounds the work array to NBATCH*2^q values
+NBATCH = 64
+
+###########################################################
+#   number of qubits for dimension n                      #
+###########################################################
+def nqubits(n):
+    return max(1, int(np.ceil(np.log2(n))))
+
+###########################################################
+#   pad matrix to 2^q with identity on the diagonal       #
+###########################################################
+def pad_matrix(a, nq=None):
+
+#   identity padding keeps the padded system non-singular with the padded RHS zero
+    s = csr_matrix(a)
+    n = s.shape[0]
+    if nq is None: nq = nqubits(n)
+    npad = 2**nq - n
+    if npad == 0: return s
+    return block_diag((s, identity(npad)), format='csr')
+
+###########################################################
+#   pad vector to 2^q with zeros                          #
+###########################################################
+def pad_vector(b, nq=None):
+
+    n = len(b)
+    if nq is None: nq = nqubits(n)
+    v = np.zeros(2**nq, dtype=np.result_type(b, np.double))
+    v[:n] = b
+    return v
+
+###########################################################
+#   bit count of integer array                            #
+###########################################################
+def popcount(v, nq):
+    c = np.zeros(v.shape, dtype=np.int64)
+    for k in range(nq): c += (v >> k) & 1
+    return c
+
+###########################################################
+#   in-place fast Walsh-Hadamard transform of rows        #
+###########################################################
+def fwht(w):
+
+    m, n = w.shape
+    h = 1
+    while h < n:
+       v = w.reshape(m, -1, 2, h)
+       t = v[:, :, 0, :] - v[:, :, 1, :]
+       v[:, :, 0, :] += v[:, :, 1, :]
+       v[:, :, 1, :]  = t
+       h *= 2
+    return w
+
+###########################################################
+#   Pauli decomposition A = sum c P(x,z)                  #
+###########################################################
+def pauli_decompose(a, tol=1e-12, nq=None):
+
+#   P(x,z) = i^|x&z| X^x Z^z, with bit k of the masks acting on qubit k, then
+#   c(x,z) = (-i)^|x&z| / N sum_j (-1)^(z.j) A[j^x, j], a Walsh-Hadamard transform
+#   for each distinct x = row^col present in A
+    s  = pad_matrix(a, nq).tocoo()
+    nq = nqubits(s.shape[0])
+    N  = 2**nq
+
+    rows = s.row.astype(np.int64)
+    cols = s.col.astype(np.int64)
+    vals = s.data
+    keep = vals != 0
+    rows, cols, vals = rows[keep], cols[keep], vals[keep]
+
+    xm, inv = np.unique(rows ^ cols, return_inverse=True)
+    cplx = np.iscomplexobj(vals)
+
+    xs = []
+    zs = []
+    cs = []
+    for ib in range(0, len(xm), NBATCH):
+       nb = min(NBATCH, len(xm) - ib)
+       sel = (inv >= ib) & (inv < ib + nb)
+       w = np.zeros((nb, N), dtype=vals.dtype)
+       w[inv[sel] - ib, cols[sel]] = vals[sel]
+       fwht(w)
+       w /= N
+
+       xb = np.repeat(xm[ib:ib+nb], N)
+       zb = np.tile(np.arange(N, dtype=np.int64), nb)
+       cb = w.ravel()
+       nz = cb != 0
+       xs.append(xb[nz])
+       zs.append(zb[nz])
+       cs.append(cb[nz])
+
+    x = np.concatenate(xs)
+    z = np.concatenate(zs)
+    c = np.concatenate(cs).astype(complex) * (-1j)**(popcount(x & z, nq) % 4)
+
+#   truncate relative to the largest coefficient
+    if len(c):
+       keep = np.abs(c) > tol*np.abs(c).max()
+       x, z, c = x[keep], z[keep], c[keep]
+    if not cplx and len(c) and np.all(c.imag == 0): c = c.real
+
+    return x, z, c, nq
+
+###########################################################
+#   Pauli string labels, leftmost character is qubit q-1  #
+###########################################################
+def pauli_labels(x, z, nq):
+
+    code = np.array(['I', 'X', 'Z', 'Y'])
+    bits = np.arange(nq-1, -1, -1)
+    xb = (x[:, None] >> bits) & 1
+    zb = (z[:, None] >> bits) & 1
+    return [''.join(r) for r in code[xb + 2*zb]]
+
+###########################################################
+#   rebuild sparse matrix from Pauli terms                #
+###########################################################
+def pauli_matrix(x, z, c, nq):
+
+#   P(x,z)[j^x, j] = i^|x&z| (-1)^(z.j)
+    N = 2**nq
+    j = np.arange(N, dtype=np.int64)
+    a = csr_matrix((N, N), dtype=complex)
+    for xx, zz, cc in zip(x, z, c):
+       ph = cc * 1j**(popcount(np.int64(xx & zz), nq) % 4) * (1 - 2*(popcount(zz & j, nq) % 2))
+       a += coo_matrix((ph, (j ^ xx, j)), shape=(N, N)).tocsr()
+    return a
+
+###########################################################
+#   save Pauli terms to npz and text files                #
+###########################################################
+def pauli_save(x, z, c, nq, cname):
+
+    filename = cname + '_pauli.npz'
+    print('\nsaving Pauli decomposition to npz file: ', filename, '(%d terms, %d qubits)' % (len(c), nq))
+    np.savez(filename, nqubits=nq, x=x, z=z, coeff=c)
+
+    filename = cname + '_pauli.txt'
+    print('saving Pauli decomposition to text file:', filename)
+    labels = pauli_labels(x, z, nq)
+    cc = np.asarray(c, dtype=complex)
+    with open(filename, "w") as fp:
+       fp.write('# %d qubits, %d terms: label real imag\n' % (nq, len(c)))
+       for l, v in zip(labels, cc):
+          fp.write('%s % .17e % .17e\n' % (l, v.real, v.imag))
+
+    files = [cname + '_pauli.npz', filename]
+    return sum(os.path.getsize(f) for f in files)
@@ -31,10 +31,22 @@
 #                                                                                               #
 #################################################################################################
 
+import os
 import numpy as np
-from scipy.sparse import csr_matrix
+from multiprocessing import get_context
+from scipy.sparse import csr_matrix, issparse
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
+from matplotlib.figure import Figure
+from matplotlib.colors import LogNorm
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+#   matrices above this size are binned rather than drawn element by element
+NBIN_MAX = 1024
+
+#   mesh plots with more lines than this in a direction are decimated
+MESH_MAX = 128
 
 ###########################################################
 #   plot 1d solution vector                               #
@@ -49,6 +61,79 @@ def plotsol_1d(x, s, status):
     plt.show()
     return
 
+###########################################################
+#   draw mesh lines as a single line collection           #
+###########################################################
+
+def plotmesh(ax, x, y, maxlines=MESH_MAX):
+
+#   mesh is rectilinear so each mesh line is a single segment, decimate dense meshes
+    xs = x[::max(1, -(-len(x)//maxlines))]
+    ys = y[::max(1, -(-len(y)//maxlines))]
+    if xs[-1] != x[-1]: xs = np.append(xs, x[-1])
+    if ys[-1] != y[-1]: ys = np.append(ys, y[-1])
+
+    segs = np.empty((len(xs)+len(ys), 2, 2))
+    segs[:len(xs), 0, 0] = xs
+    segs[:len(xs), 1, 0] = xs
+    segs[:len(xs), 0, 1] = y[0]
+    segs[:len(xs), 1, 1] = y[-1]
+    segs[len(xs):, 0, 0] = x[0]
+    segs[len(xs):, 1, 0] = x[-1]
+    segs[len(xs):, 0, 1] = ys
+    segs[len(xs):, 1, 1] = ys
+
+    ax.add_collection(LineCollection(segs, colors='blue', linewidths=0.5))
+    ax.set_xlim(x[0], x[-1])
+    ax.set_ylim(y[0], y[-1])
+    return
+
+###########################################################
+#   extract 2d slice of 3d solution without copying       #
+###########################################################
+
+def getslice(x, y, z, s, cut):
+
+#   cut is x, y or z, optionally followed by =index, default is mid-plane
+    nx = len(x)
+    ny = len(y)
+    nz = len(z)
+    U = s.reshape(nz, ny, nx)
+
+    d, _, p = cut.partition('=')
+    d = d.strip().lower()
+    try:
+       pp = int(p) if p else None
+    except ValueError:
+       pp = -1
+
+    if d == "x":
+       if pp is None: pp = int((nx+1)/2)
+       if not 0 <= pp < nx: pp = -1
+       xp, yp, up = y, z, U[:, :, pp]
+       xpl = "y-coordinate"
+       ypl = "z-coordinate"
+    elif d == "y":
+       if pp is None: pp = int((ny+1)/2)
+       if not 0 <= pp < ny: pp = -1
+       xp, yp, up = x, z, U[:, pp, :]
+       xpl = "x-coordinate"
+       ypl = "z-coordinate"
+    elif d == "z":
+       if pp is None: pp = int((nz+1)/2)
+       if not 0 <= pp < nz: pp = -1
+       xp, yp, up = x, y, U[pp, :, :]
+       xpl = "x-coordinate"
+       ypl = "y-coordinate"
+    else:
+       pp = -1
+
+    if pp < 0:
+       print("\ninvalid cut: ", cut)
+       return None
+
+    return xp, yp, up, xpl, ypl
+
 ###########################################################
 #   plot 2d solution field and mesh                       #
 ###########################################################
@@ -82,9 +167,7 @@ def plotsol_2d(x, y, s, status, splitp):
        ax = plt.subplot()
     ax.set_aspect('equal')
 
-    X, Y = np.meshgrid(x, y)
-    plt.plot(X,Y,  linestyle = 'solid',  color = 'blue');
-    plt.plot(np.transpose(X), np.transpose(Y), linestyle = 'solid',  color = 'blue');
+    plotmesh(ax, x, y)
     plt.title("Mesh", fontsize=14)
     plt.xlabel("x-coordinate")
     plt.ylabel("y-coordinate")
@@ -104,85 +187,238 @@ def plotsol_2d(x, y, s, status, splitp):
 
 def plotsol_3d(x, y, z, s, cut, status, splitp):
 
-#   get slice
-    nx = len(x)
-    ny = len(y)
-    nz = len(z)
-    U = s.reshape(nz, ny, nx)
-    X, Y, Z = np.meshgrid(z, y, x)
+#   get slices, cut can be a comma separated list
+    for c in cut.split(','):
+       sl = getslice(x, y, z, s, c)
+       if sl is None: continue
+       xp, yp, up, xpl, ypl = sl
 
-    if cut in ("x", "X"):
-       pp = int((nx+1)/2)
-       xp, yp = np.meshgrid(y, z)
-       up = U[:, :, pp]
-       xpl = "y-coordinate"
-       ypl = "z-coordinate"
-    elif cut in ("y", "Y"):
-       pp = int((ny+1)/2)
-       xp, yp = np.meshgrid(x, z)
-       up = U[:, pp, :]
-       xpl = "x-coordinate"
-       ypl = "z-coordinate"
-    elif cut in ("z", "Z"):
-       pp = int((nz+1)/2)
-       xp, yp = np.meshgrid(x, y)
-       up = U[pp, :, :]
-       xpl = "x-coordinate"
-       ypl = "y-coordinate"
+#      solution field
+       if not splitp:
+          fig = plt.figure(figsize=(12,6))
+          ax = plt.subplot(121)
+          ax.set_anchor('N')
+       else:
+          fig = plt.figure(figsize=(6,6));
+          ax = plt.subplot()
+       ax.set_aspect('equal')
+
+       plt.contourf(xp, yp, up)
+       clb=plt.colorbar(orientation = 'horizontal')
+       clb.set_label('Scalar values', fontsize=14);
+       plt.title("Scalar Field\n", fontsize=14)
+       plt.xlabel(xpl, fontsize=14)
+       plt.ylabel(ypl, fontsize=14)
+       if splitp: plt.show()
+
+#      mesh
+       if not splitp:
+          ax = plt.subplot(122)
+          ax.set_anchor('N')
+       else:
+          fig = plt.figure(figsize=(6,6));
+          ax = plt.subplot()
+       ax.set_aspect('equal')
+
+       plotmesh(ax, xp, yp)
+       plt.title("Mesh", fontsize=14)
+       plt.xlabel(xpl)
+       plt.ylabel(ypl)
+       plt.axis('off')
+#      plt.tight_layout()
+
+#      plot
+       if not splitp:
+          if not status: fig.suptitle ("Solution status = False")
+       plt.show()
+
+    return
+
+###########################################################
+#   render one solution slice and mesh to image file      #
+###########################################################
+
+def render_slice(task):
+
+    xp, yp, up, xpl, ypl, status, filename = task
+
+#   Agg canvas only, workers never touch pyplot or a display
+    fig = Figure(figsize=(12,6))
+    FigureCanvasAgg(fig)
+
+#   1D solution is a line plot
+    if yp is None:
+       ax = fig.add_subplot()
+       ax.plot(xp, up, 'o', linestyle = 'solid',  color = 'blue')
+       if not status: ax.set_title ("Solution status = False")
+       ax.set_xlabel(xpl)
+       ax.set_ylabel(ypl)
+       ax.grid()
+       fig.savefig(filename, dpi=150)
+       return filename
+
+    ax = fig.add_subplot(121)
+    ax.set_anchor('N')
+    ax.set_aspect('equal')
+    h = ax.contourf(xp, yp, up)
+    clb = fig.colorbar(h, ax=ax, orientation = 'horizontal')
+    clb.set_label('Scalar values', fontsize=14)
+    ax.set_title("Scalar Field\n", fontsize=14)
+    ax.set_xlabel(xpl, fontsize=14)
+    ax.set_ylabel(ypl, fontsize=14)
+
+    ax = fig.add_subplot(122)
+    ax.set_anchor('N')
+    ax.set_aspect('equal')
+    plotmesh(ax, xp, yp)
+    ax.set_title("Mesh", fontsize=14)
+    ax.axis('off')
+
+    if not status: fig.suptitle ("Solution status = False")
+    fig.savefig(filename, dpi=150)
+    return filename
+
+###########################################################
+#   render solution slices to image files in parallel     #
+###########################################################
+
+def render_slices(x, y, z, s, cut, status, prefix, nproc=0):
+
+#   build one task per slice, 1D and 2D cases have a single slice
+    root, ext = os.path.splitext(prefix)
+    if not ext: ext = '.png'
+
+    tasks = []
+    if y is None:
+       tasks.append((x, None, s, "Mesh coordinate", "scalar value", status, root + ext))
+    elif z is None:
+       tasks.append((x, y, s.reshape(len(y), len(x)), "x-coordinate", "y-coordinate",
+                     status, root + ext))
     else:
-       print("\ninvalid cut: ", cut)
-       return
+       for c in cut.split(','):
+          sl = getslice(x, y, z, s, c)
+          if sl is None: continue
+          tag = c.strip().lower().replace('=', '')
+          tasks.append(sl + (status, root + '_' + tag + ext))
 
-#   solution field
-    if not splitp:
-       fig = plt.figure(figsize=(12,6))
-       ax = plt.subplot(121)
-       ax.set_anchor('N')
+    if nproc <= 0: nproc = os.cpu_count() or 1
+    nproc = min(nproc, len(tasks))
+
+#   spawn rather than fork, the background writers may hold the stdout, numpy or BLAS locks
+    if nproc > 1:
+       with get_context('spawn').Pool(nproc) as pool:
+          files = pool.map(render_slice, tasks)
     else:
-       fig = plt.figure(figsize=(6,6));
-       ax = plt.subplot()
-    ax.set_aspect('equal')
+       files = [render_slice(t) for t in tasks]
 
-    plt.contourf(xp, yp, up)
-    clb=plt.colorbar(orientation = 'horizontal')
-    clb.set_label('Scalar values', fontsize=14);
-    plt.title("Scalar Field\n", fontsize=14)
-    plt.xlabel(xpl, fontsize=14)
-    plt.ylabel(ypl, fontsize=14)
-    if splitp: plt.show()
+    for f in files: print('saving solution plot to png file:', f)
+    return files
 
-#   mesh
-    if not splitp:
-       ax = plt.subplot(122)
-       ax.set_anchor('N')
+###########################################################
+#   bin sparse matrix non-zeros into image                #
+###########################################################
+def binmat(A, nbins=NBIN_MAX, window=None, mode='density', chunk=1<<22):
+
+#   window is (r0, r1, c0, c1) with half open ranges, default is whole matrix
+    S = csr_matrix(A)
+    nr, nc = S.shape
+    if window is None:
+       r0, r1, c0, c1 = 0, nr, 0, nc
     else:
-       fig = plt.figure(figsize=(6,6));
-       ax = plt.subplot()
-    ax.set_aspect('equal')
+       r0, r1, c0, c1 = window
+       r0 = max(r0, 0);  r1 = min(r1, nr)
+       c0 = max(c0, 0);  c1 = min(c1, nc)
+    if r1 <= r0 or c1 <= c0:
+       print('\ninvalid matrix window:', window)
+       return None, None
 
-    plt.plot(xp, yp,  linestyle = 'solid',  color = 'blue');
-    plt.plot(np.transpose(xp), np.transpose(yp), linestyle = 'solid',  color = 'blue');
-    plt.title("Mesh", fontsize=14)
-    plt.xlabel(xpl)
-    plt.ylabel(ypl)
-    plt.axis('off')
-#   plt.tight_layout()
+    nbr = min(nbins, r1-r0)
+    nbc = min(nbins, c1-c0)
+    img = np.zeros(nbr*nbc)
 
-#   plot
-    if not splitp:
-       if not status: fig.suptitle ("Solution status = False")
-    plt.show()
+#   single pass over CSR arrays in blocks of rows holding roughly chunk non-zeros
+    indptr = S.indptr
+    ra = r0
+    while ra < r1:
+       rb = int(np.searchsorted(indptr, indptr[ra] + chunk, side='right')) - 1
+       rb = min(max(rb, ra+1), r1)
+       pa = indptr[ra]
+       pb = indptr[rb]
+       rows = np.repeat(np.arange(ra, rb), np.diff(indptr[ra:rb+1]))
+       cols = S.indices[pa:pb]
+       vals = S.data[pa:pb]
+
+       keep = (cols >= c0) & (cols < c1) & (vals != 0)
+       ib = ((rows[keep] - r0)*nbr)//(r1-r0)
+       jb = ((cols[keep] - c0)*nbc)//(c1-c0)
+       flat = ib*nbc + jb
+
+       if mode == 'max':
+          np.maximum.at(img, flat, np.abs(vals[keep]))
+       else:
+          img += np.bincount(flat, minlength=nbr*nbc)
+       ra = rb
+
+    extent = (c0-0.5, c1-0.5, r1-0.5, r0-0.5)
+    return img.reshape(nbr, nbc), extent
 
+###########################################################
+#   plot binned matrix density or max magnitude           #
+###########################################################
+def plotmat_binned(A, filename=None, nbins=NBIN_MAX, window=None, mode='density'):
+
+    img, extent = binmat(A, nbins, window, mode)
+    if img is None: return
+
+    if mode == 'max':
+       label = 'Max absolute value in bin'
+       title = 'Matrix magnitudes'
+    else:
+       label = 'Non-zeros in bin'
+       title = 'Matrix sparsity pattern'
+
+#   use Agg canvas directly so no display is needed for file output
+    if filename:
+       fig = Figure(figsize=(7,6))
+       FigureCanvasAgg(fig)
+    else:
+       fig = plt.figure(figsize=(7,6))
+    ax = fig.add_subplot()
+
+    im = np.ma.masked_equal(img, 0)
+    pos = img[img > 0]
+    norm = LogNorm(vmin=pos.min(), vmax=pos.max()) if pos.size and pos.max() > pos.min() else None
+    h = ax.imshow(im, interpolation='nearest', extent=extent, aspect='auto', norm=norm, cmap='viridis')
+    clb = fig.colorbar(h, ax=ax)
+    clb.set_label(label)
+    ax.set_title(title + '\n', fontsize=14)
+    ax.set_xlabel('column')
+    ax.set_ylabel('row')
+    fig.tight_layout()
+
+    if filename:
+       print('saving matrix plot to png file:', filename)
+       fig.savefig(filename, dpi=150)
+    else:
+       plt.show()
     return
 
 ###########################################################
 #   plot matrix                                           #
 ###########################################################
-def plotmat(A, splitp):
+def plotmat(A, splitp, binned=False):
+
+#   large matrices, or if --max-mem has no room for the dense image, are binned as imshow and spy work element by element
+    if binned or max(A.shape) > NBIN_MAX:
+       plotmat_binned(A, None, NBIN_MAX, None, 'max')
+       plotmat_binned(A, None, NBIN_MAX, None, 'density')
+       return
+
     if not splitp:
        fig = plt.figure(figsize=(12,6))
        ax = plt.subplot(121)
-    plt.imshow(A,interpolation='none');
+#   small sparse matrices, e.g. from --slab, --cache or a sparse --max-mem plan, are plotted dense
+    plt.imshow(A.toarray() if issparse(A) else A,interpolation='none');
     clb=plt.colorbar();
     clb.set_label('Matrix elements values');
     plt.title('Matrix values',fontsize=16)
@@ -0,0 +1,293 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+
+from dia   import dia_from_csr
+from pauli import nqubits, pad_vector
+
+#   relative Frobenius truncation error and the most diagonals built into an MPO
+QTT_TOL     = 1e-10
+QTT_MAXDIAG = 64
+
+###########################################################
+#   smallest rank with discarded singular values < delta  #
+###########################################################
+def trunc_rank(s, delta):
+    tail = np.sqrt(np.cumsum(s[::-1]**2))[::-1]
+    return max(1, int(np.count_nonzero(tail > delta)))
+
+###########################################################
+#   TT-SVD of tensor with the given mode sizes            #
+###########################################################
+def tt_svd(t, modes, tol=QTT_TOL):
+
+    d = len(modes)
+    delta = tol*np.linalg.norm(t)/np.sqrt(max(d-1, 1))
+    cores = []
+    r = 1
+    c = np.asarray(t, dtype=np.double).reshape(-1)
+    for k in range(d-1):
+       c = c.reshape(r*modes[k], -1)
+       u, s, vt = np.linalg.svd(c, full_matrices=False)
+       rk = trunc_rank(s, delta)
+       cores.append(u[:, :rk].reshape(r, modes[k], rk))
+       c = s[:rk, None]*vt[:rk]
+       r = rk
+    cores.append(c.reshape(r, modes[-1], 1))
+    return cores
+
+###########################################################
+#   TT rounding, cores are (r, m, r') or (r, m, m, r')    #
+###########################################################
+def tt_round(cores, tol=QTT_TOL):
+
+    shapes = [c.shape[1:-1] for c in cores]
+    cores  = [c.reshape(c.shape[0], -1, c.shape[-1]) for c in cores]
+    d = len(cores)
+
+#   right to left orthogonalisation, the norm then sits in the first core
+    for k in range(d-1, 0, -1):
+       r, m, rr = cores[k].shape
+       q, l = np.linalg.qr(cores[k].reshape(r, m*rr).T)
+       cores[k]   = q.T.reshape(-1, m, rr)
+       cores[k-1] = np.tensordot(cores[k-1], l.T, axes=(2, 0))
+
+    delta = tol*np.linalg.norm(cores[0])/np.sqrt(max(d-1, 1))
+    for k in range(d-1):
+       r, m, rr = cores[k].shape
+       u, s, vt = np.linalg.svd(cores[k].reshape(r*m, rr), full_matrices=False)
+       rk = trunc_rank(s, delta)
+       cores[k]   = u[:, :rk].reshape(r, m, rk)
+       cores[k+1] = np.tensordot(s[:rk, None]*vt[:rk], cores[k+1], axes=(1, 0))
+
+    return [c.reshape((c.shape[0],) + sh + (c.shape[-1],)) for c, sh in zip(cores, shapes)]
+
+###########################################################
+#   sum of TT tensors with the same mode sizes            #
+###########################################################
+def tt_add(terms):
+
+    d = len(terms[0])
+    if d == 1: return [sum(t[0] for t in terms)]
+
+    cores = []
+    for k in range(d):
+       ls = [t[k].shape[0] for t in terms]
+       rs = [t[k].shape[-1] for t in terms]
+       mid = terms[0][k].shape[1:-1]
+       if k == 0:
+          c = np.concatenate([t[k] for t in terms], axis=-1)
+       elif k == d-1:
+          c = np.concatenate([t[k] for t in terms], axis=0)
+       else:
+#         block diagonal in the rank indices
+          c = np.zeros((sum(ls),) + mid + (sum(rs),))
+          i = j = 0
+          for t, l, r in zip(terms, ls, rs):
+             c[i:i+l, ..., j:j+r] = t[k]
+             i += l
+             j += r
+       cores.append(c)
+    return cores
+
+###########################################################
+#   rank 2 MPO of the shift T[i][i+k] = 1, binary carry   #
+###########################################################
+def shift_mpo(k, d):
+
+#   first core holds the most significant bit, the carry runs from the last core to the first:
+#   i_t + k_t + c_in = j_t + 2 c_out, with i and j swapped for negative k
+    bits  = [(abs(k) >> (d-1-t)) & 1 for t in range(d)]
+    cores = []
+    for t in range(d):
+       g = np.zeros((2, 2, 2, 2))
+       for cout in range(2):
+          for a in range(2):
+             for cin in range(2):
+                s = a + bits[t] + cin
+                if s//2 != cout: continue
+                if k >= 0:
+                   g[cout, a, s % 2, cin] = 1.0
+                else:
+                   g[cout, s % 2, a, cin] = 1.0
+       cores.append(g)
+
+#   no carry out of the top bit, so i+k stays inside the matrix, and no carry into the bottom bit
+    cores[0]  = cores[0][:1]
+    cores[-1] = cores[-1][..., :1]
+    return cores
+
+###########################################################
+#   QTT cores of vector padded to 2^d with zeros          #
+###########################################################
+def qtt_vector(v, tol=QTT_TOL):
+    w = pad_vector(np.asarray(v))
+    d = nqubits(len(v))
+    return tt_svd(w, [2]*d, tol)
+
+###########################################################
+#   QTT MPO of sparse matrix from its diagonals           #
+###########################################################
+def qtt_matrix(a, tol=QTT_TOL, maxdiag=QTT_MAXDIAG):
+
+#   A = sum_k diag(a_k) T_k so the N x N matrix is never formed, identity padding as for Pauli strings
+    offsets, data = dia_from_csr(a, maxdiag)
+    if offsets is None: return None
+    n = data.shape[1]
+    d = nqubits(n)
+
+    terms = []
+    for off, row in zip(offsets, data):
+       v = pad_vector(row, d)
+       if off == 0: v[n:] = 1.0
+       vc = tt_svd(v, [2]*d, tol/np.sqrt(len(offsets)))
+       sc = shift_mpo(int(off), d)
+       terms.append([np.einsum('aib,cijd->acijbd', g, h).reshape(g.shape[0]*h.shape[0], 2, 2, g.shape[-1]*h.shape[-1])
+                     for g, h in zip(vc, sc)])
+    if n < 2**d and 0 not in offsets:
+       pad = tt_svd((np.arange(2**d) >= n).astype(np.double), [2]*d, tol)
+       terms.append([np.einsum('aib,ij->aijb', g, np.eye(2)) for g in pad])
+
+    return tt_round(tt_add(terms), tol)
+
+###########################################################
+#   apply QTT MPO to full vector of length 2^d            #
+###########################################################
+def qtt_matvec(cores, x):
+
+#   t is (rank, remaining column bits, row bits done)
+    t = np.asarray(x, dtype=np.double).reshape(1, -1, 1)
+    for g in cores:
+       r, jr, ia = t.shape
+       t = np.einsum('rjJI,rijs->sJIi', t.reshape(r, 2, jr//2, ia), g).reshape(g.shape[-1], jr//2, ia*2)
+    return t.reshape(-1)
+
+###########################################################
+#   full vector or matrix from QTT cores                  #
+###########################################################
+def qtt_full(cores, n=None):
+
+    t = np.ones((1, 1))
+    for g in cores:
+       t = np.tensordot(t, g, axes=(-1, 0))
+    d = len(cores)
+    if cores[0].ndim == 3:
+       v = t.reshape(-1)
+       return v if n is None else v[:n]
+
+#   matrix modes are interleaved (i1, j1, ..., id, jd)
+    N = 2**d
+    m = t.reshape([2]*(2*d)).transpose(list(range(0, 2*d, 2)) + list(range(1, 2*d, 2))).reshape(N, N)
+    return m if n is None else m[:n, :n]
+
+###########################################################
+#   ranks, storage and error report                       #
+###########################################################
+def qtt_report(name, cores, n, err):
+    ranks = [1] + [g.shape[-1] for g in cores]
+    size  = sum(g.size for g in cores)
+    print('QTT %-8s %2d cores, %8d entries for n = %d, max rank %d, relative error %.1e' %
+          (name, len(cores), size, n, max(ranks), err))
+    print('\tranks:', ' '.join(str(r) for r in ranks))
+
+###########################################################
+#   QTT matrix, RHS and solution with error estimates     #
+###########################################################
+def qtt_decompose(a, b, x, tol=QTT_TOL):
+
+    n = a.shape[0]
+    out = {}
+    mpo = qtt_matrix(a, tol)
+    if mpo is not None:
+#      error on a random vector, the dense matrix is never formed
+       z  = np.random.default_rng(0).standard_normal(n)
+       az = a @ z
+       err = np.linalg.norm(qtt_matvec(mpo, pad_vector(z, len(mpo)))[:n] - az)/max(np.linalg.norm(az), 1e-300)
+       qtt_report('matrix', mpo, n, err)
+       out['mat'] = mpo
+
+    for tag, v in (('rhs', b), ('sol', x)):
+       if v is None: continue
+       cores = qtt_vector(v, tol)
+       err = np.linalg.norm(qtt_full(cores, n) - v)/max(np.linalg.norm(v), 1e-300)
+       qtt_report(tag, cores, n, err)
+       out[tag] = cores
+
+    return out, n
+
+###########################################################
+#   save QTT cores to npz and binary files                #
+###########################################################
+def qtt_save(qtts, n, cname):
+
+    files = []
+    for tag, cores in qtts.items():
+       root  = cname + '_qtt_' + tag
+       ranks = np.array([1] + [g.shape[-1] for g in cores], dtype=np.int64)
+       kind  = 1 if cores[0].ndim == 4 else 0
+       print('\nsaving QTT', tag, 'to files:', root + '.npz', root + '.bin')
+       np.savez(root + '.npz', n=n, ranks=ranks, **{'core%d' % k: g for k, g in enumerate(cores)})
+
+#      bool real flag, int64 kind (0 vector, 1 matrix), n, d, d+1 ranks, then the cores in C order
+       with open(root + '.bin', "wb") as fp:
+          np.array([True], dtype=np.bool_).tofile(fp)
+          np.array([kind, n, len(cores)], dtype=np.int64).tofile(fp)
+          ranks.tofile(fp)
+          for g in cores:
+             np.asarray(g, dtype=np.double).tofile(fp)
+       files += [root + '.npz', root + '.bin']
+
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   read QTT cores from npz or binary file                #
+###########################################################
+def qtt_load(filename):
+
+    if filename.endswith('.npz'):
+       f = np.load(filename)
+       d = len(f['ranks']) - 1
+       return [f['core%d' % k] for k in range(d)], int(f['n'])
+
+    kind, n, d = (int(v) for v in np.fromfile(filename, dtype=np.int64, count=3, offset=1))
+    ranks = np.fromfile(filename, dtype=np.int64, count=d+1, offset=25)
+    off   = 25 + 8*(d+1)
+    cores = []
+    for k in range(d):
+       shape = (ranks[k],) + (2,)*(kind+1) + (ranks[k+1],)
+       cnt   = int(np.prod(shape))
+       cores.append(np.fromfile(filename, dtype=np.double, count=cnt, offset=off).reshape(shape))
+       off  += 8*cnt
+    return cores, n
@@ -32,6 +32,7 @@
 #################################################################################################
 
 import numpy as np
+from scipy.sparse import csr_matrix, issparse
 
 m = lambda i, j, k, ni, nj, nk: min(i,ni-1) + ni*min(j,nj-1) + ni*nj*min(k,nk-1)
 
@@ -41,8 +42,8 @@ m = lambda i, j, k, ni, nj, nk: min(i,ni-1) + ni*min(j,nj-1) + ni*nj*min(k,nk-1)
 def reorder(a, b, ni, nj, nk):
 
     na = ni*nj*nk                    # note nj and/or nk = 1 for 1D and 2D meshes
-    r = np.zeros(shape=(na), dtype=np.int)
-    f = np.zeros(shape=(na), dtype=np.int)
+    r = np.zeros(shape=(na), dtype=int)
+    f = np.zeros(shape=(na), dtype=int)
     r[0] = 0 
     f[0] = 1 
 
@@ -67,7 +68,7 @@ def reorder(a, b, ni, nj, nk):
 #   print(r)
 
 #   invert mapping
-    ma = np.zeros(shape=(na), dtype=np.int)
+    ma = np.zeros(shape=(na), dtype=int)
     n = 0
     for i in range(0, na):
        ma[r[i]] = n
@@ -80,6 +81,11 @@ def reorder(a, b, ni, nj, nk):
 #      for j in range(0, na):
 #         pa[i][j] = a[i][ma[j]]
 
+#   sparse matrices keep sparse permutation operators with p = q^T
+    if issparse(a):
+       q = csr_matrix((np.ones(na), (ma, np.arange(na))), shape=(na, na))
+       return q, csr_matrix(q.T @ a @ q), q.T @ b
+
 #   permutation operators - not p and q are 1-sparse and hence their own inverse
     p = f = np.zeros(shape=(na, na))
     q = f = np.zeros(shape=(na, na))
@@ -31,18 +31,93 @@
 #                                                                                               #
 #################################################################################################
 
+import os, sys, time, threading
 import numpy as np
 from   scipy.sparse import csr_matrix, save_npz
+from   concurrent.futures import ThreadPoolExecutor
+
+from   stats import stats_save
+
+#   background writers, compression and file writes release the GIL
+SAVE_THREADS = 4
+save_jobs  = []
+save_state = {'pool': None, 'stdout': None}
 
 ###########################################################
-#   save npz and npy files x=solution, not coordinates    #
+#   stdout that keeps the writers' lines per job          #
+###########################################################
+class SaveOutput:
+
+#   lines printed on a writer thread go to its job buffer, the main thread prints directly
+    def __init__(self, stream):
+       self.stream = stream
+       self.local  = threading.local()
+
+    def write(self, text):
+       buf = getattr(self.local, 'buf', None)
+       if buf is None: return self.stream.write(text)
+       buf.append(text)
+       return len(text)
+
+    def flush(self):
+       if getattr(self.local, 'buf', None) is None: self.stream.flush()
+
+    def __getattr__(self, name):
+       return getattr(self.stream, name)
+
 ###########################################################
-def case_save_npz(a, b, x, q, status, degen, order, casename):
+#   case name with degenerate and reordering suffixes     #
+###########################################################
+def case_name(casename, degen, order):
 
 #   append _r to casename if the matrix has been reordered
     cname = casename
     if degen: cname += '_d'
     if order: cname += '_r'
+    return cname
+
+###########################################################
+#   save sparse matrix to C binary file                   #
+###########################################################
+def save_mat_bin(filename, a):
+
+    s = csr_matrix(a)
+    rank = s.shape
+    nr   = np.long(rank[0])
+    nc   = np.long(rank[1])
+    nnz  = np.long(s.nnz)
+
+    real = np.array([True], dtype=np.bool)
+    dims = np.array([nr,nc,nnz], dtype=np.long)
+    rval = np.array([s.data],    dtype=np.double)
+    rstt = np.array([s.indptr],  dtype=np.long) 
+    col  = np.array([s.indices], dtype=np.long)
+
+    with open(filename, "wb") as fp:
+       real.tofile(fp)
+       dims.tofile(fp)
+       rval.tofile(fp)
+       col.tofile(fp)
+       rstt.tofile(fp)
+
+###########################################################
+#   save vector to C binary file                          #
+###########################################################
+def save_vec_bin(filename, v):
+
+    nv = np.array([len(v)], dtype=np.long)
+    vv = np.array([v],      dtype=np.double)
+
+    with open(filename, "wb") as fp:
+       nv.tofile(fp)
+       vv.tofile(fp)
+
+###########################################################
+#   save npz and npy files x=solution, not coordinates    #
+###########################################################
+def case_save_npz(a, b, x, q, status, degen, order, casename, opkey=None):
+
+    cname = case_name(casename, degen, order)
 
 #   save matrix
     filename = cname + '_mat.npz'
@@ -50,6 +125,9 @@ def case_save_npz(a, b, x, q, status, degen, order, casename):
     s = csr_matrix(a)
     save_npz(filename, s)
 
+#   structural statistics for catalogs, without reloading the matrix
+    stats_save(s, cname, opkey)
+
 #   save RHS
     filename = cname + '_rhs.npy'
     print('saving RHS vector to npy file:     ', filename)
@@ -68,84 +146,128 @@ def case_save_npz(a, b, x, q, status, degen, order, casename):
        s = csr_matrix(q)
        save_npz(filename, s)
 
+    files = [cname + '_mat.npz', cname + '_stats.json', cname + '_rhs.npy']
+    if status: files.append(cname + '_sol.npy')
+    if order:  files.append(cname + '_ord.npz')
+    return sum(os.path.getsize(f) for f in files)
+
 
 ###########################################################
 #   save binary files x=solution, not coordinates         #
 ###########################################################
 def case_save_bin(a, b, x, q, status, degen, order, casename):
 
-#   append _r to casename if the matrix has been reordered
-    cname = casename
-    if degen: cname += '_d'
-    if order: cname += '_r'
+    cname = case_name(casename, degen, order)
 
 #   save matrix
     filename = cname + '_mat.bin'
     print('\nsaving sparse matrix to binary file:  ', filename)
-
-    s = csr_matrix(a)
-    rank = s.shape
-    nr   = np.long(rank[0])
-    nc   = np.long(rank[1])
-    nnz  = np.long(s.nnz)
-
-    real = np.array([True], dtype=np.bool)
-    dims = np.array([nr,nc,nnz], dtype=np.long)
-    rval = np.array([s.data],    dtype=np.double)
-    rstt = np.array([s.indptr],  dtype=np.long) 
-    col  = np.array([s.indices], dtype=np.long)
-
-    with open(filename, "wb") as fp:
-       real.tofile(fp)
-       dims.tofile(fp)
-       rval.tofile(fp)
-       col.tofile(fp)
-       rstt.tofile(fp)
+    save_mat_bin(filename, a)
 
 #   save RHS
     filename = cname + '_rhs.bin'
     print('saving RHS vector to binary file:     ', filename)
-
-    nb = np.array([len(b)], dtype=np.long)
-    vb = np.array([b],      dtype=np.double)
-
-    with open(filename, "wb") as fp:
-       nb.tofile(fp)
-       vb.tofile(fp)
+    save_vec_bin(filename, b)
 
 #   save solution if found
     if status:
        filename = cname + '_sol.bin'
        print('saving solution vector to binary file:', filename)
- 
-       nx = np.array([len(x)], dtype=np.long)
-       vx = np.array([x],      dtype=np.double)
-    
-       with open(filename, "wb") as fp:
-          nx.tofile(fp)
-          vx.tofile(fp)
+       save_vec_bin(filename, x)
 
 #   for reordering, QLES needs Q to get x = Qx from linear solution
     if order:
        filename = cname + '_ord.bin'
        print('saving reorder matrix to binary file :', filename)
+       save_mat_bin(filename, q)
 
-       s = csr_matrix(q)
-       rank = s.shape
-       nr   = np.long(rank[0])
-       nc   = np.long(rank[1])
-       nnz  = np.long(s.nnz)
-
-       real = np.array([True], dtype=np.bool)
-       dims = np.array([nr,nc,nnz], dtype=np.long)
-       rval = np.array([s.data],    dtype=np.double)
-       rstt = np.array([s.indptr],  dtype=np.long)
-       col  = np.array([s.indices], dtype=np.long)
-
-       with open(filename, "wb") as fp:
-          real.tofile(fp)
-          dims.tofile(fp)
-          rval.tofile(fp)
-          col.tofile(fp)
-          rstt.tofile(fp)
+    files = [cname + '_mat.bin', cname + '_rhs.bin']
+    if status: files.append(cname + '_sol.bin')
+    if order:  files.append(cname + '_ord.bin')
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   save RHS and solution only, matrix is unchanged       #
+###########################################################
+def case_save_rhs(b, x, status, degen, order, casename):
+
+    cname = case_name(casename, degen, order)
+
+    filename = cname + '_rhs'
+    print('\nsaving RHS vector to files:     ', filename + '.npy', filename + '.bin')
+    np.save(filename + '.npy', b)
+    save_vec_bin(filename + '.bin', b)
+
+    if status:
+       filename = cname + '_sol'
+       print('saving solution vector to files:', filename + '.npy', filename + '.bin')
+       np.save(filename + '.npy', x)
+       save_vec_bin(filename + '.bin', x)
+
+    files = [cname + '_rhs' + ext for ext in ('.npy', '.bin')]
+    if status: files += [cname + '_sol' + ext for ext in ('.npy', '.bin')]
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   run one save function on a writer thread              #
+###########################################################
+def save_run(func, args):
+
+#   the save functions return the bytes they wrote, the time is of this job alone
+    out = save_state['stdout']
+    out.local.buf = []
+    error  = None
+    nbytes = 0
+    t0 = time.perf_counter()
+    try:
+       nbytes = func(*args) or 0
+    except Exception as e:
+       error = e
+    elapsed = time.perf_counter() - t0
+    text = ''.join(out.local.buf)
+    out.local.buf = None
+    return text, error, nbytes, elapsed
+
+###########################################################
+#   queue a save function on the background writers       #
+###########################################################
+def save_async(func, *args):
+
+#   the arrays must not be modified by the caller until save_join
+    if save_state['pool'] is None:
+       save_state['stdout'] = SaveOutput(sys.stdout)
+       sys.stdout = save_state['stdout']
+       save_state['pool'] = ThreadPoolExecutor(SAVE_THREADS)
+    save_jobs.append((func.__name__, save_state['pool'].submit(save_run, func, args)))
+
+###########################################################
+#   wait for queued saves, report throughput and errors   #
+###########################################################
+def save_join():
+
+    pool = save_state['pool']
+    if pool is None: return 0
+
+#   the writers' messages are printed whole, in the order the saves were queued
+    errors  = []
+    nbytes  = 0
+    elapsed = 0.0
+    for name, job in save_jobs:
+       text, error, jbytes, jtime = job.result()
+       save_state['stdout'].stream.write(text)
+       if error is not None: errors.append((name, error))
+       nbytes  += jbytes
+       elapsed += jtime
+    pool.shutdown()
+    sys.stdout = save_state['stdout'].stream
+
+#   throughput of one writer, summed over the jobs
+    print('\nwrote %.1f MB in %d jobs, %.2f s writing, %.1f MB/s, %d errors' %
+          (nbytes/2**20, len(save_jobs), elapsed, nbytes/2**20/max(elapsed, 1e-9), len(errors)))
+    for name, e in errors:
+       print('\terror in', name + ':', e)
 
+    save_jobs.clear()
+    save_state['pool']   = None
+    save_state['stdout'] = None
+    return len(errors)
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import os.path
+import numpy as np
+
+from pauli import nqubits, pad_vector
+
+###########################################################
+#   norm, RY and RZ angle trees of padded RHS             #
+###########################################################
+def prep_tree(b):
+
+#   heap layout: node k has children 2k and 2k+1, the root is 1 and the leaves are N..2N-1
+    v  = pad_vector(np.asarray(b))
+    N  = len(v)
+    nq = nqubits(N)
+
+#   norms and mean phases reduced one level at a time
+    norms = np.zeros(2*N)
+    phase = np.zeros(2*N)
+    norms[N:] = np.abs(v)
+    phase[N:] = np.where(v != 0, np.angle(v), 0.0)
+    for l in range(nq-1, -1, -1):
+       lo = 2**l
+       norms[lo:2*lo] = np.hypot(norms[2*lo:4*lo:2], norms[2*lo+1:4*lo:2])
+       phase[lo:2*lo] = 0.5*(phase[2*lo:4*lo:2] + phase[2*lo+1:4*lo:2])
+
+#   RY(ry[k]) splits the norm of node k between its children, RZ(rz[k]) their phases
+    ry = np.zeros(N)
+    rz = np.zeros(N)
+    ry[1:] = 2*np.arctan2(norms[3::2], norms[2::2])
+    rz[1:] = phase[3::2] - phase[2::2]
+
+    return nq, norms, ry, rz, phase[1]
+
+###########################################################
+#   state prepared by the angle tree, for checking        #
+###########################################################
+def prep_state(ry, rz, gphase=0.0):
+
+#   level l applies the rotations of nodes 2^l..2^(l+1)-1 controlled on the first l qubits
+    N   = len(ry)
+    amp = np.array([np.exp(1j*gphase)])
+    l   = 1
+    while l < N:
+       k   = np.arange(l, 2*l)
+       new = np.empty(2*l, dtype=complex)
+       new[0::2] = amp*np.cos(ry[k]/2)*np.exp(-0.5j*rz[k])
+       new[1::2] = amp*np.sin(ry[k]/2)*np.exp( 0.5j*rz[k])
+       amp = new
+       l  *= 2
+    return amp
+
+###########################################################
+#   build, check and save state preparation tree          #
+###########################################################
+def prep_save(b, cname):
+
+    nq, norms, ry, rz, gphase = prep_tree(b)
+    scale = norms[1]
+    if scale == 0.0:
+       print('\nRHS is zero, the state preparation tree prepares |0>')
+       err = 0.0
+    else:
+       err = np.abs(prep_state(ry, rz, gphase)[:len(b)] - np.asarray(b)/scale).max()
+    print('\nstate preparation tree: %d qubits, %d rotations, norm %.6e, max amplitude error %.1e' %
+          (nq, len(ry)-1, scale, err))
+
+    filename = cname + '_prep.npz'
+    print('saving state preparation tree to npz file:   ', filename)
+    np.savez(filename, nqubits=nq, n=len(b), gphase=gphase, norms=norms, ry=ry, rz=rz)
+
+#   int64 nqubits, n, then doubles global phase, 2N norms, N RY and N RZ angles, N = 2^nqubits
+    filename = cname + '_prep.bin'
+    print('saving state preparation tree to binary file:', filename)
+    with open(filename, "wb") as fp:
+       np.array([nq, len(b)], dtype=np.int64).tofile(fp)
+       np.array([gphase], dtype=np.double).tofile(fp)
+       norms.tofile(fp)
+       ry.tofile(fp)
+       rz.tofile(fp)
+
+    files = [cname + '_prep.npz', filename]
+    return sum(os.path.getsize(f) for f in files)
+
+###########################################################
+#   read state preparation tree from npz or binary file   #
+###########################################################
+def prep_load(filename):
+
+    if filename.endswith('.npz'):
+       f = np.load(filename)
+       return int(f['nqubits']), int(f['n']), float(f['gphase']), f['norms'], f['ry'], f['rz']
+
+    nq, n  = (int(v) for v in np.fromfile(filename, dtype=np.int64, count=2))
+    N      = 2**nq
+    d      = np.fromfile(filename, dtype=np.double, offset=16)
+    return nq, n, float(d[0]), d[1:2*N+1], d[2*N+1:3*N+1], d[3*N+1:4*N+1]
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import json
+import numpy as np
+from   scipy.sparse import csr_matrix
+
+from pauli import nqubits
+
+###########################################################
+#   structural statistics from the CSR arrays             #
+###########################################################
+def mat_stats(a):
+
+    s = csr_matrix(a)
+    if not s.has_canonical_format:
+       s = s.copy()
+       s.sum_duplicates()
+    nr, nc = s.shape
+    val, col, ptr = s.data, s.indices.astype(np.int64), s.indptr
+
+#   row of each entry, everything else is reduced from the entries with bincount
+    rnnz = np.diff(ptr)
+    row  = np.repeat(np.arange(nr, dtype=np.int64), rnnz)
+    off  = col - row
+    aval = np.abs(val)
+    diag = np.bincount(row, weights=np.where(off == 0, val, 0.0), minlength=nr)
+    rsum = np.bincount(row, weights=np.where(off == 0, 0.0, aval), minlength=nr)
+
+#   diagonal dominance |a_ii| / sum_j!=i |a_ij|, rows without off-diagonals are dominant, 1e-12 for rounding
+    with np.errstate(divide='ignore', invalid='ignore'):
+       ratio = np.where(rsum > 0, np.abs(diag)/rsum, np.inf)
+
+#   ||A - A^T||_F^2 = 2 sum a_ij^2 - 2 sum a_ij a_ji, a_ji found by searching the sorted entry keys
+    sym = 0.0
+    fro = float(np.sqrt(val @ val))
+    if nr == nc:
+       key  = row*nc + col
+       tkey = col*nc + row
+       k = np.minimum(np.searchsorted(key, tkey), len(key)-1)
+       at = np.where(key[k] == tkey, val[k], 0.0) if len(key) else val
+       sym = float(np.sqrt(max(2.0*(val @ val) - 2.0*(val @ at), 0.0)))
+
+    hist = np.bincount(rnnz)
+    nq = nqubits(nr)
+    return {'nrow': int(nr), 'ncol': int(nc), 'nnz': int(s.nnz),
+            'row_nnz': {'min': int(rnnz.min()), 'max': int(rnnz.max()), 'mean': float(rnnz.mean()),
+                        'hist': {str(k): int(c) for k, c in enumerate(hist) if c}},
+            'bandwidth': {'lower': int(max(-off.min(), 0)) if len(off) else 0,
+                          'upper': int(max(off.max(), 0)) if len(off) else 0},
+            'diag_dominance': {'min_ratio': float(ratio.min()) if np.isfinite(ratio.min()) else None,
+                               'strict_rows': int((ratio > 1+1e-12).sum()), 'weak_rows': int((ratio >= 1-1e-12).sum())},
+            'norm_fro': fro,
+            'symmetry_defect': sym, 'symmetry_defect_rel': sym/fro if fro > 0 else 0.0,
+            'gershgorin': {'min': float((diag - rsum).min()), 'max': float((diag + rsum).max()),
+                           'abs_max': float((np.abs(diag) + rsum).max())},
+            'qubits': nq, 'qubits_herm': nq + (sym > 1e-14*fro)}
+
+###########################################################
+#   save statistics to json sidecar                       #
+###########################################################
+def stats_save(a, cname, opkey=None):
+
+#   the operator cache key identifies the matrix files for a later --cache run
+    stats = mat_stats(a)
+    stats['opkey'] = opkey
+
+    filename = cname + '_stats.json'
+    print('saving matrix statistics to json file:', filename)
+    with open(filename, 'w') as f:
+       json.dump(stats, f, indent=2)
+
+###########################################################
+#   read json sidecar, None if missing or unreadable      #
+###########################################################
+def stats_load(cname):
+
+    try:
+       with open(cname + '_stats.json') as f:
+          return json.load(f)
+    except (OSError, ValueError):
+       return None
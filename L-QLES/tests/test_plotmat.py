@@ -0,0 +1,33 @@
+import os
+import sys
+import subprocess
+
+HERE  = os.path.dirname(os.path.abspath(__file__))
+LQLES = os.path.join(HERE, '..', 'l-qles.py')
+INPUT = os.path.join(HERE, '..', 'input_files', 'input_3d_4x8x8_dndddd.xml')
+
+
+def run(args, cwd):
+    env = dict(os.environ, MPLBACKEND='Agg')
+    return subprocess.run([sys.executable, LQLES, '-i', INPUT] + args, cwd=cwd, env=env,
+                          capture_output=True, text=True)
+
+
+def test_plot_matrix_with_slab(tmp_path):
+    r = run(['--slab', '-m'], tmp_path)
+    assert r.returncode == 0, r.stderr
+    assert 'wrote' in r.stdout
+
+
+def test_plot_matrix_with_cache_hit(tmp_path):
+    cache = str(tmp_path / 'cache')
+    assert run(['--cache=' + cache], tmp_path).returncode == 0
+    r = run(['--cache=' + cache, '-m'], tmp_path)
+    assert r.returncode == 0, r.stderr
+    assert 'reading operator from cache file' in r.stdout
+
+
+def test_plot_matrix_with_sparse_plan(tmp_path):
+    r = run(['--max-mem=1G', '--slab', '-m'], tmp_path)
+    assert r.returncode == 0, r.stderr
+    assert 'plot' in r.stdout and 'wrote' in r.stdout
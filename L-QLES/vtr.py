@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+#################################################################################################
+#                                                                                               #
+# Code for generating 1D 2d and 3D Laplacian operators with representative boundary conditions  #
+# for testing Quantum Linear Equation Solvers                                                   #
+#                                                                                               #
+# Copyright 2024 Rolls-Royce plc                                                                #
+#                                                                                               #
+# Redistribution and use in source and binary forms, with or without modification, are          #
+# permitted provided that the following conditions are met:                                     #
+#                                                                                               #
+# 1. Redistributions of source code must retain the above copyright notice, this list of        #
+#    conditions and the following disclaimer.                                                   #
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of     #
+#    conditions and the following disclaimer in the documentation and/or other materials        #
+#    provided with the distribution.                                                            #
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to  #
+#    endorse or promote products derived from this software without specific prior written      #
+#    permission.                                                                                #
+#                                                                                               #           
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS   #
+# OR IMPLIED  WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF              #
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE    #
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,     #
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE #
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED    #
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING     #
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED  #
+# OF THE POSSIBILITY OF SUCH DAMAGE.                                                            #
+#                                                                                               #
+#################################################################################################
+
+import numpy as np
+
+#   values written per block so the field is never copied whole
+VTK_CHUNK = 1 << 20
+
+###########################################################
+#   write one appended block: byte count then data        #
+###########################################################
+def vtk_block(fp, v):
+
+    v = np.asarray(v)
+    np.array([8*v.size], dtype='<u8').tofile(fp)
+    for i in range(0, v.size, VTK_CHUNK):
+       np.asarray(v[i:i+VTK_CHUNK], dtype='<f8').tofile(fp)
+
+###########################################################
+#   save solution as VTK rectilinear grid, appended raw   #
+###########################################################
+def vtk_save(x, y, z, s, cname):
+
+#   missing directions are a single point at 0, VTK points are x fastest as the solution
+    coords = [np.asarray(c, dtype=np.double) if c is not None else np.zeros(1) for c in (x, y, z)]
+    nx, ny, nz = (len(c) for c in coords)
+    s = np.ravel(s)
+    if s.size != nx*ny*nz:
+       print('\nsolution length', s.size, 'does not match the mesh, VTK file not written')
+       return 0
+
+#   offsets of the appended blocks, each has an 8 byte length header
+    arrays = coords + [s]
+    offsets = np.cumsum([0] + [8 + 8*a.size for a in arrays])
+
+    filename = cname + '_sol.vtr'
+    print('\nsaving solution to VTK file:', filename)
+    extent = '0 {} 0 {} 0 {}'.format(nx-1, ny-1, nz-1)
+    header = ['<?xml version="1.0"?>',
+              '<VTKFile type="RectilinearGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+              '  <RectilinearGrid WholeExtent="{}">'.format(extent),
+              '    <Piece Extent="{}">'.format(extent),
+              '      <PointData Scalars="solution">',
+              '        <DataArray type="Float64" Name="solution" format="appended" offset="{}"/>'.format(offsets[3]),
+              '      </PointData>',
+              '      <Coordinates>']
+    for k, xyz in enumerate(('x', 'y', 'z')):
+       header.append('        <DataArray type="Float64" Name="{}" format="appended" offset="{}"/>'.format(xyz, offsets[k]))
+    header += ['      </Coordinates>',
+               '    </Piece>',
+               '  </RectilinearGrid>',
+               '  <AppendedData encoding="raw">',
+               '   _']
+
+    with open(filename, 'wb') as fp:
+       fp.write('\n'.join(header).encode())
+       for a in arrays:
+          vtk_block(fp, a)
+       fp.write(b'\n  </AppendedData>\n</VTKFile>\n')
+       return fp.tell()
+
+###########################################################
+#   read VTK file written by vtk_save                     #
+###########################################################
+def vtk_load(filename):
+
+    with open(filename, 'rb') as fp:
+       data = fp.read()
+    start = data.index(b'<AppendedData encoding="raw">')
+    start = data.index(b'_', start) + 1
+
+#   blocks are x, y, z and the solution in the order written
+    arrays = []
+    pos = start
+    for _ in range(4):
+       nbytes = int(np.frombuffer(data, dtype='<u8', count=1, offset=pos)[0])
+       arrays.append(np.frombuffer(data, dtype='<f8', count=nbytes//8, offset=pos+8).copy())
+       pos += 8 + nbytes
+
+    x, y, z, s = arrays
+    return x, y, z, s.reshape(len(z), len(y), len(x))